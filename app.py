@@ -23,7 +23,9 @@ import gradio as gr
 # Local Imports
 from utilities import (
     process_audio_stem_separation,
+    process_karaoke_stem_separation,
     process_audio_to_midi_conversion,
+    preload_audio_to_midi_model,
     process_audio_lyric_extraction,
     process_audio_lyric_translation,
     get_available_languages,
@@ -53,11 +55,12 @@ def create_audio_separation_interface():
                 
             with gr.Column(scale=1):
                 gr.Markdown("### Parameters for audio separation using the AI model.")
-                model = gr.Textbox(value="htdemucs_ft", label="Demucs Model", placeholder="htdemucs_ft")
+                model = gr.Textbox(value="auto", label="Demucs Model (`auto` picks the best model for the time limit)", placeholder="auto")
                 save_as_mp3 = gr.Checkbox(label="Save as MP3?", value=True)
                 mp3_bitrate = gr.Slider(minimum=60, maximum=600, step=20, value=320, label="MP3 Bitrate (kbps)")
                 use_float32 = gr.Checkbox(label="32-bit Float Output?", value=False)
                 use_int24 = gr.Checkbox(label="24-bit Integer Output?", value=False)
+                latency_target = gr.Slider(minimum=10, maximum=1200, step=10, value=180, label="Time Limit for `auto` (seconds)")
 
         with gr.Row():
             with gr.Column(scale=1):
@@ -69,7 +72,7 @@ def create_audio_separation_interface():
 
         process_button.click(
             process_audio_stem_separation,
-            inputs=[audio_input, model, save_as_mp3, mp3_bitrate, use_float32, use_int24],
+            inputs=[audio_input, model, save_as_mp3, mp3_bitrate, use_float32, use_int24, latency_target],
             outputs=[instrumental_output, vocal_output, bass_output, drum_output],
         )
     return interface
@@ -145,17 +148,21 @@ def create_modify_midi_interface():
 
         with gr.Row():
             with gr.Column(scale=1):
+                generate_preview = gr.Checkbox(label="Generate Audio Preview?", value=True)
                 process_button = gr.Button("Modify MIDI")
 
         with gr.Row():
             with gr.Column(scale=1):
                 gr.Markdown("### Modified `MIDI` output file.")
                 modified_midi_output = gr.Audio(label="Modified MIDI")
+            with gr.Column(scale=1):
+                gr.Markdown("### Audio preview of the modified `MIDI`.")
+                preview_output = gr.Audio(label="Preview")
 
         process_button.click(
             process_midi_style_conversion,
-            inputs=[midi_input, song_dir_name, song_prefix_name, prompt],
-            outputs=[modified_midi_output],
+            inputs=[midi_input, song_dir_name, song_prefix_name, prompt, generate_preview],
+            outputs=[modified_midi_output, preview_output],
         )
     return interface
 
@@ -334,12 +341,30 @@ def create_audio_merging_interface():
                 gr.Markdown("### Merged Audio Output")
                 fused_output = gr.Audio(label="Merged Audio")
 
+        with gr.Row():
+            gr.Markdown("### Or separate the original song directly into `vocals` and `instrumental` (no merging needed).")
+
+        with gr.Row():
+            with gr.Column(scale=1):
+                song_input = gr.Audio(type="filepath", label="Original Song", sources="upload")
+                model = gr.Textbox(value="auto", label="Demucs Model", placeholder="auto")
+                separate_button = gr.Button("Separate for Karaoke")
+            with gr.Column(scale=1):
+                instrumental_output = gr.Audio(label="Instrumental")
+                vocals_output = gr.Audio(label="Vocals")
+
         fuse_button.click(
             process_audio_merging,
             inputs=[bass_input, drums_input, other_input, name_file],
             outputs=[fused_output],
         )
 
+        separate_button.click(
+            process_karaoke_stem_separation,
+            inputs=[song_input, model],
+            outputs=[instrumental_output, vocals_output],
+        )
+
     return interface
 
 # ════════════════════════════════════════════════════════════
@@ -482,4 +507,7 @@ tabbed_interface = gr.TabbedInterface(
     theme="shivi/calm_seafoam",
 )
 
+# Load and warm up the basic-pitch model once, before the first request
+preload_audio_to_midi_model()
+
 tabbed_interface.launch()
\ No newline at end of file
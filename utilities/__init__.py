@@ -1,6 +1,6 @@
 from .print_utilities import print_title, print_message
-from .audio_stem_separation import process_audio_stem_separation
-from .audio_to_midi import process_audio_to_midi_conversion
+from .audio_stem_separation import process_audio_stem_separation, process_karaoke_stem_separation, batch_audio_stem_separation
+from .audio_to_midi import process_audio_to_midi_conversion, preload_audio_to_midi_model, batch_audio_to_midi_conversion
 from .lyrics_processing import process_audio_lyric_extraction, process_audio_lyric_translation, get_available_languages
 from .midi_style_conversion import process_midi_style_conversion
 from .karaoke_generator import (
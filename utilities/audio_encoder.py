@@ -0,0 +1,192 @@
+"""
+Parallel encoder for the final, user-facing audio files.
+
+Stems used to be encoded one after another inside Demucs, and merged mixes were exported
+through pydub/ffmpeg on the request thread. Here each file is encoded in-process
+(`lameenc` for MP3, `libsndfile` for FLAC/WAV) on a shared thread pool, one job per file.
+Both libraries release the GIL while encoding, so threads scale with the number of
+cores without pickling the audio across processes.
+
+Formats are looked up by file extension in `FORMATS`; new formats can be added with
+`register_format`.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+import os
+import threading
+
+# Third-Party Imports
+import lameenc
+import numpy as np
+import soundfile as sf
+
+DEFAULT_MP3_RATE = 320
+MP3_QUALITY = 2  # Same LAME quality setting as `demucs.audio.encode_mp3`
+ENCODER_WORKERS = min(8, os.cpu_count() or 1)
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+class _Mp3Writer:
+    """Incremental MP3 writer using `lameenc`."""
+
+    def __init__(self, path, samplerate, channels, mp3_rate=DEFAULT_MP3_RATE, **_):
+        self._encoder = lameenc.Encoder()
+        self._encoder.set_bit_rate(mp3_rate)
+        self._encoder.set_in_sample_rate(samplerate)
+        self._encoder.set_channels(channels)
+        self._encoder.set_quality(MP3_QUALITY)
+        self._file = open(path, "wb")
+
+    def write(self, block):
+        """Append a float block of shape (samples, channels)."""
+        pcm = np.clip(block * 2**15, -2**15, 2**15 - 1).astype(np.int16)
+        self._file.write(self._encoder.encode(np.ascontiguousarray(pcm).tobytes()))
+
+    def close(self):
+        """Flush the encoder and close the file."""
+        self._file.write(self._encoder.flush())
+        self._file.close()
+
+
+class _SoundFileWriter:
+    """Incremental lossless writer using `soundfile` (WAV int16/int24/float32, FLAC)."""
+
+    def __init__(self, path, samplerate, channels, float32=False, int24=False, format="WAV", **_):
+        if format == "FLAC":
+            # FLAC has no float samples; keep 24-bit precision when float32 is requested
+            subtype = "PCM_24" if float32 or int24 else "PCM_16"
+        else:
+            subtype = "FLOAT" if float32 else "PCM_24" if int24 else "PCM_16"
+        self._file = sf.SoundFile(path, "w", samplerate=samplerate, channels=channels, format=format, subtype=subtype)
+
+    def write(self, block):
+        """Append a float block of shape (samples, channels)."""
+        self._file.write(block)
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+
+# Writer factory for each supported file extension
+FORMATS = {
+    ".mp3": _Mp3Writer,
+    ".wav": lambda *args, **kwargs: _SoundFileWriter(*args, format="WAV", **kwargs),
+    ".flac": lambda *args, **kwargs: _SoundFileWriter(*args, format="FLAC", **kwargs),
+}
+
+
+def register_format(extension, writer_factory):
+    """
+    Register a writer for a file extension.
+
+    Args:
+        extension (str): File extension, including the dot (e.g., '.ogg').
+        writer_factory (callable): Called as `factory(path, samplerate, channels, **options)`
+            and returning an object with `write(block)` and `close()` methods.
+    """
+    FORMATS[extension.lower()] = writer_factory
+
+
+def open_writer(path, samplerate, channels, mp3_rate=DEFAULT_MP3_RATE, float32=False, int24=False, output_format=None):
+    """
+    Open an incremental writer for an audio file, chosen by its extension.
+
+    Args:
+        path (str): Output path; the extension selects the format unless `output_format` is given.
+        samplerate (int): Samplerate of the audio.
+        channels (int): Number of channels.
+        mp3_rate (int): Bitrate for MP3 output.
+        float32 (bool): Write float32 samples (WAV).
+        int24 (bool): Write 24-bit samples (WAV/FLAC).
+        output_format (str, optional): Format to write (e.g., 'mp3'), overriding the extension.
+
+    Returns:
+        object: Writer with `write(block)` for (samples, channels) float blocks and `close()`.
+    """
+    path = Path(path)
+    extension = f".{output_format.lower().lstrip('.')}" if output_format else path.suffix.lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported output format `{extension}`. Supported formats: {list(FORMATS)}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return FORMATS[extension](path, samplerate, channels, mp3_rate=mp3_rate, float32=float32, int24=int24)
+
+
+def _prevent_clip(wav, clip):
+    """
+    Keep samples within [-1, 1], as `demucs.audio.prevent_clip` does.
+
+    Args:
+        wav (np.ndarray): Samples of shape (channels, samples).
+        clip (str): 'rescale' to scale the whole signal down, 'clamp' to clip it, or 'none'.
+
+    Returns:
+        np.ndarray: Samples of the same shape.
+    """
+    if clip == "rescale":
+        return wav / max(1.01 * float(np.abs(wav).max(initial=0.0)), 1.0)
+    if clip == "clamp":
+        return np.clip(wav, -0.99, 0.99)
+    return wav
+
+
+def encode_audio(wav, path, samplerate, mp3_rate=DEFAULT_MP3_RATE, float32=False, int24=False, clip="rescale", output_format=None):
+    """
+    Encode a whole waveform to an audio file.
+
+    Args:
+        wav (np.ndarray): Samples of shape (channels, samples).
+        path (str): Output path; the extension selects the format unless `output_format` is given.
+        samplerate (int): Samplerate of the audio.
+        clip (str): Clipping strategy, see `_prevent_clip`.
+        Other parameters are explained in `open_writer`.
+
+    Returns:
+        Path: Path to the encoded file.
+    """
+    wav = _prevent_clip(np.asarray(wav, dtype=np.float32), clip)
+    if wav.ndim == 1:
+        wav = wav[None]
+
+    writer = open_writer(path, samplerate, wav.shape[0], mp3_rate=mp3_rate, float32=float32, int24=int24, output_format=output_format)
+    try:
+        writer.write(np.ascontiguousarray(wav.T))
+    finally:
+        writer.close()
+    return Path(path)
+
+
+def _get_pool():
+    """Return the shared encoder thread pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=ENCODER_WORKERS, thread_name_prefix="encoder")
+        return _POOL
+
+
+def encode_many(jobs, mp3_rate=DEFAULT_MP3_RATE, float32=False, int24=False, clip="rescale"):
+    """
+    Encode several waveforms in parallel, yielding each one as soon as it is written.
+
+    Args:
+        jobs (dict): Mapping of name to (samples of shape (channels, samples), path, samplerate).
+        Other parameters are explained in `encode_audio`.
+
+    Yields:
+        tuple: (name, Path) for each finished file, in completion order.
+    """
+    pool = _get_pool()
+    futures = {
+        pool.submit(encode_audio, wav, path, samplerate, mp3_rate, float32, int24, clip): name
+        for name, (wav, path, samplerate) in jobs.items()
+    }
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
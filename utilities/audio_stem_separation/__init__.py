@@ -1 +1,2 @@
-from .gradio_handlers import process_audio_stem_separation
\ No newline at end of file
+from .gradio_handlers import process_audio_stem_separation, process_karaoke_stem_separation
+from .batch import batch_audio_stem_separation
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Batch separation of whole directories or lists of audio files.
+
+Files are spread over a pool of worker processes. Each worker is pinned to its own subset
+of CPU cores, loads the Demucs model once and keeps it resident for every file it handles.
+Results are collected into a per-file manifest.
+
+Usage:
+    python -m utilities.audio_stem_separation.batch <dir-or-files>... [-n MODEL] [-w WORKERS]
+"""
+from pathlib import Path
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+# Third-Party Libraries
+import torch
+
+# Local Imports
+from ..print_utilities import print_title, print_message
+from .main import _audio_stem_separation
+from .engine import _load_model
+from .utilities import _collect_audio_files
+from .constants import (
+    AUTO_MODEL,
+    DEFAULT_MODEL,
+    DEFAULT_MP3_RATE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_BATCH_WORKERS,
+    BATCH_MANIFEST_NAME,
+)
+
+
+def _split_cores(workers):
+    """
+    Split the available CPU cores into one disjoint subset per worker.
+
+    Args:
+        workers (int): Number of worker processes.
+
+    Returns:
+        list: One list of core ids per worker.
+    """
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    workers = max(1, min(workers, len(cores)))
+    size, remainder = divmod(len(cores), workers)
+
+    subsets, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < remainder else 0)
+        subsets.append(cores[start:end])
+        start = end
+    return subsets
+
+
+def _init_worker(core_queue, model):
+    """
+    Pin a worker process to its cores and load the model once.
+
+    Args:
+        core_queue (multiprocessing.Queue): Queue of core subsets, one taken per worker.
+        model (str): Name of the Demucs model to keep resident.
+    """
+    cores = core_queue.get()
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+
+    # With the `auto` policy the model is chosen per file, and loaded on first use
+    if model != AUTO_MODEL:
+        _load_model(model)
+
+
+def _separate_worker(job):
+    """
+    Separate a single file inside a worker process.
+
+    Args:
+        job (dict): Input path and separation options.
+
+    Returns:
+        dict: Manifest entry for the file.
+    """
+    start_time = time.perf_counter()
+    entry = {"input": str(job["input_file"]), "status": "failed", "stems": [], "seconds": None, "error": None}
+
+    try:
+        results = _audio_stem_separation(**job)
+        if results is None:
+            entry["error"] = "No results returned from `_audio_stem_separation`."
+        else:
+            entry["status"] = "ok"
+            entry["stems"] = [str(path) for path in results]
+
+    except Exception as e:
+        entry["error"] = str(e)
+
+    entry["seconds"] = round(time.perf_counter() - start_time, 3)
+    return entry
+
+
+def batch_audio_stem_separation(
+    inputs,
+    output_path=DEFAULT_OUTPUT_DIR,
+    model=DEFAULT_MODEL,
+    two_stems=None,
+    mp3=True,
+    mp3_rate=DEFAULT_MP3_RATE,
+    float32=False,
+    int24=False,
+    workers=DEFAULT_BATCH_WORKERS,
+):
+    """
+    Separate many audio files with a pool of pinned worker processes.
+
+    Args:
+        inputs (str or list): A directory, a file, or a list of either.
+        output_path (str): Root output directory for the stems.
+        workers (int): Number of worker processes, each with its own resident model.
+        Other parameters are explained in the `process_audio_stem_separation` function.
+
+    Returns:
+        list[dict]: Manifest with one entry per file (input, status, stems, seconds, error).
+    """
+    print_title("Batch Separating Audio with Demucs")
+
+    audio_files = _collect_audio_files(inputs)
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    if not audio_files:
+        print_message("[WARNING]", text_color="bright_yellow")
+        print_message("No audio files found.", text_color="bright_yellow", indent_level=1, include_border=True)
+        return []
+
+    jobs = [
+        {
+            "input_file": path,
+            "output_path": output_path,
+            "model": model,
+            "two_stems": two_stems,
+            "mp3": mp3,
+            "mp3_rate": mp3_rate,
+            "float32": float32,
+            "int24": int24,
+        }
+        for path in audio_files
+    ]
+
+    core_subsets = _split_cores(min(workers, len(jobs)))
+
+    print_message("[INFO]", text_color="bright_blue")
+    print_message(f"Separating {len(jobs)} file(s) with {len(core_subsets)} worker(s):", text_color="bright_blue", indent_level=1)
+    for i, cores in enumerate(core_subsets, start=1):
+        print_message(f"Worker #{i}: cores {cores}", text_color="bright_blue", indent_level=2)
+    print_message("", include_border=True)
+
+    # Hand one core subset to each worker as it starts
+    core_queue = mp.Queue()
+    for cores in core_subsets:
+        core_queue.put(cores)
+
+    start_time = time.perf_counter()
+    with mp.Pool(len(core_subsets), initializer=_init_worker, initargs=(core_queue, model)) as pool:
+        manifest = pool.map(_separate_worker, jobs, chunksize=1)
+
+    # Save the manifest next to the stems
+    manifest_path = output_path / BATCH_MANIFEST_NAME
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    succeeded = sum(entry["status"] == "ok" for entry in manifest)
+    print_message("[SUCCESS]", text_color="bright_green")
+    print_message(f"Separated {succeeded}/{len(manifest)} file(s) in {time.perf_counter() - start_time:.1f}s.", text_color="bright_green", indent_level=1)
+    print_message(f"Manifest saved at: `{manifest_path}`", text_color="bright_green", indent_level=1, include_border=True)
+
+    return manifest
+
+
+def _parse_args():
+    """Parse the command-line arguments for batch separation."""
+    parser = argparse.ArgumentParser(description="Separate a directory or list of audio files into stems.")
+    parser.add_argument("inputs", nargs="+", help="Audio files and/or directories containing audio files.")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT_DIR, help="Root output directory for the stems.")
+    parser.add_argument("-n", "--model", default=DEFAULT_MODEL, help="Demucs model name, or `auto` to pick a tier per file.")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_BATCH_WORKERS, help="Number of worker processes.")
+    parser.add_argument("--two-stems", default=None, help="Only separate this stem and its complement.")
+    parser.add_argument("--wav", action="store_true", help="Save WAV files instead of MP3.")
+    parser.add_argument("--mp3-bitrate", type=int, default=DEFAULT_MP3_RATE, help="Bitrate for MP3 output.")
+    parser.add_argument("--float32", action="store_true", help="Save float32 WAV files.")
+    parser.add_argument("--int24", action="store_true", help="Save int24 WAV files.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    batch_audio_stem_separation(
+        args.inputs,
+        output_path=args.output,
+        model=args.model,
+        two_stems=args.two_stems,
+        mp3=not args.wav,
+        mp3_rate=args.mp3_bitrate,
+        float32=args.float32,
+        int24=args.int24,
+        workers=args.workers,
+    )
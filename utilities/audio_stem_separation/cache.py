@@ -0,0 +1,262 @@
+"""
+Content-addressed cache for separated stems.
+
+Entries are keyed by a hash of the decoded audio together with every option that changes
+the stems written by Demucs (model, `two_stems` and the output format flags), so the same
+track uploaded again under any file name or container returns the existing stems.
+
+The output tree is kept under a size budget with a least-recently-used policy: each
+`<model>/<track>/` directory is one eviction unit and its modification time is the LRU clock.
+
+The index is shared by every batch worker process, so each read-modify-write of it holds a
+file lock next to the index (see `_file_lock`).
+"""
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+
+# Third-Party Libraries
+import numpy as np
+from demucs.audio import AudioFile
+
+# Local Imports
+from ..print_utilities import print_message
+from ..file_utilities import file_digest, write_json_atomic
+from .constants import (
+    CACHE_SAMPLERATE,
+    CACHE_CHANNELS,
+    STEM_CACHE_INDEX,
+    STEM_CACHE_LOCK,
+    STEM_CACHE_MAX_BYTES,
+    STEM_CACHE_MAX_FILES,
+    TWO_STEM_RESIDUAL,
+    LONGFORM_THRESHOLD_SECONDS,
+    LONGFORM_WINDOW_SECONDS,
+)
+from .utilities import _file_lock
+
+
+def _audio_digest(input_path):
+    """
+    Return the SHA-256 digest of the decoded PCM audio.
+
+    Recordings longer than `LONGFORM_THRESHOLD_SECONDS` are decoded and hashed in blocks of
+    `LONGFORM_WINDOW_SECONDS`, as `longform.py` streams them, so hashing a long set never
+    holds the whole decoded recording in memory.
+
+    Args:
+        input_path (Path): Path to the audio file.
+
+    Returns:
+        str: Hex digest of the decoded float32 samples.
+    """
+    audio_file = AudioFile(input_path)
+    digest = hashlib.sha256()
+
+    if float(audio_file.info["format"]["duration"]) <= LONGFORM_THRESHOLD_SECONDS:
+        wav = audio_file.read(streams=0, samplerate=CACHE_SAMPLERATE, channels=CACHE_CHANNELS)
+        digest.update(np.ascontiguousarray(wav.numpy(), dtype=np.float32).tobytes())
+        return digest.hexdigest()
+
+    block = int(LONGFORM_WINDOW_SECONDS * CACHE_SAMPLERATE)
+    start = 0
+    while True:
+        wav = audio_file.read(
+            seek_time=start / CACHE_SAMPLERATE, duration=block / CACHE_SAMPLERATE,
+            streams=0, samplerate=CACHE_SAMPLERATE, channels=CACHE_CHANNELS)
+        digest.update(np.ascontiguousarray(wav.numpy(), dtype=np.float32).tobytes())
+        if wav.shape[-1] < block:
+            break
+        start += block
+    return digest.hexdigest()
+
+
+def _index_lock(output_path):
+    """Return the lock that guards every read-modify-write of the cache index."""
+    return _file_lock(Path(output_path) / STEM_CACHE_LOCK)
+
+
+def _load_index(output_path):
+    """Load the cache index for an output directory."""
+    index_path = Path(output_path) / STEM_CACHE_INDEX
+    if not index_path.exists():
+        return {"entries": {}, "files": {}}
+    try:
+        with open(index_path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        # A corrupt index only costs a re-separation
+        return {"entries": {}, "files": {}}
+
+
+def _save_index(output_path, index):
+    """Atomically write the cache index for an output directory."""
+    write_json_atomic(Path(output_path) / STEM_CACHE_INDEX, index)
+
+
+def _stat_signature(path):
+    """Return the (size, mtime) signature used to detect overwritten stems."""
+    stat = Path(path).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _resolve_audio_digest(input_path, output_path):
+    """
+    Return the digest of the decoded audio of an input file.
+
+    Decoding is skipped when the exact same file bytes have been hashed before.
+    The result is shared by the cache keys of every candidate model.
+
+    Args:
+        input_path (Path): Path to the audio file.
+        output_path (Path): Root output directory of the cache.
+
+    Returns:
+        str: Hex digest of the decoded audio.
+    """
+    input_digest = file_digest(input_path)
+
+    with _index_lock(output_path):
+        audio_digest = _load_index(output_path)["files"].get(input_digest)
+
+    if audio_digest is None:
+        audio_digest = _audio_digest(input_path)
+        with _index_lock(output_path):
+            index = _load_index(output_path)
+            index["files"][input_digest] = audio_digest
+
+            # Keep only the most recent file digests
+            for stale in list(index["files"])[:-STEM_CACHE_MAX_FILES]:
+                del index["files"][stale]
+            _save_index(output_path, index)
+
+    return audio_digest
+
+
+def _build_cache_key(audio_digest, model, two_stems, mp3, mp3_rate, float32, int24):
+    """
+    Build the cache key for a separation request.
+
+    Args:
+        audio_digest (str): Digest from `_resolve_audio_digest`.
+
+    Returns:
+        str: Hex digest identifying the audio content and separation options.
+    """
+    options = json.dumps([
+        audio_digest, model, two_stems, TWO_STEM_RESIDUAL if two_stems else None,
+        bool(mp3), int(mp3_rate) if mp3 else None, bool(float32), bool(int24),
+    ])
+    return hashlib.sha256(options.encode()).hexdigest()
+
+
+def _lookup_stems(output_path, cache_key):
+    """
+    Return cached stem paths for a key, or None on a miss.
+
+    A hit refreshes the entry's position in the LRU order.
+
+    Args:
+        output_path (Path): Root output directory of the cache.
+        cache_key (str): Key from `_build_cache_key`.
+
+    Returns:
+        tuple or None: Paths to the cached stems, in the order returned to Gradio.
+    """
+    with _index_lock(output_path):
+        index = _load_index(output_path)
+        entry = index["entries"].get(cache_key)
+        if entry is None:
+            return None
+
+        paths = [Path(path) for path in entry["paths"]]
+
+        # Stems that were deleted or overwritten by another track invalidate the entry
+        try:
+            valid = all(_stat_signature(path) == signature for path, signature in zip(paths, entry["signatures"]))
+        except OSError:
+            valid = False
+
+        if not valid:
+            del index["entries"][cache_key]
+            _save_index(output_path, index)
+            return None
+
+    # Touch the track directory so it becomes the most recently used
+    os.utime(paths[0].parent)
+
+    print_message("[CACHE]", text_color="bright_magenta")
+    print_message("Reusing previously separated stems.", text_color="bright_magenta", indent_level=1, include_border=True)
+    return tuple(paths)
+
+
+def _store_stems(output_path, cache_key, stem_paths):
+    """
+    Record freshly separated stems in the cache and enforce the size budget.
+
+    Args:
+        output_path (Path): Root output directory of the cache.
+        cache_key (str): Key from `_build_cache_key`.
+        stem_paths (iterable): Paths to the separated stems.
+    """
+    paths = [Path(path) for path in stem_paths]
+
+    # The entry and the eviction share one lock, so eviction sees every worker's entries
+    with _index_lock(output_path):
+        index = _load_index(output_path)
+        index["entries"][cache_key] = {
+            "paths": [str(path) for path in paths],
+            "signatures": [_stat_signature(path) for path in paths],
+        }
+        _evict_stems(output_path, index, keep={paths[0].parent})
+        _save_index(output_path, index)
+
+
+def _evict_stems(output_path, index, max_bytes=STEM_CACHE_MAX_BYTES, keep=()):
+    """
+    Delete least-recently-used track directories until the tree fits the size budget.
+
+    Must be called with the index lock held; entries of evicted stems are dropped from `index`.
+
+    Args:
+        output_path (Path): Root output directory (`<output>/<model>/<track>/`).
+        index (dict): Cache index loaded under the lock, updated in place.
+        max_bytes (int): Size budget for the whole tree.
+        keep (set): Track directories that must not be evicted.
+    """
+    output_path = Path(output_path)
+
+    # Every `<model>/<track>` directory is one eviction unit
+    track_dirs = [path for path in output_path.glob("*/*") if path.is_dir()]
+    sizes = {path: sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) for path in track_dirs}
+    total = sum(sizes.values())
+    if total <= max_bytes:
+        return
+
+    evicted = []
+    for path in sorted(track_dirs, key=lambda p: p.stat().st_mtime):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= sizes[path]
+        evicted.append(path)
+
+    # Drop index entries whose stems were evicted
+    index["entries"] = {
+        key: entry for key, entry in index["entries"].items()
+        if all(Path(p).exists() for p in entry["paths"])
+    }
+
+    print_message("[CACHE]", text_color="bright_magenta")
+    print_message(f"Evicted {len(evicted)} cached stem folder(s):", text_color="bright_magenta", indent_level=1)
+    for path in evicted:
+        print_message(f"`{path}`", text_color="bright_magenta", indent_level=2)
+    print_message("", include_border=True)
+
+
+if __name__ == "__main__":
+    print("This script contains the content-addressed stem cache used by the audio stem separation process.")
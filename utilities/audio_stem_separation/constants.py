@@ -2,11 +2,68 @@
 EXTENSIONS = {"mp3", "wav", "ogg", "flac"}
 
 # Default Model and Thresholds
-DEFAULT_MODEL = "htdemucs_ft"
+# `auto` picks the best model tier expected to finish within the latency target
+AUTO_MODEL = "auto"
+DEFAULT_MODEL = AUTO_MODEL
+DEFAULT_LATENCY_TARGET = 180  # Seconds
 DEFAULT_MP3_RATE = 320
 
+# Model Tiers, ordered from best quality to fastest
+MODEL_TIERS = ["htdemucs_ft", "htdemucs"]
+
+# Prior throughput (seconds of processing per second of audio) until jobs have been measured
+MODEL_TIER_PRIORS = {
+    "cpu": {"htdemucs_ft": 1.6, "htdemucs": 0.4},
+    "cuda": {"htdemucs_ft": 0.12, "htdemucs": 0.03},
+}
+MODEL_LOAD_PRIORS = {"htdemucs_ft": 8.0, "htdemucs": 2.0}  # Seconds
+
+# Measured throughput is stored in the output directory and smoothed across jobs
+THROUGHPUT_FILE = ".model_throughput.json"
+THROUGHPUT_LOCK = ".model_throughput.lock"  # Guards the measurements across batch worker processes
+THROUGHPUT_SMOOTHING = 0.3
+
+# Stem names in the order they are returned to Gradio (instrumental, vocals, bass, drums)
+STEMS = ["other", "vocals", "bass", "drums"]
+
+# In-Process Engine Settings
+# When disabled (or if the in-process engine fails), `demucs.separate` is run as a subprocess
+USE_IN_PROCESS_ENGINE = True
+DEFAULT_SHIFTS = 1
+DEFAULT_OVERLAP = 0.25
+
+# Keep a lossless float32 copy of every stem for downstream stages (see `intermediate_audio.py`)
+# Copies of a stem (e.g., the temporary files Gradio passes to each tab) find its buffer by content;
+# buffers are evicted with their stems and kept under `INTERMEDIATE_MAX_BYTES` in total
+SAVE_INTERMEDIATE_STEMS = True
+
+# Two-Stem (Karaoke) Settings
+# With `TWO_STEM_RESIDUAL`, the complement of a two-stem separation is the original mix minus the stem
+KARAOKE_STEM = "vocals"
+TWO_STEM_RESIDUAL = True
+
+# Long-Form Settings
+# Recordings longer than the threshold are separated in overlapping windows with bounded memory
+LONGFORM_THRESHOLD_SECONDS = 15 * 60
+LONGFORM_WINDOW_SECONDS = 60
+LONGFORM_OVERLAP_SECONDS = 5
+
+# Stem Cache Settings
+# Stems are cached by a hash of the decoded audio plus the separation options
+STEM_CACHE_ENABLED = True
+STEM_CACHE_INDEX = ".stem_cache.json"
+STEM_CACHE_LOCK = ".stem_cache.lock"      # Guards the index across batch worker processes
+STEM_CACHE_MAX_BYTES = 10 * 1024 ** 3  # Size budget for the output stems tree (10 GiB)
+STEM_CACHE_MAX_FILES = 4096            # File digests remembered to skip re-decoding
+CACHE_SAMPLERATE = 44100
+CACHE_CHANNELS = 2
+
+# Batch Separation Settings
+DEFAULT_BATCH_WORKERS = 2
+BATCH_MANIFEST_NAME = "batch_manifest.json"
+
 # Default Output Directory
 DEFAULT_OUTPUT_DIR = "./audio_processing/output_stems"
 
 if __name__ == "__main__":
-    print("This script contains the constants used in the audio stem separation process.")
\ No newline at end of file
+    print("This script contains the constants used in the audio stem separation process.")
@@ -0,0 +1,239 @@
+"""
+In-process Demucs separation engine.
+
+Every call to `python -m demucs.separate` pays for a fresh interpreter, the torch import
+and a full reload of the model weights before any audio is processed. This engine loads
+each Demucs model once, keeps it resident for the lifetime of the app and calls the
+separation API (`demucs.apply.apply_model`) directly.
+
+Reference Model Source from GitHub:
+https://github.com/facebookresearch/demucs
+"""
+import threading
+import time
+
+# Third-Party Libraries
+import torch
+from demucs.apply import apply_model, BagOfModels
+from demucs.audio import AudioFile
+from demucs.pretrained import get_model
+
+# Local Imports
+from ..print_utilities import print_message
+from ..intermediate_audio import save_intermediate, remove_intermediate
+from ..audio_encoder import encode_many, _prevent_clip
+from .constants import DEFAULT_SHIFTS, DEFAULT_OVERLAP, TWO_STEM_RESIDUAL, SAVE_INTERMEDIATE_STEMS
+from .progress import SeparationProgress
+
+# Resident models, keyed by (model name, device)
+# Each entry holds the model and a lock that serializes inference on it
+_RESIDENT_MODELS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _get_device():
+    """
+    Select the device used for separation.
+
+    Returns:
+        torch.device: The current CUDA device if available, else the CPU.
+    """
+    return torch.device(
+        f"cuda:{torch.cuda.current_device()}" if torch.cuda.is_available() else "cpu")
+
+
+def _load_model(model_name, device=None):
+    """
+    Return a resident Demucs model, loading it on first use.
+
+    Args:
+        model_name (str): Name of the pretrained Demucs model (e.g., 'htdemucs_ft').
+        device (torch.device, optional): Device to place the model on.
+
+    Returns:
+        tuple: (model, lock) where `lock` must be held while running inference.
+    """
+    device = device or _get_device()
+    key = (model_name, str(device))
+
+    with _REGISTRY_LOCK:
+        if key not in _RESIDENT_MODELS:
+            start_time = time.perf_counter()
+
+            model = get_model(model_name)
+            model.to(device)
+            model.eval()
+            _RESIDENT_MODELS[key] = (model, threading.Lock())
+
+            print_message("[MODEL]", text_color="bright_magenta")
+            print_message(f"Loaded `{model_name}` on `{device}` in {time.perf_counter() - start_time:.2f}s", text_color="bright_magenta", indent_level=1, include_border=True)
+
+        return _RESIDENT_MODELS[key]
+
+
+def _is_resident(model_name, device=None):
+    """Return True if a model is already loaded on the device."""
+    return (model_name, str(device or _get_device())) in _RESIDENT_MODELS
+
+
+def _read_audio(input_path, model):
+    """
+    Decode an audio file at the model's samplerate and channel count.
+
+    Args:
+        input_path (Path): Path to the audio file.
+        model: Loaded Demucs model.
+
+    Returns:
+        torch.Tensor: Waveform of shape (channels, samples).
+    """
+    return AudioFile(input_path).read(
+        streams=0, samplerate=model.samplerate, channels=model.audio_channels)
+
+
+def _separate_waveform(model, lock, wav, device=None, progress=None):
+    """
+    Separate a waveform into stems with a resident model.
+
+    Bags of models (e.g., `htdemucs_ft`) are applied one sub-model at a time, as
+    `apply_model` does internally, so progress can be reported after each one.
+
+    Args:
+        model: Loaded Demucs model.
+        lock (threading.Lock): Inference lock returned by `_load_model`.
+        wav (torch.Tensor): Waveform of shape (channels, samples).
+        device (torch.device, optional): Device to run inference on.
+        progress (SeparationProgress, optional): Progress stream for the inference phase.
+
+    Returns:
+        dict: Mapping of stem name to waveform tensor of shape (channels, samples).
+    """
+    device = device or _get_device()
+
+    if isinstance(model, BagOfModels):
+        sub_models, weights = model.models, model.weights
+    else:
+        sub_models, weights = [model], [[1.0] * len(model.sources)]
+
+    # Normalize the mix the same way `demucs.separate` does
+    ref = wav.mean(0)
+    mean, std = ref.mean(), ref.std()
+    mix = ((wav - mean) / (std + 1e-8))[None]
+
+    estimates = 0
+    totals = [0.0] * len(model.sources)
+    with lock, torch.no_grad():
+        for i, (sub_model, weight) in enumerate(zip(sub_models, weights)):
+            out = apply_model(
+                sub_model, mix, device=device, shifts=DEFAULT_SHIFTS, split=True,
+                overlap=DEFAULT_OVERLAP, progress=True, num_workers=0)
+
+            # Weighted average of the sub-model estimates
+            for k, source_weight in enumerate(weight):
+                out[:, k] *= source_weight
+                totals[k] += source_weight
+            estimates = estimates + out
+
+            if progress is not None:
+                progress.update((i + 1) / len(sub_models))
+
+    for k, total in enumerate(totals):
+        estimates[:, k] /= total
+
+    sources = estimates[0] * (std + 1e-8) + mean
+    return dict(zip(model.sources, sources))
+
+
+def _collapse_two_stems(stems, two_stems, wav):
+    """
+    Reduce a full separation to one stem and its complement.
+
+    With `TWO_STEM_RESIDUAL` the complement is the original mix minus the selected
+    stem, so anything the model did not assign to a source stays in the complement.
+    Otherwise it is the sum of the remaining stems, as `demucs.separate --two-stems` does.
+
+    Args:
+        stems (dict): Mapping of stem name to waveform tensor.
+        two_stems (str): Stem to isolate (e.g., 'vocals').
+        wav (torch.Tensor): Original mix the stems were separated from.
+
+    Returns:
+        dict: `{two_stems: ..., "no_<two_stems>": ...}`.
+    """
+    if two_stems not in stems:
+        raise ValueError(f"Stem `{two_stems}` is not provided by this model: {list(stems)}")
+
+    selected = stems.pop(two_stems)
+    complement = wav - selected if TWO_STEM_RESIDUAL else sum(stems.values())
+    return {two_stems: selected, f"no_{two_stems}": complement}
+
+
+def _save_stems(stems, stem_paths, samplerate, mp3_rate, float32, int24, progress=None):
+    """
+    Encode separated stems in parallel, using the same options as `demucs.separate`.
+
+    Args:
+        stems (dict): Mapping of stem name to waveform tensor.
+        stem_paths (dict): Mapping of stem name to output path.
+        samplerate (int): Samplerate of the stems.
+        mp3_rate (int): Bitrate for MP3 output (ignored for WAV paths).
+        float32 (bool): Whether to write float32 WAV files.
+        int24 (bool): Whether to write int24 WAV files.
+        progress (SeparationProgress, optional): Progress stream for the encode phase.
+    """
+    waveforms = {name: stems[name].cpu().numpy() for name in stem_paths}
+    jobs = {name: (waveforms[name], path, samplerate) for name, path in stem_paths.items()}
+
+    # Stems are reported as each encode finishes, not in `stem_paths` order
+    for i, (name, path) in enumerate(encode_many(jobs, mp3_rate=mp3_rate, float32=float32, int24=int24, clip="rescale")):
+        # Keep a lossless copy for downstream stages (merging, lyrics, MIDI), with the same
+        # rescaling as the encoded stem; otherwise drop any buffer left by an earlier run
+        if SAVE_INTERMEDIATE_STEMS:
+            save_intermediate(path, _prevent_clip(waveforms[name], "rescale"), samplerate)
+        else:
+            remove_intermediate(path)
+
+        if progress is not None:
+            progress.update((i + 1) / len(stem_paths))
+
+
+def _separate_in_process(input_path, stem_paths, model_name, two_stems, mp3_rate, float32, int24, progress=None):
+    """
+    Separate an audio file into stems without leaving the current process.
+
+    Args:
+        input_path (Path): Path to the input audio file.
+        stem_paths (dict): Mapping of stem name to output path (see `_build_stem_paths`).
+        model_name (str): Name of the Demucs model to use.
+        two_stems (str or None): Stem to isolate; everything else is summed into `no_<stem>`.
+        mp3_rate (int): Bitrate for MP3 output.
+        float32 (bool): Whether to write float32 WAV files.
+        int24 (bool): Whether to write int24 WAV files.
+        progress (SeparationProgress, optional): Progress stream for the job.
+
+    Returns:
+        dict: The `stem_paths` mapping, once every stem has been written.
+    """
+    progress = progress or SeparationProgress()
+    device = _get_device()
+
+    progress.start_phase("model load")
+    model, lock = _load_model(model_name, device)
+
+    progress.start_phase("decode")
+    wav = _read_audio(input_path, model)
+
+    progress.start_phase("inference")
+    stems = _separate_waveform(model, lock, wav, device=device, progress=progress)
+
+    # Collapse to the requested stem and its complement, as `--two-stems` does
+    if two_stems is not None:
+        stems = _collapse_two_stems(stems, two_stems, wav)
+
+    progress.start_phase("encode")
+    _save_stems(stems, stem_paths, model.samplerate, mp3_rate, float32, int24, progress=progress)
+    return stem_paths
+
+
+if __name__ == "__main__":
+    print("This script contains the in-process Demucs separation engine.")
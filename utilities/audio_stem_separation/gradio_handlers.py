@@ -1,12 +1,18 @@
 from pathlib import Path
 
+# Third-Party Imports
+import gradio as gr
+
 # Local Imports
 from ..print_utilities import print_message
 from .main import _audio_stem_separation
+from .progress import SeparationProgress
 from .constants import (
     DEFAULT_MODEL,
+    DEFAULT_LATENCY_TARGET,
     DEFAULT_MP3_RATE,
     DEFAULT_OUTPUT_DIR,
+    KARAOKE_STEM,
 )
 
 # ════════════════════════════════════════════════════════════
@@ -21,6 +27,8 @@ def process_audio_stem_separation(
     mp3_bitrate=DEFAULT_MP3_RATE,
     use_float32=False,
     use_int24=False,
+    latency_target=DEFAULT_LATENCY_TARGET,
+    progress=gr.Progress(),     # Injected by Gradio, not part of the interface inputs.
 ):
     """
     Process audio stems using Demucs. 
@@ -34,6 +42,8 @@ def process_audio_stem_separation(
         mp3_rate (int, optional): Bitrate for MP3 output.
         float32 (bool, optional): Whether to output float32 WAV files.
         int24 (bool, optional): Whether to output int24 WAV files.
+        latency_target (float, optional): Target seconds for the job when `model` is `auto`.
+        progress (gr.Progress): Gradio progress tracker, updated while Demucs runs.
 
     Returns:
         list: Paths of newly saved audio stems.
@@ -54,6 +64,8 @@ def process_audio_stem_separation(
             mp3_rate=mp3_bitrate,
             float32=use_float32,
             int24=use_int24,
+            progress=SeparationProgress(callback=progress),
+            latency_target=latency_target,
         )
 
         # Check if results are returned
@@ -72,5 +84,62 @@ def process_audio_stem_separation(
         print_message(f"{e}", text_color="bright_red", indent_level=2, include_border=True)
         return None
     
+
+# ════════════════════════════════════════════════════════════
+# Gradio Karaoke Stem Separation Handler
+# ════════════════════════════════════════════════════════════
+def process_karaoke_stem_separation(
+    # Parameters here are handled in the Gradio Interface.
+    # The order of parameters MUST match the Gradio interface to function correctly.
+    input_file,
+    model=DEFAULT_MODEL,
+    save_as_mp3=True,
+    mp3_bitrate=DEFAULT_MP3_RATE,
+    progress=gr.Progress(),     # Injected by Gradio, not part of the interface inputs.
+):
+    """
+    Separate a song into only `vocals` and an instrumental for karaoke.
+
+    Uses a two-stem separation, so only two stems are encoded and the instrumental
+    is returned directly, without merging the `bass`, `drums` and `other` stems.
+
+    Args:
+        input_file (str): Path to the input audio file.
+        model (str): Model name to use for separation.
+        save_as_mp3 (bool, optional): Whether to output MP3 files.
+        mp3_bitrate (int, optional): Bitrate for MP3 output.
+        progress (gr.Progress): Gradio progress tracker, updated while Demucs runs.
+
+    Returns:
+        list: Paths of the instrumental and vocals stems.
+    """
+    try:
+        results = _audio_stem_separation(
+            input_file,
+            output_path=Path(DEFAULT_OUTPUT_DIR),
+            model=model,
+            two_stems=KARAOKE_STEM,
+            mp3=save_as_mp3,
+            mp3_rate=mp3_bitrate,
+            float32=False,
+            int24=False,
+            progress=SeparationProgress(callback=progress),
+        )
+
+        # Check if results are returned
+        if results is None:
+            raise RuntimeError("No results returned from `_audio_stem_separation`.")
+
+        # Results are ordered (vocals, no_vocals); Gradio expects (instrumental, vocals)
+        vocals_path, instrumental_path = results
+        return [str(instrumental_path), str(vocals_path)]
+
+    except Exception as e:
+        # Print error message if an exception occurs
+        print_message("[ERROR]", text_color="bright_red")
+        print_message(f"Error in `process_karaoke_stem_separation`:", text_color="bright_red", indent_level=1)
+        print_message(f"{e}", text_color="bright_red", indent_level=2, include_border=True)
+        return None
+    
 if __name__ == "__main__":
     print("This script is designed to be used as a Gradio interface for audio stem separation.")
\ No newline at end of file
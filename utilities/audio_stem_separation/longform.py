@@ -0,0 +1,124 @@
+"""
+Bounded-memory separation for very long recordings (concerts, DJ sets).
+
+Instead of decoding the whole file and separating it in one pass, the input is read in
+overlapping windows with the resident model. Neighbouring windows are cross-faded over
+their overlap and each stem is written out incrementally, so peak memory depends on the
+window length only and not on the length of the recording.
+"""
+from pathlib import Path
+
+# Third-Party Libraries
+import numpy as np
+import torch
+from demucs.audio import AudioFile
+
+# Local Imports
+from ..audio_encoder import open_writer
+from ..intermediate_audio import audio_duration
+from .engine import _get_device, _load_model, _separate_waveform, _collapse_two_stems
+from .progress import SeparationProgress
+from .constants import LONGFORM_WINDOW_SECONDS, LONGFORM_OVERLAP_SECONDS
+
+
+class _StemWriter:
+    """
+    Incremental writer for one stem, in any format supported by `audio_encoder.py`.
+
+    Samples are clamped to [-0.99, 0.99] as Demucs' `clamp` clip mode does, since the
+    peak of the whole stem (needed for `rescale`) is not known while streaming.
+    """
+
+    def __init__(self, path, samplerate, channels, mp3_rate, float32, int24):
+        self.path = Path(path)
+        self._writer = open_writer(self.path, samplerate, channels, mp3_rate=mp3_rate, float32=float32, int24=int24)
+
+    def write(self, wav):
+        """Append a block of shape (channels, samples)."""
+        self._writer.write(np.ascontiguousarray(wav.clamp(-0.99, 0.99).cpu().numpy().T))
+
+    def close(self):
+        """Flush the encoder and close the file."""
+        self._writer.close()
+
+
+def _separate_long_form(input_path, stem_paths, model_name, two_stems, mp3_rate, float32, int24, progress=None):
+    """
+    Separate a long recording window by window with bounded memory.
+    Parameters match `_separate_in_process` in `engine.py`.
+
+    Returns:
+        dict: The `stem_paths` mapping, once every stem has been written.
+    """
+    progress = progress or SeparationProgress()
+    device = _get_device()
+
+    progress.start_phase("model load")
+    model, lock = _load_model(model_name, device)
+
+    samplerate = model.samplerate
+    window = int(LONGFORM_WINDOW_SECONDS * samplerate)
+    overlap = int(LONGFORM_OVERLAP_SECONDS * samplerate)
+    hop = window - overlap
+
+    total_windows = max(1, int(np.ceil(audio_duration(input_path) * samplerate / hop)))
+    audio_file = AudioFile(input_path)
+
+    writers = {
+        name: _StemWriter(path, samplerate, model.audio_channels, mp3_rate, float32, int24)
+        for name, path in stem_paths.items()
+    }
+
+    progress.start_phase("inference")
+    try:
+        tails = {}
+        start, index = 0, 0
+        while True:
+            wav = audio_file.read(
+                seek_time=start / samplerate, duration=window / samplerate,
+                streams=0, samplerate=samplerate, channels=model.audio_channels)
+            length = wav.shape[-1]
+
+            # The previous window ended exactly at the end of the file
+            if length == 0:
+                for name, tail in tails.items():
+                    writers[name].write(tail)
+                break
+
+            stems = _separate_waveform(model, lock, wav, device=device)
+            if two_stems is not None:
+                stems = _collapse_two_stems(stems, two_stems, wav)
+
+            is_last = length < window
+            for name, writer in writers.items():
+                stem = stems[name]
+
+                # Cross-fade the head of this window with the tail of the previous one
+                if name in tails:
+                    fade_length = min(overlap, length)
+                    fade = torch.linspace(0.0, 1.0, fade_length)
+                    stem[:, :fade_length] = tails[name][:, :fade_length] * (1 - fade) + stem[:, :fade_length] * fade
+
+                if is_last:
+                    writer.write(stem)
+                else:
+                    writer.write(stem[:, :length - overlap])
+                    tails[name] = stem[:, length - overlap:].clone()
+
+            index += 1
+            progress.update(index / total_windows)
+
+            if is_last:
+                break
+            start += hop
+
+    finally:
+        progress.start_phase("encode")
+        for writer in writers.values():
+            writer.close()
+
+    return stem_paths
+
+
+if __name__ == "__main__":
+    print("This script contains the bounded-memory separation mode for long recordings.")
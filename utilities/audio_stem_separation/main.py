@@ -13,20 +13,77 @@ Reference Model Source from GitHub:
 https://github.com/facebookresearch/demucs
 """
 from pathlib import Path
-
-# Third-Party Libraries
-import torch
+import time
 
 # Local Imports
 from ..print_utilities import print_title, print_message
-
+from ..intermediate_audio import audio_duration
+
+from .constants import (
+    USE_IN_PROCESS_ENGINE,
+    STEM_CACHE_ENABLED,
+    LONGFORM_THRESHOLD_SECONDS,
+    AUTO_MODEL,
+    MODEL_TIERS,
+    DEFAULT_LATENCY_TARGET,
+    TWO_STEM_RESIDUAL,
+)
+from .cache import _resolve_audio_digest, _build_cache_key, _lookup_stems, _store_stems
+from .engine import _get_device, _is_resident, _separate_in_process
+from .tiers import _select_model, _record_throughput
+from .longform import _separate_long_form
+from .progress import SeparationProgress
 from .utilities import (
     _create_directory, 
     _validate_audio_file, 
+    _build_stem_paths,
+    _model_dir_name,
     _execute_command, 
 )
 
 
+def _separate_with_subprocess(input_path, output_path, model, two_stems, mp3, mp3_rate, float32, int24, progress=None):
+    """
+    Fallback separation path that runs `demucs.separate` in a subprocess.
+    Parameters are explained in the `process_audio_stem_separation` function.
+    The output of the subprocess is parsed as it arrives and fed into `progress`.
+
+    Returns:
+    - bool: True if the command executed successfully, False otherwise.
+    """
+    # Prepare the command to execute the Demucs model
+    cmd = [
+        "python", "-m", "demucs.separate", 
+        "-o", str(output_path), 
+        "-n", model, 
+        "--device", f"{_get_device()}"
+    ]
+    
+    if mp3:
+        cmd += ["--mp3", f"--mp3-bitrate={mp3_rate}"]
+
+    if float32:
+        cmd += ["--float32"]
+
+    if int24:
+        cmd += ["--int24"]
+
+    if two_stems is not None:
+        # Demucs writes to `<output>/<model>/`, so redirect two-stem output to its own directory
+        cmd += [f"--two-stems={two_stems}", f"--filename=../{_model_dir_name(model, two_stems)}/{{track}}/{{stem}}.{{ext}}"]
+
+    cmd.append(str(input_path))
+
+    # Print the full command being executed
+    print_message("[CMD]", text_color="bright_cyan")
+    print_message(f"`{' '.join(cmd)}`", text_color="bright_cyan", indent_level=1, include_border=True)
+
+    # Execute the command to separate the audio stems using subprocess
+    if progress is not None:
+        progress.start_phase("model load")
+    return _execute_command(cmd, progress=progress)
+
+
 def _audio_stem_separation(
     # Reference: See `gradio_handlers.py` for how these parameters integrate with Gradio
     # Private function: Used internally for audio-to-MIDI conversion
@@ -39,19 +96,35 @@ def _audio_stem_separation(
     mp3_rate,
     float32,
     int24,
+    progress=None,
+    latency_target=None,
 ):
     """
     Internal function for audio stem separation using Demucs.
     Parameters are explained in the `process_audio_stem_separation` function.
 
+    Separation runs in-process on a resident model (see `engine.py`); the
+    `demucs.separate` subprocess is only used as a fallback. Previously separated
+    audio is served from the stem cache (see `cache.py`). Recordings longer than
+    `LONGFORM_THRESHOLD_SECONDS` are separated window by window (see `longform.py`).
+
+    `progress` is an optional `SeparationProgress` that receives progress updates
+    and records the time spent in each phase (see `progress.py`).
+
+    When `model` is `auto`, the best model tier expected to finish within
+    `latency_target` seconds is used (see `tiers.py`).
+
     Returns:
     - tuple: Paths to the separated audio stems. (other, vocals, bass, drums)
     """
     try:
+        # The whole call is timed, as the latency target applies to wall-clock time
+        start_time = time.perf_counter()
         print_title("Separating Audio with Demucs")
         
         input_path = Path(input_file)
         output_path = Path(output_path)
+        progress = progress or SeparationProgress()
 
         # Create the output directory if it does not exist
         _create_directory(output_path)
@@ -59,60 +132,83 @@ def _audio_stem_separation(
         # Validate the existence of the input file
         if not _validate_audio_file(input_path):
             return None
-        
-        # Set the device for processing the audio
-        device = torch.device(
-            f"cuda:{torch.cuda.current_device()}" if torch.cuda.is_available() else "cpu")
-        
-        # Prepare the command to execute the Demucs model
-        cmd = [
-            "python", "-m", "demucs.separate", 
-            "-o", str(output_path), 
-            "-n", model, 
-            "--device", f"{device}"
-        ]
-        
-        if mp3:
-            cmd += ["--mp3", f"--mp3-bitrate={mp3_rate}"]
-
-        if float32:
-            cmd += ["--float32"]
-
-        if int24:
-            cmd += ["--int24"]
-
-        if two_stems is not None:
-            cmd += [f"--two-stems={two_stems}"]
-
-        cmd.append(str(input_path))
 
         ## Print the list of files that will be processed
         print_message("[INFO]", text_color="bright_blue")
         print_message(f"Processing file:", text_color="bright_blue", indent_level=1)
         print_message(f"`{input_path.name}`", text_color="bright_blue", indent_level=2, include_border=True)
 
-        # Print the full command being executed
-        print_message("[CMD]", text_color="bright_cyan")
-        print_message(f"`{' '.join(cmd)}`", text_color="bright_cyan", indent_level=1, include_border=True)
+        # With the `auto` policy, stems from any model tier are acceptable
+        candidates = MODEL_TIERS if model == AUTO_MODEL else [model]
+
+        # Return cached stems if this audio was already separated with the same options
+        # The audio is hashed once and the digest shared by the key of every candidate
+        audio_digest = _resolve_audio_digest(input_path, output_path) if STEM_CACHE_ENABLED else None
+        if audio_digest is not None:
+            for candidate in candidates:
+                cache_key = _build_cache_key(audio_digest, candidate, two_stems, mp3, mp3_rate, float32, int24)
+                cached_paths = _lookup_stems(output_path, cache_key)
+                if cached_paths is not None:
+                    progress.finish()
+                    return cached_paths
 
-        # Execute the command to separate the audio stems using subprocess
-        if not _execute_command(cmd):
+        device = _get_device()
+        duration = audio_duration(input_path)
+
+        # Resolve the `auto` policy to the best model tier that fits the latency target
+        if model == AUTO_MODEL:
+            model = _select_model(duration, latency_target or DEFAULT_LATENCY_TARGET, output_path, device)
+        cache_key = _build_cache_key(audio_digest, model, two_stems, mp3, mp3_rate, float32, int24) if audio_digest is not None else None
+
+        # Prepare paths for output stems
+        stem_paths = _build_stem_paths(output_path, model, input_path, two_stems, mp3)
+
+        separated = False
+        if USE_IN_PROCESS_ENGINE:
+            try:
+                was_resident = _is_resident(model, device)
+
+                # Separate with the resident model, loading it on first use
+                # Long recordings are streamed in overlapping windows to keep memory flat
+                if duration > LONGFORM_THRESHOLD_SECONDS:
+                    _separate_long_form(input_path, stem_paths, model, two_stems, mp3_rate, float32, int24, progress=progress)
+                else:
+                    _separate_in_process(input_path, stem_paths, model, two_stems, mp3_rate, float32, int24, progress=progress)
+                separated = True
+
+                # Update the measured throughput of this model on this host, counting everything
+                # but the model load (decode, resampling, inference and encoding)
+                load_seconds = None if was_resident else progress.timings.get("model load", 0.0)
+                _record_throughput(
+                    output_path, model, device, duration,
+                    time.perf_counter() - start_time - (load_seconds or 0.0), load_seconds=load_seconds)
+
+            except Exception as e:
+                # Fall back to the subprocess if the in-process engine fails
+                print_message("[WARNING]", text_color="bright_yellow")
+                print_message("In-process separation failed, falling back to `demucs.separate`:", text_color="bright_yellow", indent_level=1)
+                print_message(f"{e}", text_color="bright_yellow", indent_level=2, include_border=True)
+
+        if not separated and not _separate_with_subprocess(input_path, output_path, model, two_stems, mp3, mp3_rate, float32, int24, progress=progress):
             # Early exit if the command fails
             return None
         print_message("", include_border=True)
+        progress.finish()
 
-        # Prepare paths for output stems
-        stems = ["other", "vocals", "bass", "drums"]
-        stem_paths = [output_path / model / input_path.stem / f"{stem}{input_path.suffix}" for stem in stems]
+        # Record the new stems in the cache
+        # The subprocess writes Demucs's own complement (sum of the other stems), not the residual
+        # the key records with `TWO_STEM_RESIDUAL`, so its two-stem output is not cached
+        if cache_key is not None and (separated or two_stems is None or not TWO_STEM_RESIDUAL):
+            _store_stems(output_path, cache_key, stem_paths.values())
 
         # Print the paths where the separated stems are saved
         print_message("[SUCCESS]", text_color="bright_green")
         print_message("Separated stems saved at:", text_color="bright_green", indent_level=1)
-        for path in stem_paths:
+        for path in stem_paths.values():
             print_message(f"`{path}`", text_color="bright_green", indent_level=2)
         print_message("", include_border=True)
 
-        return tuple(stem_paths)
+        return tuple(stem_paths.values())
 
     except Exception as e:
         # Print an error message if an exception occurs
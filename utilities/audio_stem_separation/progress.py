@@ -0,0 +1,127 @@
+"""
+Progress reporting and per-phase timing for separation jobs.
+
+A `SeparationProgress` receives updates from either the in-process engine or the parsed
+output of a `demucs.separate` subprocess. It turns them into an overall fraction for a
+callback (e.g., Gradio's `gr.Progress`) and records how long each phase took.
+"""
+import re
+import time
+
+# Local Imports
+from ..print_utilities import print_message
+
+# Share of the overall progress bar given to each phase
+PHASE_SPANS = {
+    "model load": (0.0, 0.05),
+    "decode": (0.05, 0.1),
+    "inference": (0.1, 0.9),
+    "encode": (0.9, 1.0),
+}
+
+# Patterns in the output of `demucs.separate`
+BAG_SIZE_PATTERN = re.compile(r"bag of (\d+) models")
+TQDM_PERCENT_PATTERN = re.compile(r"(\d{1,3})%\|")
+SEPARATING_PATTERN = re.compile(r"Separating track")
+
+
+class SeparationProgress:
+    """
+    Progress stream for a single separation job.
+
+    Args:
+        callback (callable, optional): Called as `callback(fraction, desc=...)` on every update.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.timings = {}
+        self.phase = None
+        self._phase_start = None
+
+        # State for parsing subprocess output
+        self._total_models = 1
+        self._model_index = 0
+        self._last_percent = 0
+
+    def start_phase(self, phase):
+        """Close the current phase and start timing a new one."""
+        if phase == self.phase:
+            return
+        self._close_phase()
+        self.phase = phase
+        self._phase_start = time.perf_counter()
+        self.update(0.0)
+
+    def update(self, fraction):
+        """
+        Report progress within the current phase.
+
+        Args:
+            fraction (float): Completed fraction of the current phase (0.0 to 1.0).
+        """
+        if self.callback is None or self.phase is None:
+            return
+        start, end = PHASE_SPANS.get(self.phase, (0.0, 1.0))
+        fraction = min(max(fraction, 0.0), 1.0)
+        self.callback(start + (end - start) * fraction, desc=self.phase.capitalize())
+
+    def finish(self):
+        """
+        Close the current phase and print the per-phase timings.
+
+        Returns:
+            dict: Seconds spent in each phase.
+        """
+        self._close_phase()
+        self.phase = None
+
+        if self.timings:
+            print_message("[TIMING]", text_color="bright_cyan")
+            for phase, seconds in self.timings.items():
+                print_message(f"{phase.capitalize()}: \t{seconds:.2f}s", text_color="bright_cyan", indent_level=1)
+            print_message("", include_border=True)
+
+        if self.callback is not None:
+            self.callback(1.0, desc="Done")
+        return self.timings
+
+    def feed(self, line):
+        """
+        Parse one line (or carriage-return segment) of `demucs.separate` output.
+
+        Args:
+            line (str): Output segment without its trailing newline.
+        """
+        match = BAG_SIZE_PATTERN.search(line)
+        if match:
+            self._total_models = int(match.group(1))
+            return
+
+        if SEPARATING_PATTERN.search(line):
+            self.start_phase("inference")
+            return
+
+        match = TQDM_PERCENT_PATTERN.search(line)
+        if match and self.phase == "inference":
+            percent = int(match.group(1))
+
+            # A bag of models prints one progress bar per model
+            if percent < self._last_percent:
+                self._model_index = min(self._model_index + 1, self._total_models - 1)
+            self._last_percent = percent
+
+            self.update((self._model_index + percent / 100) / self._total_models)
+
+            # Stems are written once the last progress bar completes
+            if percent == 100 and self._model_index == self._total_models - 1:
+                self.start_phase("encode")
+
+    def _close_phase(self):
+        """Record the elapsed time of the current phase."""
+        if self.phase is not None:
+            self.timings[self.phase] = self.timings.get(self.phase, 0.0) + time.perf_counter() - self._phase_start
+
+
+if __name__ == "__main__":
+    print("This script contains the progress stream used by the audio stem separation process.")
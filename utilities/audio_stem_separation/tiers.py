@@ -0,0 +1,128 @@
+"""
+Latency-targeted Demucs model selection.
+
+`htdemucs_ft` is a bag of four fine-tuned models and roughly four times slower than
+`htdemucs` on CPU. When the model is set to the `auto` policy, the runtime of each
+candidate tier is estimated from the track duration and the throughput measured on this
+host, and the best tier that fits the latency target is used.
+
+Throughput is stored as wall-clock seconds per second of audio (everything but the model
+load: hashing, decoding, resampling, inference and encoding) and updated with an
+exponential moving average after every real job. Batch workers update the same file from
+separate processes, so each update holds a file lock next to it (see `_file_lock`).
+"""
+from pathlib import Path
+import json
+
+# Local Imports
+from ..print_utilities import print_message
+from ..file_utilities import write_json_atomic
+from .engine import _is_resident
+from .utilities import _file_lock
+from .constants import (
+    MODEL_TIERS,
+    MODEL_TIER_PRIORS,
+    MODEL_LOAD_PRIORS,
+    THROUGHPUT_FILE,
+    THROUGHPUT_LOCK,
+    THROUGHPUT_SMOOTHING,
+)
+
+
+def _load_measurements(output_path):
+    """Load the throughput measurements stored for an output directory."""
+    path = Path(output_path) / THROUGHPUT_FILE
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _record_throughput(output_path, model, device, audio_seconds, processing_seconds, load_seconds=None):
+    """
+    Update the measured throughput of a model from a finished job.
+
+    Args:
+        output_path (Path): Output directory the measurements are stored in.
+        model (str): Name of the Demucs model.
+        device (torch.device): Device the job ran on.
+        audio_seconds (float): Duration of the separated audio.
+        processing_seconds (float): Wall-clock time of the job, excluding the model load.
+        load_seconds (float, optional): Time spent loading the model, if it was not resident.
+    """
+    if audio_seconds <= 0:
+        return
+
+    key = f"{model}@{device.type}"
+    factor = processing_seconds / audio_seconds
+
+    with _file_lock(Path(output_path) / THROUGHPUT_LOCK):
+        measurements = _load_measurements(output_path)
+        entry = measurements.get(key, {"factor": factor, "load_seconds": load_seconds, "jobs": 0})
+
+        entry["factor"] = (1 - THROUGHPUT_SMOOTHING) * entry["factor"] + THROUGHPUT_SMOOTHING * factor
+        if load_seconds is not None:
+            entry["load_seconds"] = load_seconds
+        entry["jobs"] += 1
+        measurements[key] = entry
+        write_json_atomic(Path(output_path) / THROUGHPUT_FILE, measurements)
+
+
+def _estimate_runtime(model, device, audio_seconds, measurements):
+    """
+    Estimate the wall-clock time to separate a track with a model.
+
+    Args:
+        model (str): Name of the Demucs model.
+        device (torch.device): Device the job would run on.
+        audio_seconds (float): Duration of the track.
+        measurements (dict): Measurements from `_load_measurements`.
+
+    Returns:
+        float: Estimated seconds, including the model load if it is not resident.
+    """
+    entry = measurements.get(f"{model}@{device.type}", {})
+    factor = entry.get("factor") or MODEL_TIER_PRIORS[device.type].get(model, max(MODEL_TIER_PRIORS[device.type].values()))
+
+    load_seconds = 0.0
+    if not _is_resident(model, device):
+        load_seconds = entry.get("load_seconds") or MODEL_LOAD_PRIORS.get(model, 0.0)
+
+    return load_seconds + factor * audio_seconds
+
+
+def _select_model(audio_seconds, latency_target, output_path, device):
+    """
+    Pick the highest-quality model tier expected to finish within the latency target.
+
+    Args:
+        audio_seconds (float): Duration of the track.
+        latency_target (float): Target wall-clock seconds for the job.
+        output_path (Path): Output directory the measurements are stored in.
+        device (torch.device): Device the job will run on.
+
+    Returns:
+        str: Name of the selected Demucs model.
+    """
+    measurements = _load_measurements(output_path)
+    estimates = {model: _estimate_runtime(model, device, audio_seconds, measurements) for model in MODEL_TIERS}
+
+    # Tiers are ordered from best quality to fastest; fall back to the fastest estimate
+    selected = next((model for model in MODEL_TIERS if estimates[model] <= latency_target), None)
+    if selected is None:
+        selected = min(estimates, key=estimates.get)
+
+    print_message("[MODEL]", text_color="bright_magenta")
+    print_message(f"Selected `{selected}` for a {audio_seconds:.0f}s track (target {latency_target:.0f}s):", text_color="bright_magenta", indent_level=1)
+    for model, seconds in estimates.items():
+        print_message(f"`{model}`: \t~{seconds:.0f}s", text_color="bright_magenta", indent_level=2)
+    print_message("", include_border=True)
+
+    return selected
+
+
+if __name__ == "__main__":
+    print("This script contains the latency-targeted model selection used by the audio stem separation process.")
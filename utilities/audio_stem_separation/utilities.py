@@ -1,18 +1,30 @@
+from contextlib import contextmanager
 from pathlib import Path
+import codecs
 import subprocess as sp
+import threading
+import time
 import sys
+import os
+import re
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
 
 # Local Imports
 from ..print_utilities import print_title, print_message
-from .constants import EXTENSIONS
+from .constants import EXTENSIONS, STEMS
 
 
-def _find_audio_files(directory):
+def _find_audio_files(directory, extensions=EXTENSIONS):
     """
     Find audio files in the input directory.
 
     Args:
         input_directory (str): Path to the directory containing audio files.
+        extensions (set): File extensions to accept, without the dot.
 
     Returns:
         list: List of audio file paths.
@@ -22,11 +34,34 @@ def _find_audio_files(directory):
 
     # Find audio files in the input directory
     for file in Path(directory).iterdir():
-        if file.suffix.lower().lstrip(".") in EXTENSIONS:
+        if file.suffix.lower().lstrip(".") in extensions:
             audio_files.append(file)
     return audio_files
 
 
+def _collect_audio_files(inputs, extensions=EXTENSIONS):
+    """
+    Expand directories and file paths into a flat list of audio files.
+
+    Args:
+        inputs (str or list): A directory, a file, or a list of either.
+        extensions (set): File extensions accepted in directories, without the dot.
+
+    Returns:
+        list: Audio file paths, in input order (files of a directory sorted by name).
+    """
+    if isinstance(inputs, (str, Path)):
+        inputs = [inputs]
+
+    audio_files = []
+    for item in map(Path, inputs):
+        if item.is_dir():
+            audio_files.extend(sorted(_find_audio_files(item, extensions)))
+        else:
+            audio_files.append(item)
+    return audio_files
+
+
 def _create_directory(path):
     """
     Create a directory if it does not exist.
@@ -68,29 +103,121 @@ def _validate_audio_file(file_path):
     return True
 
 
-def _execute_command(cmd):
+def _model_dir_name(model, two_stems):
     """
-    Execute a shell command and handle stdout and stderr.
-    
+    Return the name of the directory a model writes its stems to.
+
+    Two-stem runs get their own directory, so they never overwrite (or invalidate the
+    cache entry of) the full separation of the same track.
+    """
+    return model if two_stems is None else f"{model}_two_stems"
+
+
+def _build_stem_paths(output_path, model, input_path, two_stems, mp3):
+    """
+    Build the output paths Demucs writes stems to.
+
+    Args:
+        output_path (Path): Root output directory.
+        model (str): Name of the Demucs model.
+        input_path (Path): Path to the input audio file.
+        two_stems (str or None): Stem isolated with `--two-stems`, if any.
+        mp3 (bool): Whether stems are written as MP3 (otherwise WAV).
+
+    Returns:
+        dict: Mapping of stem name to output path, in the order returned to Gradio.
+    """
+    stems = STEMS if two_stems is None else [two_stems, f"no_{two_stems}"]
+    extension = "mp3" if mp3 else "wav"
+    model_dir = _model_dir_name(model, two_stems)
+    return {stem: Path(output_path) / model_dir / Path(input_path).stem / f"{stem}.{extension}" for stem in stems}
+
+
+_THREAD_LOCKS = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+
+
+@contextmanager
+def _file_lock(lock_path):
+    """
+    Hold an exclusive lock on a lock file, across threads and processes.
+
+    Shared state files in the output directory (the stem cache index, the throughput
+    measurements) are read, modified and rewritten by every batch worker process, so a
+    thread lock alone would let concurrent workers lose each other's updates.
+
+    Args:
+        lock_path (Path): Path to the lock file. It is created if it does not exist.
+    """
+    lock_path = Path(lock_path)
+    with _THREAD_LOCKS_GUARD:
+        thread_lock = _THREAD_LOCKS.setdefault(str(lock_path.resolve()), threading.Lock())
+
+    with thread_lock, open(lock_path, "a+b") as lock_file:
+        if os.name == "nt":
+            # `msvcrt.locking` gives up after a few seconds, so retry until the lock is free
+            while True:
+                try:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _execute_command(cmd, progress=None):
+    """
+    Execute a shell command, streaming its output as it is produced.
+
+    Output is echoed to stdout as it arrives instead of being buffered until the
+    process exits. Each line (and each carriage-return refresh of a progress bar)
+    is passed to `progress.feed` so progress can be reported while the command runs.
 
     Args:
         cmd (list): Command to execute.
+        progress (SeparationProgress, optional): Progress stream fed with the output.
 
     Returns:
         bool: True if the command executed successfully, False otherwise.
     """
     try:
-        # Execute the separation command using subprocess
-        process = sp.Popen(cmd, stdout=sp.PIPE, stderr=sp.PIPE)
-
-        # Handle the I/O streams of the process, capturing stdout and stderr
-        stdout, stderr = process.communicate()
-
-        if stdout:
-            sys.stdout.write(stdout.decode())
-            
-        if stderr:
-            sys.stderr.write(stderr.decode())
+        # Execute the separation command using subprocess, merging stderr into stdout
+        # Python output is unbuffered so log lines and progress bars arrive in order
+        process = sp.Popen(cmd, stdout=sp.PIPE, stderr=sp.STDOUT, env={**os.environ, "PYTHONUNBUFFERED": "1"})
+
+        # Handle the output stream incrementally as it is produced
+        # One decoder for the whole stream, so multi-byte glyphs (e.g., tqdm's bars) split across chunks survive
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        for chunk in iter(lambda: process.stdout.read1(4096), b""):
+            text = decoder.decode(chunk)
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+            # Split on newlines and carriage returns (used by tqdm progress bars)
+            segments = re.split(r"[\r\n]", pending + text)
+            pending = segments.pop()
+            if progress is not None:
+                for segment in segments:
+                    progress.feed(segment)
+
+        # Flush any incomplete sequence left at the end of the stream
+        tail = decoder.decode(b"", final=True)
+        sys.stdout.write(tail)
+        pending += tail
+        if progress is not None and pending:
+            progress.feed(pending)
 
         # Wait for the process to finish
         process.wait()
@@ -1 +1,3 @@
-from .gradio_handlers import process_audio_to_midi_conversion
\ No newline at end of file
+from .gradio_handlers import process_audio_to_midi_conversion
+from .registry import preload_audio_to_midi_model
+from .batch import batch_audio_to_midi_conversion
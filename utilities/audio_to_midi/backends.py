@@ -0,0 +1,128 @@
+"""
+Inference backends for the basic-pitch model.
+
+basic-pitch ships the same ICASSP 2022 model as a TensorFlow SavedModel and as an ONNX
+export. The ONNX Runtime backend avoids loading TensorFlow and rebuilding its graph, uses
+less memory and has configurable threading, so it is the default on CPU. TensorFlow (or
+any format `basic_pitch.inference.Model` understands) remains available as an option.
+
+Both backends expose `predict(x)` returning the 'note', 'onset' and 'contour' activations
+for a batch of windows of shape (batch, AUDIO_N_SAMPLES, 1).
+"""
+from pathlib import Path
+import importlib.util
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+from .constants import (
+    AUTO_BACKEND,
+    ONNX_BACKEND,
+    TENSORFLOW_BACKEND,
+    BACKEND_MODEL_PATHS,
+    ONNX_INTRA_OP_THREADS,
+    ONNX_INTER_OP_THREADS,
+)
+
+# Model formats `basic_pitch.inference.Model` only runs one window at a time (fixed batch of 1)
+SINGLE_WINDOW_SUFFIXES = {".tflite", ".mlpackage"}
+
+# Input and output tensor names of the ONNX export, as used by `basic_pitch.inference.Model`
+ONNX_INPUT_NAME = "serving_default_input_2:0"
+ONNX_OUTPUT_NAMES = {
+    "note": "StatefulPartitionedCall:1",
+    "onset": "StatefulPartitionedCall:2",
+    "contour": "StatefulPartitionedCall:0",
+}
+
+
+class _OnnxModel:
+    """basic-pitch model running on ONNX Runtime (CPU)."""
+
+    def __init__(self, model_path, intra_op_threads=ONNX_INTRA_OP_THREADS, inter_op_threads=ONNX_INTER_OP_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(str(model_path), sess_options=options, providers=["CPUExecutionProvider"])
+
+        # The batch dimension is symbolic (a string) when the export accepts any batch size
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.batch_size = batch_dim if isinstance(batch_dim, int) else None
+
+    def predict(self, x):
+        """Run the model on a batch of windows of shape (batch, AUDIO_N_SAMPLES, 1)."""
+        x = np.asarray(x, dtype=np.float32)
+        step = self.batch_size or len(x)
+
+        outputs = [
+            self.session.run(list(ONNX_OUTPUT_NAMES.values()), {ONNX_INPUT_NAME: x[start:start + step]})
+            for start in range(0, len(x), step)
+        ]
+        return {name: np.concatenate([output[i] for output in outputs]) for i, name in enumerate(ONNX_OUTPUT_NAMES)}
+
+
+class _TensorFlowModel:
+    """basic-pitch model running through `basic_pitch.inference.Model` (TensorFlow, TFLite, CoreML)."""
+
+    def __init__(self, model_path):
+        # Imported here so TensorFlow is only loaded when this backend is used
+        from basic_pitch.inference import Model
+
+        self.model = Model(model_path)
+
+        # SavedModels accept any batch size; TFLite and CoreML interpreters only accept one window
+        self.batch_size = 1 if Path(model_path).suffix in SINGLE_WINDOW_SUFFIXES else None
+
+    def predict(self, x):
+        """Run the model on a batch of windows of shape (batch, AUDIO_N_SAMPLES, 1)."""
+        if self.batch_size is None:
+            return self.model.predict(x)
+
+        x = np.asarray(x, dtype=np.float32)
+        outputs = [self.model.predict(x[start:start + self.batch_size]) for start in range(0, len(x), self.batch_size)]
+        return {name: np.concatenate([output[name] for output in outputs]) for name in outputs[0]}
+
+
+def _resolve_backend(backend):
+    """
+    Resolve the `auto` backend to ONNX Runtime if it is installed, else TensorFlow.
+
+    Args:
+        backend (str): 'auto', 'onnx' or 'tensorflow'.
+
+    Returns:
+        str: 'onnx' or 'tensorflow'.
+    """
+    if backend == AUTO_BACKEND:
+        return ONNX_BACKEND if importlib.util.find_spec("onnxruntime") is not None else TENSORFLOW_BACKEND
+    if backend not in BACKEND_MODEL_PATHS:
+        raise ValueError(f"Unknown inference backend `{backend}`. Choose from: {[AUTO_BACKEND, *BACKEND_MODEL_PATHS]}")
+    return backend
+
+
+def _backend_for_path(model_path):
+    """Return the backend able to run a model file, based on its extension."""
+    return ONNX_BACKEND if Path(model_path).suffix == ".onnx" else TENSORFLOW_BACKEND
+
+
+def _create_model(backend, model_path):
+    """
+    Build a model for a backend.
+
+    Args:
+        backend (str): 'onnx' or 'tensorflow'.
+        model_path (str): Path to the saved model.
+
+    Returns:
+        object: Model with a `predict` method.
+    """
+    if backend == ONNX_BACKEND:
+        return _OnnxModel(model_path)
+    return _TensorFlowModel(model_path)
+
+
+if __name__ == "__main__":
+    print("This script contains the inference backends used for audio to MIDI conversion.")
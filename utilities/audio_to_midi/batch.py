@@ -0,0 +1,234 @@
+"""
+Batch audio-to-MIDI conversion of many files at once.
+
+The analysis windows of every input (e.g., the stems of one separation or a whole
+directory) are packed into shared model batches, so converting `vocals`, `bass` and
+`other` costs about one inference pass instead of three. One MIDI file is written per
+input, and the results are collected into a manifest.
+
+Usage:
+    python -m utilities.audio_to_midi.batch <dir-or-files>... [-o OUTPUT] [-b BACKEND]
+"""
+from collections import Counter
+from pathlib import Path
+import argparse
+import json
+import time
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+from ..print_utilities import print_title, print_message
+from ..audio_stem_separation.utilities import _collect_audio_files
+from .registry import _load_model
+from .cache import _activation_key, _lookup_activations, _store_activations
+from .inference import _load_audio, _run_inference_batch, _notes_from_activations, _save_outputs, HOP_SIZE, OVERLAP_LENGTH
+from .utilities import _create_directory, _validate_frequency
+from .constants import (
+    DEFAULT_BACKEND,
+    DEFAULT_ONSET_THRESHOLD,
+    DEFAULT_FRAME_THRESHOLD,
+    DEFAULT_MIN_NOTE_LENGTH,
+    DEFAULT_MIDI_TEMPO,
+    DEFAULT_OUTPUT_DIR,
+    ACTIVATION_CACHE_ENABLED,
+    EXTENSIONS,
+    BATCH_MAX_WINDOWS,
+    BATCH_MANIFEST_NAME,
+)
+
+
+def _output_names(audio_files):
+    """
+    Pick an output base name per input, prefixing the parent directory for duplicates.
+
+    Args:
+        audio_files (list): Audio file paths.
+
+    Returns:
+        list: Base names, in input order (e.g., 'vocals' or 'song_a_vocals').
+    """
+    counts = Counter(path.stem for path in audio_files)
+    return [path.stem if counts[path.stem] == 1 else f"{path.parent.name}_{path.stem}" for path in audio_files]
+
+
+def _window_count(audio):
+    """Return the number of model windows a buffer is split into."""
+    return int(np.ceil((len(audio) + OVERLAP_LENGTH // 2) / HOP_SIZE))
+
+
+def _write_midi(entry, output_directory, name, model_output, note_options):
+    """
+    Extract notes from activations, write the MIDI file and fill in the manifest entry.
+
+    Args:
+        entry (dict): Manifest entry for the input.
+        output_directory (Path): Directory to save the MIDI file to.
+        name (str): Output base name for the input.
+        model_output (dict): Activations ('note', 'onset', 'contour').
+        note_options (dict): Keyword arguments for `_notes_from_activations`.
+    """
+    midi_data, note_events = _notes_from_activations(model_output, **note_options)
+    midi_path = _save_outputs(
+        output_directory, name, model_output, midi_data, note_events,
+        save_midi=True, sonify_midi=False, save_model_outputs=False, save_notes=False,
+        debug_file=None, sonification_samplerate=None)
+
+    entry["status"] = "ok"
+    entry["midi"] = str(midi_path)
+    entry["notes"] = len(note_events)
+
+
+def _flush(model, pending, output_directory, note_options):
+    """
+    Run one packed inference pass over the pending inputs and write their MIDI files.
+
+    Args:
+        model: Model with a basic-pitch style `predict` method.
+        pending (list): (manifest entry, output name, cache key, audio) for each input.
+        output_directory (Path): Directory to save the MIDI files to.
+        note_options (dict): Keyword arguments for `_notes_from_activations`.
+    """
+    if not pending:
+        return
+
+    try:
+        outputs = _run_inference_batch(model, [audio for _, _, _, audio in pending])
+    except Exception as e:
+        for entry, _, _, _ in pending:
+            entry["error"] = str(e)
+        return
+
+    for (entry, name, key, _), model_output in zip(pending, outputs):
+        _store_activations(key, model_output)
+        try:
+            _write_midi(entry, output_directory, name, model_output, note_options)
+        except Exception as e:
+            entry["error"] = str(e)
+
+
+def batch_audio_to_midi_conversion(
+    inputs,
+    output_directory=DEFAULT_OUTPUT_DIR,
+    song_dir_name=None,
+    onset_threshold=DEFAULT_ONSET_THRESHOLD,
+    frame_threshold=DEFAULT_FRAME_THRESHOLD,
+    min_note_length=DEFAULT_MIN_NOTE_LENGTH,
+    min_frequency=None,
+    max_frequency=None,
+    allow_multiple_pitch_bends=False,
+    apply_melodia_trick=True,
+    midi_tempo=DEFAULT_MIDI_TEMPO,
+    backend=DEFAULT_BACKEND,
+):
+    """
+    Convert many audio files to MIDI with shared model batches.
+
+    Args:
+        inputs (str or list): A directory, a file, or a list of either.
+        output_directory (str): Directory to save the MIDI files and manifest to.
+        backend (str): Inference backend ('auto', 'onnx' or 'tensorflow').
+        Other parameters are explained in the `process_audio_to_midi_conversion` function.
+
+    Returns:
+        list[dict]: Manifest with one entry per file (input, status, midi, notes, error).
+    """
+    print_title("Batch Converting Audio to MIDI with Basic-Pitch")
+
+    audio_files = _collect_audio_files(inputs, EXTENSIONS)
+    output_directory = Path(output_directory) / song_dir_name if song_dir_name else Path(output_directory)
+    _create_directory(output_directory)
+
+    if not audio_files:
+        print_message("[WARNING]", text_color="bright_yellow")
+        print_message("No audio files found.", text_color="bright_yellow", indent_level=1, include_border=True)
+        return []
+
+    print_message("[INFO]", text_color="bright_blue")
+    print_message(f"Converting {len(audio_files)} file(s):", text_color="bright_blue", indent_level=1)
+    for path in audio_files:
+        print_message(f"`{path.name}`", text_color="bright_blue", indent_level=2)
+    print_message("", include_border=True)
+
+    note_options = {
+        "onset_threshold": onset_threshold,
+        "frame_threshold": frame_threshold,
+        "minimum_note_length": min_note_length,
+        "minimum_frequency": _validate_frequency(min_frequency),
+        "maximum_frequency": _validate_frequency(max_frequency),
+        "multiple_pitch_bends": allow_multiple_pitch_bends,
+        "melodia_trick": apply_melodia_trick,
+        "midi_tempo": midi_tempo,
+    }
+
+    start_time = time.perf_counter()
+    model = _load_model(backend=backend)
+
+    manifest, pending, pending_windows = [], [], 0
+    for path, name in zip(audio_files, _output_names(audio_files)):
+        entry = {"input": str(path), "status": "failed", "midi": None, "notes": 0, "cached": False, "error": None}
+        manifest.append(entry)
+
+        try:
+            key = _activation_key(path, model) if ACTIVATION_CACHE_ENABLED else None
+            model_output = _lookup_activations(key)
+
+            # Inputs with cached activations only need note extraction
+            if model_output is not None:
+                entry["cached"] = True
+                _write_midi(entry, output_directory, name, model_output, note_options)
+                continue
+
+            audio = _load_audio(path)
+        except Exception as e:
+            entry["error"] = str(e)
+            continue
+
+        pending.append((entry, name, key, audio))
+        pending_windows += _window_count(audio)
+
+        # Bound memory by running a pass whenever enough windows are packed
+        if pending_windows >= BATCH_MAX_WINDOWS:
+            _flush(model, pending, output_directory, note_options)
+            pending, pending_windows = [], 0
+
+    _flush(model, pending, output_directory, note_options)
+
+    # Save the manifest next to the MIDI files
+    manifest_path = output_directory / BATCH_MANIFEST_NAME
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    succeeded = sum(entry["status"] == "ok" for entry in manifest)
+    print_message("[SUCCESS]", text_color="bright_green")
+    print_message(f"Converted {succeeded}/{len(manifest)} file(s) in {time.perf_counter() - start_time:.1f}s.", text_color="bright_green", indent_level=1)
+    print_message(f"Manifest saved at: `{manifest_path}`", text_color="bright_green", indent_level=1, include_border=True)
+
+    return manifest
+
+
+def _parse_args():
+    """Parse the command-line arguments for batch conversion."""
+    parser = argparse.ArgumentParser(description="Convert a directory or list of audio files to MIDI.")
+    parser.add_argument("inputs", nargs="+", help="Audio files and/or directories containing audio files.")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT_DIR, help="Output directory for the MIDI files.")
+    parser.add_argument("-b", "--backend", default=DEFAULT_BACKEND, help="Inference backend: auto, onnx or tensorflow.")
+    parser.add_argument("--onset-threshold", type=float, default=DEFAULT_ONSET_THRESHOLD, help="Onset detection threshold.")
+    parser.add_argument("--frame-threshold", type=float, default=DEFAULT_FRAME_THRESHOLD, help="Frame activation threshold.")
+    parser.add_argument("--min-note-length", type=float, default=DEFAULT_MIN_NOTE_LENGTH, help="Minimum note length in ms.")
+    parser.add_argument("--midi-tempo", type=float, default=DEFAULT_MIDI_TEMPO, help="Tempo of the generated MIDI files.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    batch_audio_to_midi_conversion(
+        args.inputs,
+        output_directory=args.output,
+        onset_threshold=args.onset_threshold,
+        frame_threshold=args.frame_threshold,
+        min_note_length=args.min_note_length,
+        midi_tempo=args.midi_tempo,
+        backend=args.backend,
+    )
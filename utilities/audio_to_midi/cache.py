@@ -0,0 +1,99 @@
+"""
+In-memory cache of basic-pitch model activations.
+
+Only note extraction depends on the onset/frame thresholds, the minimum note length and
+the frequency bounds; the model activations (note, onset and contour) depend only on the
+audio and the model. Activations are kept per audio file hash and model, so nudging a
+slider in the Audio to MIDI tab re-runs note extraction and MIDI writing only.
+
+The cache lives in the app process and is bounded by total size with a least-recently-used
+policy. Gradio copies every upload to a new temp path, so entries are keyed by the file's
+content rather than its path.
+"""
+from collections import OrderedDict
+import threading
+
+# Local Imports
+from ..file_utilities import file_digest
+from .constants import ACTIVATION_CACHE_MAX_BYTES
+
+# Activations keyed by (file digest, model key), in least-recently-used order
+_ACTIVATIONS = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _activation_key(audio_path, model):
+    """
+    Build the cache key for an audio file and model.
+
+    Args:
+        audio_path (Path): Path to the audio file.
+        model: Model used for inference; only resident models (with a `key`) are cached.
+
+    Returns:
+        tuple or None: The cache key, or None if the model cannot be identified.
+    """
+    model_key = getattr(model, "key", None)
+    if model_key is None:
+        return None
+    return (file_digest(audio_path), model_key)
+
+
+def _nbytes(model_output):
+    """Return the total size of a set of activations."""
+    return sum(value.nbytes for value in model_output.values())
+
+
+def _has_activations(key):
+    """Return True if activations are cached for a key, without copying them."""
+    with _CACHE_LOCK:
+        return key is not None and key in _ACTIVATIONS
+
+
+def _lookup_activations(key):
+    """
+    Return cached activations for a key.
+
+    Args:
+        key (tuple or None): Key from `_activation_key`.
+
+    Returns:
+        dict or None: Copies of the cached activations, or None on a miss.
+    """
+    if key is None:
+        return None
+
+    with _CACHE_LOCK:
+        if key not in _ACTIVATIONS:
+            return None
+        _ACTIVATIONS.move_to_end(key)
+        model_output = _ACTIVATIONS[key]
+
+    # Note extraction is handed copies so the cached arrays are never modified
+    return {name: value.copy() for name, value in model_output.items()}
+
+
+def _store_activations(key, model_output, max_bytes=ACTIVATION_CACHE_MAX_BYTES):
+    """
+    Cache activations for a key, evicting the least recently used entries over `max_bytes`.
+
+    Args:
+        key (tuple or None): Key from `_activation_key`.
+        model_output (dict): Activations ('note', 'onset', 'contour').
+        max_bytes (int): Maximum total size of the cache.
+    """
+    if key is None or _nbytes(model_output) > max_bytes:
+        return
+
+    with _CACHE_LOCK:
+        _ACTIVATIONS[key] = {name: value.copy() for name, value in model_output.items()}
+        _ACTIVATIONS.move_to_end(key)
+
+        total_bytes = sum(_nbytes(entry) for entry in _ACTIVATIONS.values())
+        while total_bytes > max_bytes:
+            _, evicted = _ACTIVATIONS.popitem(last=False)
+            total_bytes -= _nbytes(evicted)
+
+
+if __name__ == "__main__":
+    print("This script contains the activation cache used for audio to MIDI conversion.")
@@ -1,5 +1,20 @@
 # Third-Party Constants
-from basic_pitch import ICASSP_2022_MODEL_PATH
+from basic_pitch import ICASSP_2022_MODEL_PATH, FilenameSuffix, build_icassp_2022_model_path
+
+# Inference Backends
+# `auto` uses ONNX Runtime when it is installed, else TensorFlow
+AUTO_BACKEND = "auto"
+ONNX_BACKEND = "onnx"
+TENSORFLOW_BACKEND = "tensorflow"
+DEFAULT_BACKEND = AUTO_BACKEND
+BACKEND_MODEL_PATHS = {
+    ONNX_BACKEND: build_icassp_2022_model_path(FilenameSuffix.onnx),
+    TENSORFLOW_BACKEND: build_icassp_2022_model_path(FilenameSuffix.tf),
+}
+
+# ONNX Runtime threads (0 lets ONNX Runtime use all physical cores)
+ONNX_INTRA_OP_THREADS = 0
+ONNX_INTER_OP_THREADS = 1
 
 # Default Model and Thresholds
 DEFAULT_MODEL_PATH = ICASSP_2022_MODEL_PATH
@@ -9,6 +24,28 @@ DEFAULT_MIN_NOTE_LENGTH = 127.7
 DEFAULT_SAMPLERATE = 44100
 DEFAULT_MIDI_TEMPO = 120
 
+# Number of model windows (~2s each) run through the model per call
+INFERENCE_BATCH_SIZE = 16
+
+# Activation Cache (threshold changes on the same audio skip inference)
+ACTIVATION_CACHE_ENABLED = True
+ACTIVATION_CACHE_MAX_BYTES = 1 * 1024**3
+
+# Batch Conversion
+EXTENSIONS = {"mp3", "wav", "ogg", "flac"}
+BATCH_MAX_WINDOWS = 512  # Windows packed per inference pass (~90 MB of input audio)
+BATCH_MANIFEST_NAME = "midi_batch_manifest.json"
+
+# Streaming Conversion (bounded memory for long recordings)
+MIDI_STREAM_THRESHOLD_SECONDS = 10 * 60
+STREAM_BLOCK_SECONDS = 10       # Audio decoded per read
+STREAM_CHUNK_SECONDS = 30       # Notes committed per buffer
+STREAM_PARTIAL_SECONDS = 60     # Audio processed before the first partial MIDI file
+STREAM_PARTIAL_GROWTH = 2       # Each partial MIDI file waits until the processed audio has grown by this factor
+STREAM_LOOKAHEAD_SECONDS = 5    # Activations kept after the body so notes can finish
+STREAM_CONTEXT_FRAMES = 8       # Frames kept before the body for onset inference
+STREAM_STITCH_FRAMES = 2        # Max gap joining a held note to its continuation
+
 # Default Output Directory
 DEFAULT_OUTPUT_DIR = "./audio_processing/output_midi"
 
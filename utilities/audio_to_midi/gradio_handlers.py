@@ -1,17 +1,20 @@
-# Third-Party Imports
-from basic_pitch.inference import Model
-
 # Local Imports
 from .main import _audio_to_midi
+from .registry import _load_model
+from .streaming import _audio_to_midi_streaming
+from .cache import _activation_key, _has_activations
 from .utilities import _validate_frequency
+from ..intermediate_audio import audio_duration
 from .constants import (
-    DEFAULT_MODEL_PATH,
+    DEFAULT_BACKEND,
     DEFAULT_ONSET_THRESHOLD,
     DEFAULT_FRAME_THRESHOLD,
     DEFAULT_MIN_NOTE_LENGTH,
     DEFAULT_SAMPLERATE,
     DEFAULT_MIDI_TEMPO,
     DEFAULT_OUTPUT_DIR,
+    MIDI_STREAM_THRESHOLD_SECONDS,
+    ACTIVATION_CACHE_ENABLED,
 )
 
 # ════════════════════════════════════════════════════════════
@@ -43,7 +46,8 @@ def process_audio_to_midi_conversion(
     - song_dir_name (str, optional): Subdirectory name for saving output files.
     - save_midi (bool): Whether to save the generated MIDI file.
     - generate_audio_from_midi (bool): Whether to generate an audio file from the MIDI.
-    - save_model_outputs (bool): Save intermediate model outputs (if applicable).
+    - save_model_outputs (bool): Save intermediate model outputs (if applicable). Streamed
+      recordings save one `.npy` file per model output instead of a single `.npz` file.
     - onset_threshold (float): Threshold for onset detection.
     - frame_threshold (float): Threshold for frame activation.
     - min_note_length (float): Minimum length for detected notes, in milliseconds.
@@ -54,13 +58,44 @@ def process_audio_to_midi_conversion(
     - samplerate (int): Sampling rate for audio processing.
     - midi_tempo (int): Tempo for the generated MIDI file.
 
-    Returns:
-    - str: Path to the generated MIDI file.
+    Yields:
+    - str: Path to the generated MIDI file. Recordings longer than `MIDI_STREAM_THRESHOLD_SECONDS`
+      are streamed, and the path is yielded each time the partial MIDI file is updated
+      (partial files are only written when `save_midi` is enabled).
     """
     # Validate frequency inputs (Since 0 is not a valid frequency)
     min_frequency = _validate_frequency(min_frequency)
     max_frequency = _validate_frequency(max_frequency)
 
+    model = _load_model(backend=DEFAULT_BACKEND)
+
+    # Cached activations only exist for recordings converted whole, so a hit skips probing the duration
+    cache_key = _activation_key(input_file, model) if ACTIVATION_CACHE_ENABLED else None
+
+    # Long recordings are converted with bounded memory, showing the partial MIDI as it grows
+    if not _has_activations(cache_key) and audio_duration(input_file) > MIDI_STREAM_THRESHOLD_SECONDS:
+        for midi_path in _audio_to_midi_streaming(
+            audio_path=input_file,
+            output_directory=DEFAULT_OUTPUT_DIR,
+            song_dir_name=song_dir_name,
+            save_midi=save_midi,
+            sonify_midi=generate_audio_from_midi,
+            save_model_outputs=save_model_outputs,
+            save_notes=False,
+            model_or_model_path=model,
+            onset_threshold=onset_threshold,
+            frame_threshold=frame_threshold,
+            minimum_note_length=min_note_length,
+            minimum_frequency=min_frequency,
+            maximum_frequency=max_frequency,
+            multiple_pitch_bends=allow_multiple_pitch_bends,
+            melodia_trick=apply_melodia_trick,
+            sonification_samplerate=samplerate,
+            midi_tempo=midi_tempo,
+        ):
+            yield str(midi_path)
+        return
+
     # Call the core conversion function
     midi_path = _audio_to_midi(
         # Default parameters here that are not set by Gradio
@@ -72,7 +107,7 @@ def process_audio_to_midi_conversion(
         sonify_midi=generate_audio_from_midi,
         save_model_outputs=save_model_outputs,
         save_notes=False,
-        model_or_model_path=Model(DEFAULT_MODEL_PATH),
+        model_or_model_path=model,
         onset_threshold=onset_threshold,
         frame_threshold=frame_threshold,
         minimum_note_length=min_note_length,
@@ -84,7 +119,7 @@ def process_audio_to_midi_conversion(
         sonification_samplerate=samplerate,
         midi_tempo=midi_tempo,
     )
-    return str(midi_path)
+    yield str(midi_path)
 
 if __name__ == "__main__":
     print("This script is designed to be used as a Gradio interface for audio-to-MIDI conversion.")
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+Basic-pitch inference on in-memory audio.
+
+`basic_pitch.inference.predict_and_save` only accepts file paths and decodes them itself.
+These functions reproduce its windowing, unwrapping and note-creation steps on a NumPy
+buffer instead, so audio can come from the lossless intermediate stems kept by the
+separation step (see `intermediate_audio.py`) and windows of several inputs can be run
+in shared batches.
+
+Reference Model Source from GitHub:
+https://github.com/spotify/basic-pitch
+"""
+from pathlib import Path
+import json
+
+# Third-Party Imports
+import numpy as np
+from basic_pitch import note_creation
+from basic_pitch.constants import AUDIO_SAMPLE_RATE, AUDIO_N_SAMPLES, ANNOTATIONS_FPS, FFT_HOP
+
+# Local Imports
+from .. import midi_sonifier
+from ..intermediate_audio import load_audio_buffer
+from .constants import INFERENCE_BATCH_SIZE
+
+# Windowing used by basic-pitch: 30 frames of overlap between consecutive windows
+N_OVERLAPPING_FRAMES = 30
+OVERLAP_LENGTH = N_OVERLAPPING_FRAMES * FFT_HOP
+HOP_SIZE = AUDIO_N_SAMPLES - OVERLAP_LENGTH
+
+
+def _load_audio(audio_path):
+    """
+    Load audio as mono float32 at the basic-pitch samplerate.
+
+    Args:
+        audio_path (str): Path to the audio file (its lossless buffer is used if available).
+
+    Returns:
+        np.ndarray: Samples of shape (samples,).
+    """
+    audio, _ = load_audio_buffer(audio_path, samplerate=AUDIO_SAMPLE_RATE, mono=True)
+    return audio
+
+
+def _window_audio(audio):
+    """
+    Split audio into the overlapping windows the model expects.
+
+    Args:
+        audio (np.ndarray): Mono samples at `AUDIO_SAMPLE_RATE`.
+
+    Returns:
+        np.ndarray: Windows of shape (n_windows, AUDIO_N_SAMPLES, 1).
+    """
+    audio = np.concatenate([np.zeros(OVERLAP_LENGTH // 2, dtype=np.float32), audio])
+    starts = range(0, len(audio), HOP_SIZE)
+
+    windows = np.zeros((len(starts), AUDIO_N_SAMPLES, 1), dtype=np.float32)
+    for i, start in enumerate(starts):
+        window = audio[start:start + AUDIO_N_SAMPLES]
+        windows[i, :len(window), 0] = window
+    return windows
+
+
+def _n_output_frames(audio_length):
+    """Return the number of activation frames for an audio length in samples."""
+    return int(np.floor(audio_length * (ANNOTATIONS_FPS / AUDIO_SAMPLE_RATE)))
+
+
+def _unwrap_window_frames(output):
+    """
+    Trim the overlapping frames of each window and concatenate them, without the final
+    cut to the audio length done by `_unwrap_output`.
+
+    Args:
+        output (np.ndarray): Activations of shape (n_windows, n_frames, n_bins).
+
+    Returns:
+        np.ndarray: Activations of shape (n_windows * (n_frames - N_OVERLAPPING_FRAMES), n_bins).
+    """
+    n_olap = N_OVERLAPPING_FRAMES // 2
+    if n_olap > 0:
+        output = output[:, n_olap:-n_olap, :]
+    return output.reshape(-1, output.shape[2])
+
+
+def _unwrap_output(output, audio_original_length):
+    """
+    Stitch per-window activations back into a single time series.
+
+    Args:
+        output (np.ndarray): Activations of shape (n_windows, n_frames, n_bins).
+        audio_original_length (int): Number of samples in the original audio.
+
+    Returns:
+        np.ndarray: Activations of shape (n_frames_total, n_bins).
+    """
+    return _unwrap_window_frames(output)[:_n_output_frames(audio_original_length), :]
+
+
+def _predict_windows(model, windows):
+    """
+    Run the model over windows in batches of `INFERENCE_BATCH_SIZE`.
+
+    Args:
+        model: Object with a basic-pitch style `predict` method.
+        windows (np.ndarray): Windows of shape (n_windows, AUDIO_N_SAMPLES, 1).
+
+    Returns:
+        dict: Activations ('note', 'onset', 'contour') of shape (n_windows, n_frames, n_bins).
+    """
+    outputs = {"note": [], "onset": [], "contour": []}
+    for start in range(0, len(windows), INFERENCE_BATCH_SIZE):
+        for key, value in model.predict(windows[start:start + INFERENCE_BATCH_SIZE]).items():
+            outputs[key].append(value)
+    return {key: np.concatenate(values) for key, values in outputs.items()}
+
+
+def _run_inference(model, audio):
+    """
+    Compute the model activations for a whole audio buffer.
+
+    Args:
+        model: Object with a basic-pitch style `predict` method.
+        audio (np.ndarray): Mono samples at `AUDIO_SAMPLE_RATE`.
+
+    Returns:
+        dict: Activations ('note', 'onset', 'contour') of shape (n_frames, n_bins).
+    """
+    return _run_inference_batch(model, [audio])[0]
+
+
+def _run_inference_batch(model, audios):
+    """
+    Compute the model activations for several audio buffers in shared model batches.
+
+    The windows of every buffer are packed into one array, so short inputs (e.g., the
+    stems of one song) fill the same batches instead of each running half-empty ones.
+
+    Args:
+        model: Object with a basic-pitch style `predict` method.
+        audios (list): Mono buffers at `AUDIO_SAMPLE_RATE`.
+
+    Returns:
+        list[dict]: Activations ('note', 'onset', 'contour') for each buffer, in order.
+    """
+    windows = [_window_audio(audio) for audio in audios]
+    outputs = _predict_windows(model, np.concatenate(windows))
+
+    # Split the packed activations back per buffer
+    results, start = [], 0
+    for audio, audio_windows in zip(audios, windows):
+        end = start + len(audio_windows)
+        results.append({key: _unwrap_output(value[start:end], len(audio)) for key, value in outputs.items()})
+        start = end
+    return results
+
+
+def _min_note_frames(minimum_note_length):
+    """Convert a minimum note length from milliseconds to model frames."""
+    return int(np.round(minimum_note_length / 1000 * (AUDIO_SAMPLE_RATE / FFT_HOP)))
+
+
+def _notes_from_activations(
+    model_output,
+    onset_threshold,
+    frame_threshold,
+    minimum_note_length,
+    minimum_frequency,
+    maximum_frequency,
+    multiple_pitch_bends,
+    melodia_trick,
+    midi_tempo,
+):
+    """
+    Extract notes from model activations, as `basic_pitch.inference.predict` does.
+    Parameters are explained in the `process_audio_to_midi_conversion` function.
+
+    Returns:
+        tuple: (pretty_midi.PrettyMIDI, list of note events).
+    """
+    return note_creation.model_output_to_notes(
+        model_output,
+        onset_thresh=onset_threshold,
+        frame_thresh=frame_threshold,
+        infer_onsets=True,
+        min_note_len=_min_note_frames(minimum_note_length),
+        min_freq=minimum_frequency,
+        max_freq=maximum_frequency,
+        include_pitch_bends=True,
+        multiple_pitch_bends=multiple_pitch_bends,
+        melodia_trick=melodia_trick,
+        midi_tempo=midi_tempo,
+    )
+
+
+def _save_outputs(
+    output_directory,
+    name,
+    model_output,
+    midi_data,
+    note_events,
+    save_midi,
+    sonify_midi,
+    save_model_outputs,
+    save_notes,
+    debug_file,
+    sonification_samplerate,
+):
+    """
+    Write the requested outputs with the same file names as `predict_and_save`.
+
+    Args:
+        output_directory (Path): Directory to save outputs to.
+        name (str): Base name of the input audio file (without extension).
+        Other parameters are explained in the `process_audio_to_midi_conversion` function.
+
+    Returns:
+        Path: Path to the MIDI file.
+    """
+    output_directory = Path(output_directory)
+    midi_path = output_directory / f"{name}_basic_pitch.mid"
+
+    if save_model_outputs:
+        np.savez(output_directory / f"{name}_basic_pitch.npz", basic_pitch_model_output=model_output)
+
+    if save_midi:
+        midi_data.write(str(midi_path))
+
+    if sonify_midi:
+        midi_sonifier.sonify_midi(midi_data, output_directory / f"{name}_basic_pitch.wav", sonification_samplerate)
+
+    if save_notes:
+        note_creation.save_note_events(note_events, output_directory / f"{name}_basic_pitch.csv")
+
+    if debug_file:
+        with open(debug_file, "w") as f:
+            json.dump({"unwrapped_output": {key: value.tolist() for key, value in model_output.items()}}, f)
+
+    return midi_path
+
+
+if __name__ == "__main__":
+    print("This script contains the basic-pitch inference functions used for audio to MIDI conversion.")
@@ -1,10 +1,11 @@
 from pathlib import Path
 
-# Third-Party Imports
-from basic_pitch.inference import predict_and_save, Model
-
 # Local Imports
 from .utilities import _create_directory
+from .registry import _load_model
+from .inference import _load_audio, _run_inference, _notes_from_activations, _save_outputs
+from .cache import _activation_key, _lookup_activations, _store_activations
+from .constants import ACTIVATION_CACHE_ENABLED
 from ..print_utilities import print_title, print_message
 
 
@@ -57,17 +58,25 @@ def _audio_to_midi(
     print_message(f"Converting audio file:", text_color="bright_blue", indent_level=1)
     print_message(f"`{audio_path.name}`", text_color="bright_blue", indent_level=2, include_border=True)
 
-    # Predict and save MIDI
-    predict_and_save(
-        # Reference: See `gradio_handlers.py` for how these parameters integrate with Gradio
-        # Do not modify parameter names or order
-        audio_path_list=[audio_path],
-        output_directory=output_directory,
-        save_midi=save_midi,
-        sonify_midi=sonify_midi,
-        save_model_outputs=save_model_outputs,
-        save_notes=save_notes,
-        model_or_model_path=model_or_model_path,
+    # Use the resident model if a path was given
+    model = _load_model(model_or_model_path) if isinstance(model_or_model_path, (str, Path)) else model_or_model_path
+
+    # Reuse the activations of an earlier run on the same audio (only thresholds changed)
+    cache_key = _activation_key(audio_path, model) if ACTIVATION_CACHE_ENABLED else None
+    model_output = _lookup_activations(cache_key)
+
+    if model_output is None:
+        # Load the audio, reading the lossless intermediate buffer when the separation step left one
+        audio = _load_audio(audio_path)
+        model_output = _run_inference(model, audio)
+        _store_activations(cache_key, model_output)
+    else:
+        print_message("[CACHE]", text_color="bright_magenta")
+        print_message("Reusing cached model activations for this audio.", text_color="bright_magenta", indent_level=1, include_border=True)
+
+    # Extract notes and save MIDI
+    midi_data, note_events = _notes_from_activations(
+        model_output,
         onset_threshold=onset_threshold,
         frame_threshold=frame_threshold,
         minimum_note_length=minimum_note_length,
@@ -75,9 +84,20 @@ def _audio_to_midi(
         maximum_frequency=maximum_frequency,
         multiple_pitch_bends=multiple_pitch_bends,
         melodia_trick=melodia_trick,
+        midi_tempo=midi_tempo,
+    )
+    _save_outputs(
+        output_directory,
+        audio_path.stem,
+        model_output,
+        midi_data,
+        note_events,
+        save_midi=save_midi,
+        sonify_midi=sonify_midi,
+        save_model_outputs=save_model_outputs,
+        save_notes=save_notes,
         debug_file=debug_file,
         sonification_samplerate=sonification_samplerate,
-        midi_tempo=midi_tempo,
     )
     print_message("", include_border=True)
 
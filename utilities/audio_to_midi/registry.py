@@ -0,0 +1,97 @@
+"""
+Resident basic-pitch models shared across requests.
+
+Building a basic-pitch model loads the ICASSP 2022 weights and, with TensorFlow, rebuilds
+the graph, which takes several seconds. The registry loads each model once, warms
+it up with a short dummy inference (so graph tracing does not land on the first real
+request) and hands the same instance to every concurrent Gradio request.
+"""
+from pathlib import Path
+import threading
+import time
+
+# Third-Party Imports
+import numpy as np
+from basic_pitch.constants import AUDIO_N_SAMPLES
+
+# Local Imports
+from ..print_utilities import print_message
+from .backends import _resolve_backend, _backend_for_path, _create_model
+from .constants import DEFAULT_BACKEND, BACKEND_MODEL_PATHS
+
+# Resident models, keyed by (backend, model path)
+_RESIDENT_MODELS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class _ResidentModel:
+    """
+    Thread-safe wrapper around a loaded basic-pitch model.
+
+    Exposes the same `predict` method as the backends in `backends.py`, so it can be passed
+    anywhere a model is expected. Calls are serialized with a lock, one batch at a time, so
+    concurrent requests interleave instead of running the graph re-entrantly.
+    """
+
+    def __init__(self, model, key):
+        self.model = model
+        self.key = key
+        self.lock = threading.Lock()
+
+    def predict(self, x):
+        """Run the model on a batch of windows of shape (batch, AUDIO_N_SAMPLES, 1)."""
+        with self.lock:
+            return self.model.predict(x)
+
+
+def _warmup(model):
+    """Run one silent window through the model to trigger graph tracing and allocation."""
+    model.predict(np.zeros((1, AUDIO_N_SAMPLES, 1), dtype=np.float32))
+
+
+def _load_model(model_path=None, backend=DEFAULT_BACKEND):
+    """
+    Return a resident basic-pitch model, loading and warming it up on first use.
+
+    Args:
+        model_path (str, optional): Path to a saved basic-pitch model; its backend is
+            picked from the file extension. Uses the bundled model for `backend` if None.
+        backend (str): 'auto', 'onnx' or 'tensorflow' (ignored when `model_path` is set).
+
+    Returns:
+        _ResidentModel: The shared model.
+    """
+    if model_path is None:
+        backend = _resolve_backend(backend)
+        model_path = BACKEND_MODEL_PATHS[backend]
+    else:
+        backend = _backend_for_path(model_path)
+    key = (backend, str(model_path))
+
+    with _REGISTRY_LOCK:
+        if key not in _RESIDENT_MODELS:
+            start_time = time.perf_counter()
+            model = _create_model(backend, model_path)
+            load_seconds = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            _warmup(model)
+            warmup_seconds = time.perf_counter() - start_time
+
+            _RESIDENT_MODELS[key] = _ResidentModel(model, key)
+
+            print_message("[MODEL]", text_color="bright_magenta")
+            print_message(f"Loaded basic-pitch model `{Path(model_path).name}` with `{backend}`:", text_color="bright_magenta", indent_level=1)
+            print_message(f"Load: \t{load_seconds:.2f}s", text_color="bright_magenta", indent_level=2)
+            print_message(f"Warmup: \t{warmup_seconds:.2f}s", text_color="bright_magenta", indent_level=2, include_border=True)
+
+        return _RESIDENT_MODELS[key]
+
+
+def preload_audio_to_midi_model(backend=DEFAULT_BACKEND):
+    """Load and warm up the basic-pitch model of a backend, e.g., when the app starts."""
+    _load_model(backend=backend)
+
+
+if __name__ == "__main__":
+    print("This script contains the resident model registry used for audio to MIDI conversion.")
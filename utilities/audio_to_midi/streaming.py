@@ -0,0 +1,422 @@
+"""
+Bounded-memory, streaming audio-to-MIDI conversion for long recordings.
+
+basic-pitch decodes the whole file and keeps the full-length activation matrices in memory.
+Here the audio is decoded and resampled block by block, run through the model in fixed
+windows, and notes are extracted from a rolling buffer of activations:
+
+    [context | body | lookahead]
+
+Notes starting in the body are committed; the lookahead lets them finish before the buffer
+moves on. Activations of committed notes are masked in the frames carried into the next
+buffer so they are not detected twice, and a note still sounding at the end of the buffer
+is held open and stitched to its continuation in the next one.
+
+The MIDI file is rewritten with the notes found so far at growing intervals (when the MIDI
+file is saved), so the UI can show a partial result while the rest of the recording is
+still processing, without rewriting the whole file after every buffer.
+"""
+from pathlib import Path
+
+# Third-Party Imports
+import numpy as np
+import soundfile as sf
+import soxr
+from basic_pitch import note_creation
+from basic_pitch.constants import AUDIO_SAMPLE_RATE, AUDIO_N_SAMPLES, ANNOTATIONS_FPS, MIDI_OFFSET
+
+# Local Imports
+from .. import midi_sonifier
+from ..intermediate_audio import load_intermediate, load_audio_buffer
+from ..print_utilities import print_title, print_message
+from .registry import _load_model
+from .inference import (
+    OVERLAP_LENGTH,
+    HOP_SIZE,
+    _n_output_frames,
+    _unwrap_window_frames,
+    _min_note_frames,
+)
+from .utilities import _create_directory
+from .constants import (
+    INFERENCE_BATCH_SIZE,
+    STREAM_BLOCK_SECONDS,
+    STREAM_CHUNK_SECONDS,
+    STREAM_PARTIAL_SECONDS,
+    STREAM_PARTIAL_GROWTH,
+    STREAM_LOOKAHEAD_SECONDS,
+    STREAM_CONTEXT_FRAMES,
+    STREAM_STITCH_FRAMES,
+)
+
+
+def _stream_audio(audio_path, block_seconds=STREAM_BLOCK_SECONDS):
+    """
+    Decode an audio file block by block as mono float32 at the basic-pitch samplerate.
+
+    Reads the lossless intermediate buffer when available, else the file through
+    `soundfile`. Formats `soundfile` cannot read are decoded whole as a fallback.
+
+    Args:
+        audio_path (str): Path to the audio file.
+        block_seconds (float): Length of each decoded block.
+
+    Yields:
+        np.ndarray: Mono samples at `AUDIO_SAMPLE_RATE`.
+    """
+    intermediate = load_intermediate(audio_path)
+    if intermediate is not None:
+        wav, samplerate = intermediate
+        block = int(block_seconds * samplerate)
+        blocks = (np.asarray(wav[:, i:i + block], dtype=np.float32).mean(axis=0) for i in range(0, wav.shape[-1], block))
+    else:
+        try:
+            audio_file = sf.SoundFile(str(audio_path))
+        except RuntimeError:
+            audio, _ = load_audio_buffer(audio_path, samplerate=AUDIO_SAMPLE_RATE, mono=True)
+            block = int(block_seconds * AUDIO_SAMPLE_RATE)
+            yield from (audio[i:i + block] for i in range(0, len(audio), block))
+            return
+
+        samplerate = audio_file.samplerate
+        blocks = (
+            block.mean(axis=1)
+            for block in audio_file.blocks(blocksize=int(block_seconds * samplerate), dtype="float32", always_2d=True)
+        )
+
+    # Resample with a stream so block edges are continuous (same quality as `librosa.load`)
+    resampler = None
+    if samplerate != AUDIO_SAMPLE_RATE:
+        resampler = soxr.ResampleStream(samplerate, AUDIO_SAMPLE_RATE, 1, dtype="float32", quality="HQ")
+
+    for block in blocks:
+        yield resampler.resample_chunk(block) if resampler else block
+    if resampler:
+        yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+class _StreamingTranscriber:
+    """
+    Incremental window inference and note extraction over a stream of audio blocks.
+
+    Notes are kept as (start frame, end frame, MIDI pitch, amplitude, pitch bends), with
+    frame indices counted from the start of the recording.
+    """
+
+    def __init__(self, model, note_options, frame_sink=None):
+        self.model = model
+        self.options = note_options
+        self.frame_sink = frame_sink
+        self.notes = []
+
+        self._samples = np.zeros(OVERLAP_LENGTH // 2, dtype=np.float32)  # Front padding, as in `_window_audio`
+        self._total_samples = 0
+        self._windows = []
+        self._frames = None
+        self._buffer_start = 0
+        self._context = 0
+        self._open = {}
+
+        self._body = int(STREAM_CHUNK_SECONDS * ANNOTATIONS_FPS)
+        self._lookahead = int(STREAM_LOOKAHEAD_SECONDS * ANNOTATIONS_FPS)
+
+    def feed(self, block):
+        """
+        Add a block of audio.
+
+        Args:
+            block (np.ndarray): Mono samples at `AUDIO_SAMPLE_RATE`.
+
+        Returns:
+            bool: True if new notes were committed.
+        """
+        self._total_samples += len(block)
+        self._samples = np.concatenate([self._samples, block])
+
+        while len(self._samples) >= AUDIO_N_SAMPLES:
+            self._windows.append(self._samples[:AUDIO_N_SAMPLES].copy())
+            self._samples = self._samples[HOP_SIZE:]
+            if len(self._windows) >= INFERENCE_BATCH_SIZE:
+                self._infer()
+
+        if self._frames is not None and len(self._frames["note"]) >= self._context + self._body + self._lookahead:
+            self._extract(final=False)
+            return True
+        return False
+
+    def finish(self):
+        """Process the remaining audio and close every open note."""
+        # Zero-padded trailing windows, as in `_window_audio`
+        while len(self._samples) > 0:
+            window = np.zeros(AUDIO_N_SAMPLES, dtype=np.float32)
+            window[:min(len(self._samples), AUDIO_N_SAMPLES)] = self._samples[:AUDIO_N_SAMPLES]
+            self._windows.append(window)
+            self._samples = self._samples[HOP_SIZE:]
+        self._infer()
+
+        if self._frames is not None:
+            # Cut the frames beyond the end of the audio, as in `_unwrap_output`
+            end = max(0, self.total_frames() - self._buffer_start)
+            self._frames = {key: value[:end] for key, value in self._frames.items()}
+            self._extract(final=True)
+
+        self.notes.extend(self._open.values())
+        self._open = {}
+
+    def total_frames(self):
+        """Return the number of activation frames of the audio fed so far."""
+        return _n_output_frames(self._total_samples)
+
+    def _infer(self):
+        """Run the model on the pending windows and append their activations."""
+        if not self._windows:
+            return
+
+        output = self.model.predict(np.stack(self._windows)[:, :, None])
+        self._windows = []
+
+        frames = {key: _unwrap_window_frames(value) for key, value in output.items()}
+        if self.frame_sink is not None:
+            self.frame_sink(frames)
+        if self._frames is None:
+            self._frames = frames
+        else:
+            self._frames = {key: np.concatenate([self._frames[key], frames[key]]) for key in self._frames}
+
+    def _extract(self, final):
+        """Extract notes from the buffer, commit those starting in its body and carry the rest."""
+        n_frames = len(self._frames["note"])
+        body_end = n_frames if final else n_frames - self._lookahead
+
+        notes = note_creation.output_to_notes_polyphonic(
+            self._frames["note"],
+            self._frames["onset"],
+            onset_thresh=self.options["onset_threshold"],
+            frame_thresh=self.options["frame_threshold"],
+            infer_onsets=True,
+            min_note_len=_min_note_frames(self.options["minimum_note_length"]),
+            min_freq=self.options["minimum_frequency"],
+            max_freq=self.options["maximum_frequency"],
+            melodia_trick=self.options["melodia_trick"],
+        )
+        notes = note_creation.get_pitch_bends(self._frames["contour"], notes)
+
+        previous_open, self._open, committed = self._open, {}, []
+        for start, end, pitch, amplitude, bends in sorted(notes, key=lambda note: note[0]):
+            # Notes in the context were handled by the previous buffer, notes in the lookahead by the next
+            if not self._context <= start < body_end:
+                continue
+            note = (start + self._buffer_start, end + self._buffer_start, pitch, amplitude, bends)
+
+            # Stitch the continuation of a note that was still sounding at the previous buffer's end
+            held = previous_open.get(pitch)
+            if held is not None and note[0] <= held[1] + STREAM_STITCH_FRAMES:
+                note = _merge_notes(previous_open.pop(pitch), note)
+
+            committed.append(note)
+            # A note ending at (or within the stitch tolerance of) the buffer end may still be sounding
+            if not final and end >= n_frames - 1 - STREAM_STITCH_FRAMES:
+                self._open[pitch] = note
+            else:
+                self.notes.append(note)
+
+        # Held notes without a continuation ended at the buffer boundary
+        self.notes.extend(previous_open.values())
+
+        if final:
+            self._frames = None
+            return
+
+        # Carry the lookahead (and some context) into the next buffer, masking committed notes
+        carry_start = body_end - STREAM_CONTEXT_FRAMES
+        carry = {key: value[carry_start:].copy() for key, value in self._frames.items()}
+        carry_offset = self._buffer_start + carry_start
+        for start, end, pitch, _, _ in committed:
+            first, last = max(start - carry_offset, 0), end - carry_offset + 1
+            if last > 0:
+                carry["note"][first:last, pitch - MIDI_OFFSET] = 0
+                carry["onset"][first:last, pitch - MIDI_OFFSET] = 0
+
+        self._frames = carry
+        self._buffer_start = carry_offset
+        self._context = STREAM_CONTEXT_FRAMES
+
+    def note_events(self):
+        """
+        Return every note found so far in seconds, including the open ones.
+
+        Returns:
+            list: (start seconds, end seconds, MIDI pitch, amplitude, pitch bends) tuples.
+        """
+        notes = sorted(self.notes + list(self._open.values()), key=lambda note: note[0])
+        if not notes:
+            return []
+
+        times = note_creation.model_frames_to_time(max(note[1] for note in notes) + 1)
+        return [(times[start], times[end], pitch, amplitude, bends) for start, end, pitch, amplitude, bends in notes]
+
+
+class _ActivationWriter:
+    """
+    Writes the model activations of a stream to `<name>_basic_pitch_<output>.npy` files.
+
+    Frames are appended to raw files as they are inferred, and copied into `.npy` files
+    (cut to the length of the audio, as `_unwrap_output` does) once the stream ends, so the
+    activations of a long recording are saved without holding them in memory.
+    """
+
+    def __init__(self, output_directory, name):
+        self.paths = {}
+        self._output_directory = Path(output_directory)
+        self._name = name
+        self._files = {}
+        self._layouts = {}
+
+    def write(self, frames):
+        """Append frames of shape (n_frames, n_bins) for each model output."""
+        for key, value in frames.items():
+            if key not in self._files:
+                self.paths[key] = self._output_directory / f"{self._name}_basic_pitch_{key}.npy"
+                self._files[key] = open(self.paths[key].with_suffix(".raw"), "wb")
+                self._layouts[key] = [0, value.shape[1], value.dtype]
+            self._files[key].write(np.ascontiguousarray(value).tobytes())
+            self._layouts[key][0] += len(value)
+
+    def close(self, n_frames):
+        """
+        Finish the `.npy` files.
+
+        Args:
+            n_frames (int): Number of frames of the audio; later (padding) frames are dropped.
+        """
+        for key, file in self._files.items():
+            file.close()
+            raw_path = self.paths[key].with_suffix(".raw")
+            rows, bins, dtype = self._layouts[key]
+            length = min(rows, n_frames)
+
+            target = np.lib.format.open_memmap(self.paths[key], mode="w+", dtype=dtype, shape=(length, bins))
+            if length:
+                source = np.memmap(raw_path, dtype=dtype, mode="r", shape=(rows, bins))
+                step = int(STREAM_CHUNK_SECONDS * ANNOTATIONS_FPS)
+                for start in range(0, length, step):
+                    target[start:start + step] = source[start:min(start + step, length)]
+                del source
+            target.flush()
+            del target
+            raw_path.unlink()
+
+
+def _merge_notes(first, second):
+    """
+    Join a note held open at a buffer boundary with its continuation.
+
+    Pitch bends hold one value per frame, so the frames between the two parts are padded
+    with the last bend of the first part (and frames where they overlap are counted once),
+    keeping the bends after the seam aligned with the audio.
+    """
+    first_length, second_length = max(first[1] - first[0], 1), max(second[1] - second[0], 1)
+    amplitude = (first[3] * first_length + second[3] * second_length) / (first_length + second_length)
+
+    bends = None
+    if first[4] is not None and second[4] is not None:
+        gap = second[0] - first[1]
+        if gap >= 0:
+            bends = list(first[4]) + [first[4][-1] if len(first[4]) else 0] * gap + list(second[4])
+        else:
+            bends = list(first[4]) + list(second[4])[-gap:]
+    return (first[0], second[1], first[2], amplitude, bends)
+
+
+def _audio_to_midi_streaming(
+    audio_path,
+    output_directory,
+    song_dir_name,
+    save_midi,
+    sonify_midi,
+    save_model_outputs,
+    save_notes,
+    model_or_model_path,
+    onset_threshold,
+    frame_threshold,
+    minimum_note_length,
+    minimum_frequency,
+    maximum_frequency,
+    multiple_pitch_bends,
+    melodia_trick,
+    sonification_samplerate,
+    midi_tempo,
+):
+    """
+    Convert a long audio file to MIDI with bounded memory, writing partial results.
+    Parameters are explained in the `process_audio_to_midi_conversion` function.
+
+    Partial MIDI files are rewritten after `STREAM_PARTIAL_SECONDS` of audio, then each time
+    the audio processed has grown by `STREAM_PARTIAL_GROWTH`, so the rewrites of a long
+    recording cost time linear in its length.
+
+    With `save_midi` disabled, no MIDI file (partial or final) is written. With
+    `save_model_outputs`, the activations are saved as one `.npy` file per model output
+    (see `_ActivationWriter`) instead of the single `.npz` file of `_audio_to_midi`.
+
+    Yields:
+        Path: Path to the MIDI file, each time it is rewritten with more notes.
+    """
+    print_title("Streaming Audio to MIDI with Basic-Pitch")
+
+    audio_path = Path(audio_path)
+    output_directory = Path(f"{output_directory}/{song_dir_name}") if song_dir_name else Path(output_directory)
+    _create_directory(output_directory)
+
+    midi_path = output_directory / f"{audio_path.stem}_basic_pitch.mid"
+    model = _load_model(model_or_model_path) if isinstance(model_or_model_path, (str, Path)) else model_or_model_path
+
+    print_message("[INFO]", text_color="bright_blue")
+    print_message(f"Streaming audio file in {STREAM_CHUNK_SECONDS}s chunks:", text_color="bright_blue", indent_level=1)
+    print_message(f"`{audio_path.name}`", text_color="bright_blue", indent_level=2, include_border=True)
+
+    activation_writer = _ActivationWriter(output_directory, audio_path.stem) if save_model_outputs else None
+    transcriber = _StreamingTranscriber(model, {
+        "onset_threshold": onset_threshold,
+        "frame_threshold": frame_threshold,
+        "minimum_note_length": minimum_note_length,
+        "minimum_frequency": minimum_frequency,
+        "maximum_frequency": maximum_frequency,
+        "melodia_trick": melodia_trick,
+    }, frame_sink=activation_writer.write if activation_writer else None)
+
+    def write_midi():
+        note_events = transcriber.note_events()
+        midi_data = note_creation.note_events_to_midi(note_events, midi_tempo, multiple_pitch_bends)
+        if save_midi:
+            midi_data.write(str(midi_path))
+        return midi_data, note_events
+
+    next_partial = int(STREAM_PARTIAL_SECONDS * ANNOTATIONS_FPS)
+    for block in _stream_audio(audio_path):
+        # Partial MIDI files are only written (and shown) when the MIDI file is saved
+        if transcriber.feed(block) and save_midi and transcriber.total_frames() >= next_partial:
+            write_midi()
+            next_partial = int(transcriber.total_frames() * STREAM_PARTIAL_GROWTH)
+            yield midi_path
+
+    transcriber.finish()
+    midi_data, note_events = write_midi()
+
+    if activation_writer:
+        activation_writer.close(transcriber.total_frames())
+
+    if sonify_midi:
+        midi_sonifier.sonify_midi(midi_data, output_directory / f"{audio_path.stem}_basic_pitch.wav", sonification_samplerate)
+    if save_notes:
+        note_creation.save_note_events(note_events, output_directory / f"{audio_path.stem}_basic_pitch.csv")
+
+    print_message("[SUCCESS]", text_color="bright_green")
+    print_message(f"MIDI file with {len(note_events)} notes saved in:", text_color="bright_green", indent_level=1)
+    print_message(f"`{midi_path}`", text_color="bright_green", indent_level=2, include_border=True)
+
+    yield midi_path
+
+
+if __name__ == "__main__":
+    print("This script contains the bounded-memory streaming mode for audio to MIDI conversion.")
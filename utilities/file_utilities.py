@@ -0,0 +1,61 @@
+"""
+File helpers shared by the caches of the pipeline stages.
+
+- `file_digest` hashes a file's bytes in blocks, for caches keyed by content (Gradio copies
+  every upload to a new temp path, so paths cannot be used as keys). Digests are memoized
+  by path, size and mtime, so the stages of one request hash a file only once.
+- `write_json_atomic` writes a JSON file through a temporary file and `os.replace`, so a
+  reader (or another worker process) never sees a half-written file.
+"""
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+
+
+def file_digest(path):
+    """
+    Return the SHA-256 digest of a file's bytes.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Hex digest of the file's contents.
+    """
+    stat = os.stat(path)
+    return _cached_digest(str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _cached_digest(path, size, mtime_ns):
+    """Hash a file's bytes; `size` and `mtime_ns` only key the memoized result."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path, data):
+    """
+    Atomically write data to a JSON file, creating its directory if needed.
+
+    Args:
+        path (str): Path to the JSON file.
+        data: JSON-serializable data.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # The temp name is unique per process and thread, so concurrent writers never share it
+    temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(temp_path, path)
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
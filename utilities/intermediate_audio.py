@@ -0,0 +1,246 @@
+"""
+Lossless intermediate audio shared between pipeline stages.
+
+Stems are written by Demucs as MP3 for the user, then decoded again by pydub (merging),
+faster-whisper (lyrics) and basic-pitch (MIDI), losing quality on every round trip.
+Alongside each user-facing stem we keep a float32 PCM copy as a memory-mapped `.npy`
+file, so downstream stages read the exact samples straight from the page cache.
+
+A sidecar JSON file records the samplerate and the size/mtime of the user-facing file,
+so a stale buffer (e.g., after the stem was overwritten by another tool) is never used.
+
+Gradio hands each tab a temporary copy of its input, so the buffer is rarely next to the
+file a stage receives. Every buffer is therefore also registered under the SHA-256 digest
+of its user-facing file, and a copy finds the buffer of its source stem through that
+digest. Hashing an MP3 is far cheaper than decoding it.
+
+Buffers are large (about 340 MB of disk for the four stems of a 5-minute song). They are
+evicted together with their stems by the stem cache, and the oldest buffers (not their
+stems) are dropped once all registered buffers exceed `INTERMEDIATE_MAX_BYTES`. Set
+`SAVE_INTERMEDIATE_STEMS` to False in the stem separation constants to turn them off.
+"""
+from pathlib import Path
+import json
+
+# Third-Party Imports
+import librosa
+import numpy as np
+
+# Local Imports
+from .file_utilities import file_digest
+
+INTERMEDIATE_SUFFIX = ".f32.npy"
+METADATA_SUFFIX = ".f32.json"
+
+# Buffers registered by the digest of their user-facing file, and their total size budget
+INTERMEDIATE_REGISTRY_DIR = Path("./audio_processing/.intermediate_registry")
+INTERMEDIATE_MAX_BYTES = 4 * 1024 ** 3  # 4 GiB
+
+
+def intermediate_path(audio_path):
+    """Return the path of the float32 buffer kept for a user-facing audio file."""
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + INTERMEDIATE_SUFFIX)
+
+
+def _metadata_path(audio_path):
+    """Return the path of the metadata sidecar for a user-facing audio file."""
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + METADATA_SUFFIX)
+
+
+def _registry_path(audio_path):
+    """Return the registry entry of a user-facing audio file, keyed by its content."""
+    return INTERMEDIATE_REGISTRY_DIR / f"{file_digest(audio_path)}.json"
+
+
+def _prune_intermediates(max_bytes=INTERMEDIATE_MAX_BYTES):
+    """
+    Delete the least recently used buffers until all registered buffers fit the budget.
+
+    Only the buffers are deleted; their user-facing files are left to the stem cache.
+
+    Args:
+        max_bytes (int): Size budget for all registered buffers.
+    """
+    buffers = []
+    for entry_path in INTERMEDIATE_REGISTRY_DIR.glob("*.json"):
+        try:
+            with open(entry_path, "r") as f:
+                audio_path = Path(json.load(f)["audio_path"])
+            stat = intermediate_path(audio_path).stat()
+        except (OSError, ValueError, KeyError):
+            # The buffer was evicted with its stem, or the entry is corrupt
+            entry_path.unlink(missing_ok=True)
+            continue
+        buffers.append((stat.st_mtime, stat.st_size, audio_path, entry_path))
+
+    total = sum(size for _, size, _, _ in buffers)
+    for _, size, audio_path, entry_path in sorted(buffers, key=lambda buffer: buffer[0]):
+        if total <= max_bytes:
+            break
+        remove_intermediate(audio_path)
+        entry_path.unlink(missing_ok=True)
+        total -= size
+
+
+def save_intermediate(audio_path, wav, samplerate):
+    """
+    Keep a float32 copy of the audio written to `audio_path`.
+
+    Must be called after the user-facing file has been written. The buffer is registered
+    by the digest of that file, so copies of it find the buffer too.
+
+    Args:
+        audio_path (str): Path to the user-facing (encoded) audio file.
+        wav (np.ndarray): Samples of shape (channels, samples).
+        samplerate (int): Samplerate of the samples.
+    """
+    audio_path = Path(audio_path)
+    np.save(intermediate_path(audio_path), np.ascontiguousarray(wav, dtype=np.float32))
+
+    stat = audio_path.stat()
+    with open(_metadata_path(audio_path), "w") as f:
+        json.dump({"samplerate": int(samplerate), "signature": [stat.st_size, stat.st_mtime_ns]}, f)
+
+    INTERMEDIATE_REGISTRY_DIR.mkdir(parents=True, exist_ok=True)
+    with open(_registry_path(audio_path), "w") as f:
+        json.dump({"audio_path": str(audio_path.resolve())}, f)
+
+    _prune_intermediates()
+
+
+def remove_intermediate(audio_path):
+    """Delete the float32 copy of a user-facing audio file and its sidecar, if present."""
+    intermediate_path(audio_path).unlink(missing_ok=True)
+    _metadata_path(audio_path).unlink(missing_ok=True)
+
+
+def _sidecar_metadata(audio_path):
+    """Return the metadata of the buffer kept next to a user-facing audio file, if it is still valid."""
+    audio_path = Path(audio_path)
+    buffer_path, metadata_path = intermediate_path(audio_path), _metadata_path(audio_path)
+    if not (audio_path.exists() and buffer_path.exists() and metadata_path.exists()):
+        return None
+
+    try:
+        with open(metadata_path, "r") as f:
+            metadata = json.load(f)
+        stat = audio_path.stat()
+        return metadata if metadata["signature"] == [stat.st_size, stat.st_mtime_ns] else None
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _resolve_intermediate(audio_path):
+    """
+    Find the valid buffer of a user-facing audio file, without loading it.
+
+    The buffer next to the file is used first; otherwise the file is looked up by its
+    content, which finds the buffer of the stem it was copied from.
+
+    Returns:
+        tuple or None: (path of the buffer, its metadata), or None if there is none.
+    """
+    metadata = _sidecar_metadata(audio_path)
+    if metadata is not None:
+        return intermediate_path(audio_path), metadata
+    if not Path(audio_path).is_file():
+        return None
+
+    try:
+        entry_path = _registry_path(audio_path)
+        with open(entry_path, "r") as f:
+            source_path = Path(json.load(f)["audio_path"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # The source stem must still hold the same bytes its buffer was saved for
+    metadata = _sidecar_metadata(source_path)
+    if metadata is None:
+        entry_path.unlink(missing_ok=True)
+        return None
+    return intermediate_path(source_path), metadata
+
+
+def has_intermediate(audio_path):
+    """Return True if a valid float32 copy of a user-facing audio file is available."""
+    return _resolve_intermediate(audio_path) is not None
+
+
+def load_intermediate(audio_path):
+    """
+    Memory-map the float32 copy of a user-facing audio file, if one is available.
+
+    Args:
+        audio_path (str): Path to the user-facing audio file.
+
+    Returns:
+        tuple or None: (samples of shape (channels, samples), samplerate), or None if
+        there is no buffer or it no longer matches the user-facing file.
+    """
+    resolved = _resolve_intermediate(audio_path)
+    if resolved is None:
+        return None
+
+    buffer_path, metadata = resolved
+    try:
+        return np.load(buffer_path, mmap_mode="r"), metadata["samplerate"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def audio_duration(audio_path):
+    """
+    Return the duration of an audio file in seconds, without decoding it.
+
+    The lossless intermediate buffer is used when available, else the file's header.
+
+    Args:
+        audio_path (str): Path to the user-facing audio file.
+
+    Returns:
+        float: Duration in seconds.
+    """
+    intermediate = load_intermediate(audio_path)
+    if intermediate is not None:
+        wav, samplerate = intermediate
+        return wav.shape[-1] / samplerate
+    return librosa.get_duration(path=str(audio_path))
+
+
+def load_audio_buffer(audio_path, samplerate=None, mono=False):
+    """
+    Load audio as float32 samples, preferring the lossless intermediate buffer.
+
+    Falls back to decoding the file with librosa when no intermediate is available.
+
+    Args:
+        audio_path (str): Path to the user-facing audio file.
+        samplerate (int, optional): Resample to this rate (keeps the native rate if None).
+        mono (bool): Downmix to a single channel.
+
+    Returns:
+        tuple: (samples, samplerate); samples are (channels, samples), or (samples,) if mono.
+    """
+    intermediate = load_intermediate(audio_path)
+    if intermediate is None:
+        wav, source_rate = librosa.load(str(audio_path), sr=None, mono=False)
+    else:
+        wav, source_rate = intermediate
+
+    wav = np.asarray(wav, dtype=np.float32)
+    if mono:
+        wav = librosa.to_mono(wav) if wav.ndim > 1 else wav
+    elif wav.ndim == 1:
+        wav = wav[None]
+
+    if samplerate is not None and samplerate != source_rate:
+        wav = librosa.resample(wav, orig_sr=source_rate, target_sr=samplerate, res_type="soxr_hq")
+        source_rate = samplerate
+
+    return wav.astype(np.float32, copy=False), source_rate
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
@@ -5,6 +5,7 @@ import torch
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 COMPUTE_TYPE = "int8_float16" if DEVICE == "cuda" else "int8"
 MODEL_SIZE = "large-v3"
+WHISPER_SAMPLERATE = 16000  # Samplerate expected by Whisper for in-memory audio
 
 # Default Output Directories
 DEFAULT_OUTPUT_DIR_LYRICS_RAW = "./audio_processing/karaoke_files/output_lyrics/raw/"
@@ -1,12 +1,28 @@
+# Standard Library Imports
+import threading
+
 # Third-Party Imports
 from faster_whisper import WhisperModel
 
 # Local Imports
-from .constants import DEVICE, COMPUTE_TYPE, MODEL_SIZE
+from .constants import DEVICE, COMPUTE_TYPE, MODEL_SIZE, WHISPER_SAMPLERATE
 from ..print_utilities import print_title, print_message
+from ..intermediate_audio import has_intermediate, load_audio_buffer
+
+# The Whisper model is loaded on first use, not at import, so importing the package (e.g., in
+# the stem separation batch workers) stays light; it is then kept to avoid reloading it
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+
+
+def _get_model():
+    """Return the shared Whisper model, loading it on first use."""
+    global _MODEL
+    with _MODEL_LOCK:
+        if _MODEL is None:
+            _MODEL = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
+        return _MODEL
 
-# Initialize Whisper model globally to avoid reloading it multiple times
-MODEL = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
 
 def extract_lyrics_with_timing(audio_path):
     """
@@ -18,8 +34,13 @@ def extract_lyrics_with_timing(audio_path):
     Returns:
         list[dict]: List of verses with text and metadata.
     """
+    # Use the lossless vocals buffer from the separation step when available
+    audio = audio_path
+    if has_intermediate(audio_path):
+        audio, _ = load_audio_buffer(audio_path, samplerate=WHISPER_SAMPLERATE, mono=True)
+
     # Transcribe the audio and extract word-level timestamps
-    segments, info = MODEL.transcribe(audio_path, word_timestamps=True)
+    segments, info = _get_model().transcribe(audio, word_timestamps=True)
 
     # Initialize an empty list to hold the processed verses
     verses = []
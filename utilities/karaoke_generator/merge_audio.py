@@ -1,5 +1,67 @@
+# Third-Party Imports
+import numpy as np
 from pydub import AudioSegment
 
+# Local Imports
+from ..intermediate_audio import load_intermediate
+from ..audio_encoder import FORMATS, encode_audio
+
+
+def _merge_intermediate_stems(stem_files):
+    """
+    Sum the lossless float32 buffers of the stems, if every stem has one.
+
+    Args:
+        stem_files (list): Paths to the stem audio files.
+
+    Returns:
+        tuple or None: (mixed samples of shape (channels, samples), samplerate),
+        or None if any buffer is unavailable.
+    """
+    buffers = [load_intermediate(file) for file in stem_files]
+    if any(buffer is None for buffer in buffers) or len({samplerate for _, samplerate in buffers}) != 1:
+        return None
+
+    length = min(wav.shape[-1] for wav, _ in buffers)
+    mixed = sum(np.asarray(wav[:, :length], dtype=np.float32) for wav, _ in buffers)
+    return mixed, buffers[0][1]
+
+
+def _audio_segment_to_array(segment):
+    """
+    Convert a pydub AudioSegment to float32 samples.
+
+    Args:
+        segment (AudioSegment): Decoded audio.
+
+    Returns:
+        tuple: (samples of shape (channels, samples), samplerate).
+    """
+    samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+    samples = samples.reshape(-1, segment.channels).T / float(2 ** (8 * segment.sample_width - 1))
+    return samples, segment.frame_rate
+
+
+def _array_to_audio_segment(wav, samplerate):
+    """
+    Convert float32 samples to a 16-bit pydub AudioSegment.
+
+    Args:
+        wav (np.ndarray): Samples of shape (channels, samples).
+        samplerate (int): Samplerate of the samples.
+
+    Returns:
+        AudioSegment: The audio as 16-bit PCM.
+    """
+    pcm = (np.clip(wav, -1.0, 1.0) * 32767).astype(np.int16)
+    return AudioSegment(
+        data=np.ascontiguousarray(pcm.T).tobytes(),
+        sample_width=2,
+        frame_rate=samplerate,
+        channels=pcm.shape[0],
+    )
+
+
 def merge_audio_stems(
     bass_file, 
     drums_file, 
@@ -10,12 +72,15 @@ def merge_audio_stems(
     """
     Merge the bass, drums, and other stems into a single audio file.
 
+    When the stems come from the separation step, their lossless float32 buffers
+    are mixed directly (see `intermediate_audio.py`) instead of decoding each file.
+
     Args:
         bass_file (str): Path to the bass stem audio file.
         drums_file (str): Path to the drums stem audio file.
         other_file (str): Path to the other stem audio file.
-        output_format (str): Desired output format (e.g., 'mp3', 'wav'). Default is 'mp3'.
-        output_path (str): Base name for the output file (without extension). Default is 'fused_audio'.
+        output_format (str): Desired output format (e.g., 'mp3', 'wav'), used whatever the extension of `output_file`.
+        output_file (str): Path to the merged audio file.
 
     Returns:
         str: Full path to the merged audio file.
@@ -25,22 +90,28 @@ def merge_audio_stems(
         raise ValueError("All stem files (bass, drums, other) must be provided.")
 
     try:
-        # Step 1: Load the audio stems
-        # Each stem (bass, drums, other) is loaded as an AudioSegment object
-        stems = [AudioSegment.from_file(file) for file in [bass_file, drums_file, other_file]]
-
-        # Step 2: Merge the stems by overlaying them sequentially
-        # Start with the first stem (bass) and overlay the rest (drums, other) one by one
-        merged_audio = stems[0]
-        for stem in stems[1:]:
-            merged_audio = merged_audio.overlay(stem)
-
-        # Step 3: Define the output file path
-        # Combine the output base name with the specified format (e.g., fused_audio.mp3)
-        # output_file = f"{output_path}.{output_format}"
-
-        # Step 4: Export the merged audio to the specified format
-        merged_audio.export(output_file, format=output_format)
+        # Step 1: Mix the lossless buffers of the stems when they are available
+        merged = _merge_intermediate_stems([bass_file, drums_file, other_file])
+
+        if merged is None:
+            # Step 2: Otherwise load the audio stems
+            # Each stem (bass, drums, other) is loaded as an AudioSegment object
+            stems = [AudioSegment.from_file(file) for file in [bass_file, drums_file, other_file]]
+
+            # Step 3: Merge the stems by overlaying them sequentially
+            # Start with the first stem (bass) and overlay the rest (drums, other) one by one
+            merged_audio = stems[0]
+            for stem in stems[1:]:
+                merged_audio = merged_audio.overlay(stem)
+            merged = _audio_segment_to_array(merged_audio)
+
+        # Step 4: Encode the merged audio in-process (MP3 through `lameenc`, WAV/FLAC through `soundfile`)
+        mixed, samplerate = merged
+        if f".{output_format.lower().lstrip('.')}" in FORMATS:
+            encode_audio(mixed, output_file, samplerate, clip="clamp", output_format=output_format)
+        else:
+            # Other formats are still exported through pydub/ffmpeg
+            _array_to_audio_segment(mixed, samplerate).export(output_file, format=output_format)
 
         # Return the full path to the merged audio file
         return output_file
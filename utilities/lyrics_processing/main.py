@@ -1,5 +1,6 @@
 # Standard Library Imports
 from pathlib import Path
+import threading
 
 # Third-Party Imports
 from faster_whisper import WhisperModel
@@ -9,8 +10,18 @@ from deep_translator import GoogleTranslator
 from .constants import DEVICE, COMPUTE_TYPE, MODEL_SIZE
 from ..print_utilities import print_title, print_message
 
-# Initialize Whisper model globally to avoid reloading it multiple times
-MODEL = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
+# Whisper model, loaded on the first transcription and then reused
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+
+
+def _get_model():
+    """Return the shared Whisper model, loading it on first use."""
+    global _MODEL
+    with _MODEL_LOCK:
+        if _MODEL is None:
+            _MODEL = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
+        return _MODEL
 
 
 def _extract_lyrics(audio_file):
@@ -36,7 +47,7 @@ def _extract_lyrics(audio_file):
     print_message(f"`{audio_file.name}`", text_color="bright_blue", indent_level=1, include_border=True)
 
     # Transcribe audio file
-    segments, info = MODEL.transcribe(audio_file, beam_size=1)
+    segments, info = _get_model().transcribe(audio_file, beam_size=1)
 
     # Print transcription details
     print_message("[TRANSCRIPTION DETAILS]", text_color="bright_cyan")
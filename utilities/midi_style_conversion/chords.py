@@ -0,0 +1,80 @@
+"""
+Chord segmentation of note arrays.
+
+Notes of each instrument are sorted by onset once, and consecutive notes whose onsets lie
+within `CHORD_ONSET_TOLERANCE` of each other are grouped into one chord (a single note is a
+chord of one), with no chord spanning more than the tolerance. After the O(n log n) sorts,
+grouping and the per-chord helpers below are linear, so chord-aware transforms stay cheap
+on dense piano files.
+"""
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+from .constants import CHORD_ONSET_TOLERANCE
+
+
+def _segment_chords(notes, tolerance=CHORD_ONSET_TOLERANCE):
+    """
+    Group the notes of each instrument into chords by onset.
+
+    Args:
+        notes (np.ndarray): Note array of the MIDI file.
+        tolerance (float): Maximum onset gap (in seconds) between consecutive chord notes.
+
+    Returns:
+        tuple: (order, chord_ids), where `order` sorts the notes by instrument, chord and
+        pitch, and `chord_ids[i]` is the chord of note `order[i]` (increasing from 0).
+    """
+    order = np.lexsort((notes["start"], notes["instrument"]))
+    starts = notes["start"][order]
+    instruments = notes["instrument"][order]
+
+    # Onset gaps larger than the tolerance (or a new instrument) split notes into runs
+    new_run = np.ones(len(order), dtype=bool)
+    new_run[1:] = (np.diff(starts) > tolerance) | (np.diff(instruments) != 0)
+    new_chord = new_run.copy()
+
+    # Runs of closely spaced onsets (e.g., fast passages) are cut every `tolerance` seconds,
+    # so no chord spans more than the tolerance
+    if tolerance > 0 and len(order):
+        run_starts = starts[new_run][np.cumsum(new_run) - 1]
+        buckets = (starts - run_starts) // tolerance
+        new_chord[1:] |= buckets[1:] != buckets[:-1]
+
+    # Order the notes of each chord from lowest to highest
+    chord_ids = np.cumsum(new_chord) - 1
+    by_pitch = np.lexsort((notes["pitch"][order], chord_ids))
+    return order[by_pitch], chord_ids
+
+
+def _chord_ranks(chord_ids):
+    """
+    Return the position of every sorted note within its chord (0 for the lowest note).
+
+    Args:
+        chord_ids (np.ndarray): Chord ids from `_segment_chords`.
+
+    Returns:
+        np.ndarray: Rank of each note within its chord.
+    """
+    return np.arange(len(chord_ids)) - np.searchsorted(chord_ids, chord_ids, side="left")
+
+
+def _chord_tops(chord_ids):
+    """
+    Return the sorted positions of the highest note of every chord.
+
+    Args:
+        chord_ids (np.ndarray): Chord ids from `_segment_chords`.
+
+    Returns:
+        np.ndarray: Index into the sorted notes of each chord's top note.
+    """
+    last = np.ones(len(chord_ids), dtype=bool)
+    last[:-1] = chord_ids[1:] != chord_ids[:-1]
+    return np.flatnonzero(last)
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
@@ -1,9 +1,37 @@
+# Standard Library Imports
+import os
+
 # Third-Party Imports
 import pretty_midi
 
 # Default Output Directory
 DEFAULT_OUTPUT_DIR = "./audio_processing/output_midi_mods/"
 
+# Samplerate of the audio previews rendered for modified MIDI files
+PREVIEW_SAMPLERATE = 22050
+
+# LLM backend used to turn prompts into parameters: "gemini", or "local" for the offline stand-in
+LLM_BACKEND = os.getenv("MIDI_STYLE_LLM_BACKEND", "gemini")
+LOCAL_LLM_MODEL = "local-stand-in"
+
+# Gemini client limits: per-attempt timeout, overall deadline per prompt, retries after a failed
+# attempt (with exponential backoff), and the maximum number of concurrent requests per process
+LLM_TIMEOUT_SECONDS = 20.0
+LLM_DEADLINE_SECONDS = 45.0
+LLM_MAX_RETRIES = 2
+LLM_RETRY_BACKOFF_SECONDS = 0.5
+LLM_MAX_CONCURRENCY = 4
+
+# Cache of loaded MIDI files and per-step transform results, for repeated edits of the same file
+PIPELINE_CACHE_ENABLED = True
+PIPELINE_CACHE_MAX_SESSIONS = 8
+
+# Persistent cache of parsed LLM responses, keyed by prompt, model and prompt template
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_PATH = f"{DEFAULT_OUTPUT_DIR}.response_cache.json"
+RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+
 def generate_note_list():
     """
     Generate a list of all possible MIDI note names (e.g., C0, C#0, D0, ..., G9).
@@ -51,6 +79,43 @@ PROGRAM_TO_INSTRUMENT = {v: k for k, v in INSTRUMENT_TO_PROGRAM.items()}
 # Constants: A list of valid note syntaxes that are available for use
 VALID_NOTES = generate_note_list() 
 
+# Constants: Scale types available for `scale`, as semitone intervals from the root
+SCALE_INTERVALS = {
+    "major": [0, 2, 4, 5, 7, 9, 11],
+    "minor": [0, 2, 3, 5, 7, 8, 10],
+    "harmonic_minor": [0, 2, 3, 5, 7, 8, 11],
+    "melodic_minor": [0, 2, 3, 5, 7, 9, 11],
+    "ionian": [0, 2, 4, 5, 7, 9, 11],
+    "dorian": [0, 2, 3, 5, 7, 9, 10],
+    "phrygian": [0, 1, 3, 5, 7, 8, 10],
+    "lydian": [0, 2, 4, 6, 7, 9, 11],
+    "mixolydian": [0, 2, 4, 5, 7, 9, 10],
+    "aeolian": [0, 2, 3, 5, 7, 8, 10],
+    "locrian": [0, 1, 3, 5, 6, 8, 10],
+    "major_pentatonic": [0, 2, 4, 7, 9],
+    "minor_pentatonic": [0, 3, 5, 7, 10],
+    "blues": [0, 3, 5, 6, 7, 10],
+}
+
+# Constants: Scale value that snaps notes to the key(s) detected in the file itself
+AUTO_SCALE = "auto"
+
+# Constants: Krumhansl-Kessler key profiles (major and minor), starting from the tonic
+KEY_PROFILES = {
+    "major": [6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88],
+    "minor": [6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17],
+}
+
+# Constants: Window length and hop (in seconds) of the key timeline
+KEY_WINDOW_SECONDS = 8.0
+KEY_HOP_SECONDS = 2.0
+
+# Constants: Grid spacing (in source seconds) of the time map for tempo curves
+TEMPO_CURVE_RESOLUTION_SECONDS = 0.1
+
+# Constants: Maximum onset gap (in seconds) between notes of the same chord
+CHORD_ONSET_TOLERANCE = 0.03
+
 # Constants: Details of acceptable parameters for our functions in `utilities.py` that Google's AI model will use
 ACCEPTABLE_PARAMETERS = {
     "instruments": {
@@ -58,7 +123,7 @@ ACCEPTABLE_PARAMETERS = {
     "description": "Mapping of channel indices to MIDI program numbers.",
     "constraints": (
         "Keys must be integer channel indices; values must be integers corresponding to valid MIDI program numbers "
-        f"(0-127). The mapping is: {INSTRUMENT_TO_PROGRAM}."
+        "(0-127), as listed in the instrument table."
     ),
     "complex": True
     },
@@ -69,15 +134,19 @@ ACCEPTABLE_PARAMETERS = {
             "Format: '(Note)(Accidental)(Octave)_(Type)', e.g., 'C#4_major' or 'D-1_minor'. "
             "Note: Acceptable notes are A, B, C, D, E, F, G. "
             "Accidentals: '#' for sharp, 'b' for flat. "
-            "Octave: A number between -1 and 9."
+            "Octave: A number between -1 and 9. "
+            f"Use '{AUTO_SCALE}' to snap out-of-key notes to the key(s) detected in the file."
         ),
-        "constraints": "Must follow the exact format 'RootOctave_Type'. Types: major or minor.",
+        "constraints": f"Must follow the exact format 'RootOctave_Type'. Types: {', '.join(SCALE_INTERVALS)}.",
         "complex": True
     },
     "tempo": {
-        "type": "float",
-        "description": "Target tempo in beats per minute.",
-        "constraints": "Must be a positive number.",
+        "type": "float or list[list[float]]",
+        "description": (
+            "Target tempo in beats per minute, or a tempo curve as a list of [time_seconds, bpm] points "
+            "for gradual changes (e.g., [[0, 100], [30, 140]] for an accelerando)."
+        ),
+        "constraints": "Tempi must be positive numbers; curve times must be non-negative and increasing.",
         "complex": True
     },
     "transpose": {
@@ -106,13 +175,13 @@ ACCEPTABLE_PARAMETERS = {
     },
     "arpeggiate": {
         "type": "bool",
-        "description": "Apply arpeggiation to chords.",
+        "description": "Apply arpeggiation to chords (chord notes are staggered from lowest to highest).",
         "constraints": "Set to True to enable.",
         "complex": False
     },
     "harmony": {
         "type": "bool",
-        "description": "Add harmonic notes.",
+        "description": "Add a harmony note a diatonic third above the top note of each chord, in the detected key.",
         "constraints": "Set to True to enable.",
         "complex": False
     },
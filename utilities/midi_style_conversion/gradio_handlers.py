@@ -1,9 +1,11 @@
 from ..print_utilities import print_title, print_message
+from ..midi_sonifier import sonify_midi
 from pathlib import Path
 from .main import _midi_style_conversion
 from .prompt_config import _execute_query
+from .intent_parser import _parse_intent
 
-from .constants import DEFAULT_OUTPUT_DIR
+from .constants import DEFAULT_OUTPUT_DIR, PREVIEW_SAMPLERATE
 
 
 # ════════════════════════════════════════════════════════════
@@ -15,7 +17,8 @@ def process_midi_style_conversion(
     input_midi_file,
     song_dir_name=False,
     song_prefix_name=False,
-    text_prompt=None
+    text_prompt=None,
+    generate_preview=True
 ):
     """
     Modify a MIDI file based on a text query.
@@ -25,9 +28,10 @@ def process_midi_style_conversion(
         song_dir_name (str): Name of the directory for saving modified MIDI files.
         song_prefix_name (str): Prefix name for the output file.
         text_prompt (str, optional): Text prompt to describe modifications.
+        generate_preview (bool): Render an audio preview of the modified MIDI file.
 
     Returns:
-        str: Path to the modified MIDI file.
+        tuple: (Path to the modified MIDI file, path to the audio preview or None).
     """
     print_title("Modifing MIDI File", text_color="bright_white")
 
@@ -35,13 +39,13 @@ def process_midi_style_conversion(
     if not song_dir_name:
         print_message("[ERROR]", text_color="bright_red")
         print_message("Song directory name is required.", text_color="bright_red", indent_level=1, include_border=True)
-        return
+        return None, None
     
     # If no song prefix name is provided, return an error message
     if not song_prefix_name:
         print_message("[ERROR]", text_color="bright_red")
         print_message("Song prefix name is required.", text_color="bright_red", indent_level=1, include_border=True)
-        return
+        return None, None
     
     # Define the output MIDI file path
     output_midi_path = f"{DEFAULT_OUTPUT_DIR}/{song_dir_name}/{song_prefix_name}_{Path(input_midi_file).stem}.mid"
@@ -53,7 +57,7 @@ def process_midi_style_conversion(
     if not input_path.exists() or input_path.suffix.lower() != ".mid":
         print_message("[ERROR]", text_color="bright_red")
         print_message("Invalid MIDI file.", text_color="bright_red", indent_level=1, include_border=True)
-        return
+        return None, None
 
     # Validate output path and create the directory if it does not exist
     output_dir = Path(output_midi_path).parent
@@ -70,14 +74,21 @@ def process_midi_style_conversion(
         print_message(f"`{text_prompt}`", text_color="bright_cyan", indent_level=2, include_border=True)
 
     try:
-        # Execute query using the text prompt
-        query_params = _execute_query(text_prompt)
+        # Resolve simple prompts locally; anything else is sent to the LLM
+        query_params = _parse_intent(text_prompt)
+        if query_params is not None:
+            print_message("[LOCAL PARSER]", text_color="bright_blue")
+            print_message("Resolved the prompt without the LLM:", text_color="bright_blue", indent_level=1)
+            print_message(f"`{query_params}`", text_color="bright_blue", indent_level=2, include_border=True)
+        else:
+            # Execute query using the text prompt
+            query_params = _execute_query(text_prompt)
 
     except Exception as e:
         # Print error message if query execution fails
         print_message("[ERROR]", text_color="bright_red")
         print_message("Failed to process query.", text_color="bright_red", indent_level=1, include_border=True)
-        return
+        return None, None
 
     # Modify MIDI file using provided parameters
     try:
@@ -85,7 +96,7 @@ def process_midi_style_conversion(
         query_params['instruments'] = {int(k): v for k, v in query_params['instruments'].items()}
 
         # Modify the MIDI file based on the query parameters received by Google's AI model
-        _midi_style_conversion(input_midi_file, output_midi_path, **query_params)
+        midi_data = _midi_style_conversion(input_midi_file, output_midi_path, **query_params)
 
         # Print success message if MIDI modification is successful
         print_message("[SUCCESS]", text_color="bright_green")
@@ -97,5 +108,15 @@ def process_midi_style_conversion(
         print_message("[ERROR]", text_color="bright_red")
         print_message("MIDI modification failed:", text_color="bright_red", indent_level=1)
         print_message(f"`{e}`", text_color="bright_red", indent_level=2, include_border=True)
+        return output_midi_path, None
 
-    return output_midi_path
\ No newline at end of file
+    # Render an audio preview of the modified MIDI file
+    preview_path = None
+    if generate_preview:
+        preview_path = sonify_midi(midi_data, str(Path(output_midi_path).with_suffix(".wav")), PREVIEW_SAMPLERATE)
+
+        print_message("[PREVIEW]", text_color="bright_green")
+        print_message("Audio preview saved to:", text_color="bright_green", indent_level=1)
+        print_message(f"`{preview_path}`", text_color="bright_green", indent_level=2, include_border=True)
+
+    return output_midi_path, preview_path
\ No newline at end of file
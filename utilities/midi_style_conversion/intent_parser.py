@@ -0,0 +1,275 @@
+"""
+Deterministic local parser for simple MIDI modification prompts.
+
+Many prompts are short commands such as "transpose up 3 semitones", "tempo 140", "make it
+swing" or "switch instrument 0 to violin". These are resolved here with regular expressions
+into the same parameter dict the LLM returns, without a network call.
+
+A prompt is split into clauses (on commas, "and", "then", ...), and every clause must match
+one of the known patterns exactly, with values valid for `ACCEPTABLE_PARAMETERS`. If any
+clause is not understood, or two clauses disagree, the prompt is not resolved and should
+fall through to the LLM.
+"""
+# Standard Library Imports
+import re
+
+# Third-Party Imports
+import pretty_midi
+
+# Local Imports
+from .constants import INSTRUMENT_TO_PROGRAM, VALID_NOTES, ACCEPTABLE_PARAMETERS, SCALE_INTERVALS, AUTO_SCALE
+from .local_llm import _neutral_parameters
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+NUMBER = r"([+-]?\d+(?:\.\d+)?|" + "|".join(NUMBER_WORDS) + ")"
+
+# Semitones per unit of transposition
+INTERVAL_UNITS = {"semitone": 1, "halfstep": 1, "wholestep": 2, "tone": 2, "octave": 12}
+UNIT = r"(semitones?|half[- ]?steps?|whole steps?|tones?|octaves?)"
+
+# Scale type names as they may be written in a prompt (e.g., "harmonic minor")
+SCALE_NAME = "(" + "|".join(name.replace("_", "[ _-]") for name in sorted(SCALE_INTERVALS, key=len, reverse=True)) + ")"
+
+# Common instrument names that stand for one General MIDI instrument
+INSTRUMENT_ALIASES = {
+    "piano": "Acoustic Grand Piano",
+    "grand piano": "Acoustic Grand Piano",
+    "acoustic piano": "Acoustic Grand Piano",
+    "electric piano": "Electric Piano 1",
+    "organ": "Drawbar Organ",
+    "nylon guitar": "Acoustic Guitar (nylon)",
+    "classical guitar": "Acoustic Guitar (nylon)",
+    "steel guitar": "Acoustic Guitar (steel)",
+    "acoustic guitar": "Acoustic Guitar (steel)",
+    "electric guitar": "Electric Guitar (clean)",
+    "bass": "Electric Bass (finger)",
+    "electric bass": "Electric Bass (finger)",
+    "upright bass": "Acoustic Bass",
+    "double bass": "Acoustic Bass",
+    "strings": "String Ensemble 1",
+    "choir": "Choir Aahs",
+    "sax": "Alto Sax",
+    "saxophone": "Alto Sax",
+}
+
+# Drum kits are not a program of a melodic track (they need a drum channel), so they are left to the LLM
+DRUM_NAMES = {"drum", "drums", "drum kit", "drumkit", "drum set", "drumset", "percussion"}
+
+# A '+' only separates clauses between spaces, so signed amounts such as "transpose +3" stay intact
+CLAUSE_SEPARATORS = r"\s*(?:,|;|&|\s\+\s|\band then\b|\bthen\b|\band\b|\balso\b|\bplus\b)\s*"
+FILLER_PREFIXES = r"^(?:please|can you|could you|would you|i want to|i'd like to|i would like to|let's|lets|now|just)\s+"
+
+
+def _number(text):
+    """Convert a numeric string or number word to a float."""
+    return float(NUMBER_WORDS.get(text, text))
+
+
+def _unit_semitones(unit):
+    """Return the semitones of an interval unit such as 'semitones' or 'octave'."""
+    return INTERVAL_UNITS.get(re.sub(r"[ -]", "", unit).rstrip("s"))
+
+
+def _transpose(amount, unit, direction):
+    """Build the transpose value (semitones) from a parsed amount, unit and direction."""
+    semitones = _unit_semitones(unit) if unit else 1
+    if semitones is None:
+        return None
+    value = _number(amount) * semitones
+
+    # The direction word decides the sign; an explicit "up" with a negative amount is ambiguous
+    if direction in ("up", "higher"):
+        if value < 0:
+            return None
+        value = abs(value)
+    elif direction in ("down", "lower"):
+        value = -abs(value)
+    if not value.is_integer() or not (-48 <= value <= 48):
+        return None
+    return {"transpose": int(value)}
+
+
+def _scale(root, accidental, octave, scale_type):
+    """Build the scale value from a parsed root, accidental, octave and scale type."""
+    accidental = {"sharp": "#", "flat": "b", "#": "#", "b": "b"}.get(accidental or "", "")
+    try:
+        pitch = pretty_midi.note_name_to_number(f"{root.upper()}{accidental}{octave if octave is not None else 4}")
+    except ValueError:
+        return None
+    if not (0 <= pitch < len(VALID_NOTES)):
+        return None
+
+    # Roots are spelled as in `VALID_NOTES` (sharps), e.g., 'Bb3' becomes 'A#3'
+    return {"scale": f"{VALID_NOTES[pitch]}_{re.sub(r'[ -]', '_', scale_type)}"}
+
+
+def _resolve_instrument(name):
+    """
+    Resolve an instrument name to a MIDI program number.
+
+    Only exact General MIDI names (case-insensitive), `program <n>` and the explicit
+    `INSTRUMENT_ALIASES` are resolved; partial names such as 'drums' (which would only
+    match 'Steel Drums') are left to the LLM.
+
+    Returns:
+        int or None: The program number, or None if the name is unknown or ambiguous.
+    """
+    name = re.sub(r"\s+(?:sound|instrument|patch)$", "", name.strip()).casefold()
+    program = re.fullmatch(r"program (\d+)", name)
+    if program:
+        value = int(program.group(1))
+        return value if value in INSTRUMENT_TO_PROGRAM.values() else None
+
+    name = re.sub(r"[\s-]+", " ", name)
+    if name in DRUM_NAMES:
+        return None
+
+    for instrument, value in INSTRUMENT_TO_PROGRAM.items():
+        if re.sub(r"[\s-]+", " ", instrument.casefold()) == name:
+            return value
+
+    alias = INSTRUMENT_ALIASES.get(name)
+    return INSTRUMENT_TO_PROGRAM[alias] if alias is not None else None
+
+
+def _instrument(index, name):
+    """Build the instruments value for one channel index and instrument name."""
+    program = _resolve_instrument(name)
+    if program is None:
+        return None
+    return {"instruments": {int(index): program}}
+
+
+def _positive(key, value):
+    """Build a value that must be a positive number."""
+    value = _number(value)
+    return {key: value} if value > 0 else None
+
+
+def _volume(value, time):
+    """Build the volume effect value."""
+    value = _number(value)
+    if not value.is_integer() or not (0 <= value <= 127):
+        return None
+    return {"volume_effect": {"value": int(value), "time": _number(time) if time else 0.0}}
+
+
+# (pattern, builder) pairs; each builder receives the pattern's groups and returns the
+# parameters it sets, or None if the values are invalid
+INTENT_PATTERNS = [
+    # Transposition
+    (rf"(?:transpose|shift|move|pitch)(?: it| everything| all notes| the notes| the pitch)?(?: (up|down))?(?: by)? {NUMBER} {UNIT}(?: (up|down|higher|lower))?",
+     lambda direction, amount, unit, after: _transpose(amount, unit, after or direction)),
+    (rf"(raise|lower)(?: it| the pitch| everything| the notes)?(?: by)? {NUMBER} {UNIT}",
+     lambda verb, amount, unit: _transpose(amount, unit, "down" if verb == "lower" else "up")),
+    (rf"(?:transpose|shift)(?: it)?(?: (up|down))?(?: by)? ([+-]?\d+)",
+     lambda direction, amount: _transpose(amount, None, direction)),
+    (r"(?:(?:move|shift|transpose)(?: it)? )?(?:one |an )?octave (up|down|higher|lower)",
+     lambda direction: _transpose("1", "octave", direction)),
+
+    # Tempo
+    (rf"(?:set |change |make )?(?:the )?tempo(?: to| at| =|:)? {NUMBER}(?: ?bpm)?",
+     lambda tempo: _positive("tempo", tempo)),
+    (rf"(?:set it to |play(?: it)? at |at )?{NUMBER} ?bpm",
+     lambda tempo: _positive("tempo", tempo)),
+
+    # Scale
+    (rf"(?:(?:change|switch|convert|put|move|set)(?: it)?(?: the scale| the key)? )?(?:(?:to|into|in) )?(?:the )?(?:key of )?([a-g])(?: ?(#|b|sharp|flat))?(-?\d)? {SCALE_NAME}(?: scale| key| mode)?",
+     lambda root, accidental, octave, scale_type: _scale(root, accidental, octave, scale_type)),
+    (r"(?:snap|fit|quantize)(?: it| the notes| notes)? to (?:the )?(?:detected |current |original |its own )?(?:key|scale)s?",
+     lambda: {"scale": AUTO_SCALE}),
+    (r"(?:fix|correct|remove)(?: the)? (?:wrong|out[- ]of[- ]key|off[- ]key) notes",
+     lambda: {"scale": AUTO_SCALE}),
+
+    # Instruments
+    (r"(?:switch|change|set|make|turn) (?:instrument|track|channel) (\d+)(?: to| into| as)?(?: an?)? (.+)",
+     lambda index, name: _instrument(index, name)),
+    (r"(?:use|play) (?:an? )?(.+?) (?:for|on) (?:instrument|track|channel) (\d+)",
+     lambda name, index: _instrument(index, name)),
+
+    # Flags
+    (r"(?:make it |add (?:some |a )?|with )?swing(?:y|ing)?(?: feel| rhythm| it| the notes)?", lambda: {"swing": True}),
+    (r"humani[sz]e(?: it| the notes| the performance)?", lambda: {"humanize": True}),
+    (r"make it (?:sound |feel )?(?:more )?human(?:[- ]like)?", lambda: {"humanize": True}),
+    (r"arpeggiate(?: it| the chords| chords)?", lambda: {"arpeggiate": True}),
+    (r"(?:add |use |make )?(?:some )?arpeggios?", lambda: {"arpeggiate": True}),
+    (r"(?:add (?:a |some )?)?harmon(?:y|ies)", lambda: {"harmony": True}),
+    (r"harmoni[sz]e(?: it| the melody)?", lambda: {"harmony": True}),
+
+    # Velocity and durations
+    (r"(?:make it |play(?: it)? )?(louder|softer|quieter)", lambda word: {"velocity_factor": 1.2 if word == "louder" else 0.8}),
+    (rf"(?:scale |multiply )?(?:the )?velocit(?:y|ies)(?: by| x| to| factor)? {NUMBER}", lambda value: _positive("velocity_factor", value)),
+    (r"(?:make (?:the )?notes |make it )?(longer|shorter)(?: notes)?", lambda word: {"duration_factor": 1.5 if word == "longer" else 0.5}),
+    (r"(?:make it |play(?: it)? )?(legato|staccato)", lambda word: {"duration_factor": 1.5 if word == "legato" else 0.5}),
+    (rf"(?:scale |multiply )?(?:the )?(?:note )?durations?(?: by| x| factor)? {NUMBER}", lambda value: _positive("duration_factor", value)),
+
+    # Volume
+    (rf"(?:set |change )?(?:the )?volume(?: to)? {NUMBER}(?: at {NUMBER} ?(?:s|sec|secs|seconds?))?", lambda value, time: _volume(value, time)),
+]
+INTENT_PATTERNS = [(re.compile(pattern), builder) for pattern, builder in INTENT_PATTERNS]
+
+
+def _clean_clause(clause):
+    """Lower-case a clause and strip punctuation, filler words and polite suffixes."""
+    clause = re.sub(r"\s+", " ", clause.casefold()).strip(" .!?")
+    previous = None
+    while previous != clause:
+        previous = clause
+        clause = re.sub(FILLER_PREFIXES, "", clause)
+    return re.sub(r"\s+(?:please|thanks|thank you)$", "", clause).strip()
+
+
+def _parse_clause(clause):
+    """Return the parameters set by one clause, or None if it matches no known pattern."""
+    for pattern, builder in INTENT_PATTERNS:
+        match = pattern.fullmatch(clause)
+        if match:
+            return builder(*match.groups())
+    return None
+
+
+def _parse_intent(text_query):
+    """
+    Resolve a simple prompt into MIDI modification parameters without the LLM.
+
+    Args:
+        text_query (str): The user's prompt.
+
+    Returns:
+        dict or None: Parameters in the same format as `_execute_query` (every key of
+        `ACCEPTABLE_PARAMETERS` present), or None if the prompt is not understood confidently.
+    """
+    if not text_query or not text_query.strip():
+        return None
+
+    parameters = _neutral_parameters()
+    resolved = set()
+    for clause in re.split(CLAUSE_SEPARATORS, text_query.casefold()):
+        clause = _clean_clause(clause)
+        if not clause:
+            continue
+
+        updates = _parse_clause(clause)
+        if updates is None:
+            return None
+
+        for key, value in updates.items():
+            if key == "instruments":
+                # Instrument clauses add up, unless they assign one channel twice
+                if any(parameters[key].get(idx, program) != program for idx, program in value.items()):
+                    return None
+                parameters[key].update(value)
+            elif key in resolved and parameters[key] != value:
+                return None
+            else:
+                parameters[key] = value
+            resolved.add(key)
+
+    return parameters if resolved and resolved <= set(ACCEPTABLE_PARAMETERS) else None
+
+
+if __name__ == "__main__":
+    print("This script contains the local parser for simple MIDI modification prompts.")
@@ -0,0 +1,214 @@
+"""
+Key analysis of note arrays.
+
+Notes are summarized as pitch-class histograms weighted by duration and velocity, and
+correlated against the Krumhansl-Kessler profiles of all 24 major and minor keys in one
+matrix product. Running the same analysis over sliding windows gives a key timeline, so
+modulations can be followed instead of forcing one key onto the whole file.
+
+Windowed histograms come from cumulative sums over the notes sorted by start and end
+time, evaluated at the window edges, so the cost is O(n log n) in the number of notes
+regardless of how many windows are analysed.
+"""
+# Third-Party Imports
+import numpy as np
+import pretty_midi
+
+# Local Imports
+from .constants import KEY_PROFILES, KEY_WINDOW_SECONDS, KEY_HOP_SECONDS
+
+KEY_MODES = ("major", "minor")
+
+
+def _standardize(rows):
+    """Center rows on their mean and scale them to unit norm (all-zero rows stay zero)."""
+    centered = rows - rows.mean(axis=-1, keepdims=True)
+    norm = np.linalg.norm(centered, axis=-1, keepdims=True)
+    return np.divide(centered, norm, out=np.zeros_like(centered), where=norm > 0)
+
+
+# Standardized profiles of the 24 keys; row `mode * 12 + root`
+KEY_PROFILE_MATRIX = _standardize(np.array([
+    np.roll(KEY_PROFILES[mode], root) for mode in KEY_MODES for root in range(12)
+], dtype=np.float64))
+
+
+def _key_name(key_idx):
+    """Return the scale name of a key index, e.g., 'A-1_minor'."""
+    return f"{pretty_midi.note_number_to_name(int(key_idx) % 12)}_{KEY_MODES[int(key_idx) // 12]}"
+
+
+def _note_weights(notes):
+    """Return the velocity weight (0-1) of every note."""
+    return notes["velocity"] / 127.0
+
+
+def _pitch_class_histogram(notes):
+    """
+    Build the duration- and velocity-weighted pitch-class histogram of a note array.
+
+    Args:
+        notes (np.ndarray): Note array of the MIDI file.
+
+    Returns:
+        np.ndarray: Weight of each of the 12 pitch classes.
+    """
+    durations = np.maximum(notes["end"] - notes["start"], 0.0)
+    return np.bincount(notes["pitch"] % 12, weights=durations * _note_weights(notes), minlength=12)
+
+
+def _clipped_sums(times, weights, grid):
+    """
+    Evaluate `sum(weights * minimum(times, t))` for every `t` in a sorted grid.
+
+    Args:
+        times (np.ndarray): Event times.
+        weights (np.ndarray): Weight of each event.
+        grid (np.ndarray): Sorted evaluation times.
+
+    Returns:
+        np.ndarray: One sum per grid time.
+    """
+    order = np.argsort(times, kind="stable")
+    times, weights = times[order], weights[order]
+    weight_sums = np.concatenate([[0.0], np.cumsum(weights)])
+    time_sums = np.concatenate([[0.0], np.cumsum(weights * times)])
+
+    # Events before `t` contribute their own time, later ones contribute `t`
+    before = np.searchsorted(times, grid, side="right")
+    return time_sums[before] + grid * (weight_sums[-1] - weight_sums[before])
+
+
+def _windowed_histograms(notes, window_starts, window_seconds):
+    """
+    Build the weighted pitch-class histogram of every window.
+
+    Each note contributes its velocity weight times the time it sounds inside a window.
+
+    Args:
+        notes (np.ndarray): Note array of the MIDI file.
+        window_starts (np.ndarray): Sorted window start times.
+        window_seconds (float): Window length.
+
+    Returns:
+        np.ndarray: Array of shape (windows, 12).
+    """
+    edges = np.concatenate([window_starts, window_starts + window_seconds])
+    order = np.argsort(edges, kind="stable")
+    histograms = np.zeros((len(window_starts), 12))
+
+    weights = _note_weights(notes)
+    pitch_classes = notes["pitch"] % 12
+    for pitch_class in range(12):
+        mask = pitch_classes == pitch_class
+        if not mask.any():
+            continue
+
+        # Sounding time up to each edge: sum(w * (min(t, end) - min(t, start)))
+        sounding = np.empty(len(edges))
+        sounding[order] = (_clipped_sums(notes["end"][mask], weights[mask], edges[order])
+                           - _clipped_sums(notes["start"][mask], weights[mask], edges[order]))
+        histograms[:, pitch_class] = sounding[len(window_starts):] - sounding[:len(window_starts)]
+
+    return histograms
+
+
+def _correlate_keys(histograms):
+    """
+    Correlate pitch-class histograms with the profiles of all 24 keys.
+
+    Args:
+        histograms (np.ndarray): Array of shape (12,) or (windows, 12).
+
+    Returns:
+        np.ndarray: Correlations of shape (24,) or (windows, 24), indexed as `mode * 12 + root`.
+    """
+    return _standardize(np.asarray(histograms, dtype=np.float64)) @ KEY_PROFILE_MATRIX.T
+
+
+def _detect_key(notes):
+    """
+    Detect the key of a whole note array.
+
+    Args:
+        notes (np.ndarray): Note array of the MIDI file.
+
+    Returns:
+        tuple: (key index, correlation), or (None, 0.0) if there are no notes.
+    """
+    histogram = _pitch_class_histogram(notes)
+    if not histogram.any():
+        return None, 0.0
+
+    correlations = _correlate_keys(histogram)
+    key_idx = int(np.argmax(correlations))
+    return key_idx, float(correlations[key_idx])
+
+
+def _key_timeline(notes, window_seconds=KEY_WINDOW_SECONDS, hop_seconds=KEY_HOP_SECONDS):
+    """
+    Detect the key over time with sliding windows.
+
+    The file is split into segments of `hop_seconds`, and each segment takes the key of the
+    `window_seconds` window centered on it. Segments without any sounding notes take the key
+    of the whole file.
+
+    Args:
+        notes (np.ndarray): Note array of the MIDI file.
+        window_seconds (float): Length of the analysis windows.
+        hop_seconds (float): Length of the timeline segments.
+
+    Returns:
+        np.ndarray: Key index of every segment (`floor(time / hop_seconds)`), or an empty array
+        if there are no notes.
+    """
+    global_key, _ = _detect_key(notes)
+    if global_key is None:
+        return np.zeros(0, dtype=np.int64)
+
+    n_segments = max(int(np.ceil(notes["end"].max() / hop_seconds)), 1)
+    window_starts = (np.arange(n_segments) + 0.5) * hop_seconds - window_seconds / 2
+    histograms = _windowed_histograms(notes, window_starts, window_seconds)
+
+    keys = np.argmax(_correlate_keys(histograms), axis=1)
+    keys[~histograms.any(axis=1)] = global_key
+    return keys
+
+
+def _key_segments(keys, hop_seconds=KEY_HOP_SECONDS):
+    """
+    Merge a key timeline into (start time, end time, key name) segments.
+
+    Args:
+        keys (np.ndarray): Timeline from `_key_timeline`.
+        hop_seconds (float): Segment length used for the timeline.
+
+    Returns:
+        list[tuple]: Consecutive segments with the same key.
+    """
+    if len(keys) == 0:
+        return []
+    changes = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate([[0], changes])
+    ends = np.concatenate([changes, [len(keys)]])
+    return [(float(start * hop_seconds), float(end * hop_seconds), _key_name(keys[start])) for start, end in zip(starts, ends)]
+
+
+def _note_keys(notes, keys, hop_seconds=KEY_HOP_SECONDS):
+    """
+    Look up the key at the start of every note.
+
+    Args:
+        notes (np.ndarray): Note array of the MIDI file.
+        keys (np.ndarray): Timeline from `_key_timeline`.
+        hop_seconds (float): Segment length used for the timeline.
+
+    Returns:
+        np.ndarray: Key index of every note.
+    """
+    segments = np.clip((notes["start"] // hop_seconds).astype(np.int64), 0, len(keys) - 1)
+    return keys[segments]
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
@@ -0,0 +1,179 @@
+"""
+Shared client for the model that turns prompts into MIDI parameters.
+
+The chat model is created on first use rather than at import, so importing the app (or using
+the offline backend) never touches the network, and a single instance, with its open
+connections, is reused for every request. Attempts run on a pool of `LLM_MAX_CONCURRENCY`
+workers, so at most that many calls are ever in flight. Each attempt is bounded by
+`LLM_TIMEOUT_SECONDS` and the whole request (queueing, attempts and backoff) by
+`LLM_DEADLINE_SECONDS`, and failed attempts are retried with exponential backoff at most
+`LLM_MAX_RETRIES` times.
+
+A running call cannot be cancelled from outside, so the attempt's timeout is also passed to
+the call itself: an attempt that is given up on ends by the deadline and frees its worker.
+"""
+# Standard Library Imports
+from concurrent.futures import ThreadPoolExecutor
+import os
+import random
+import threading
+import time
+
+# Third-Party Imports
+from dotenv import load_dotenv
+
+# Local Imports
+from .constants import (
+    LLM_BACKEND, LOCAL_LLM_MODEL, LLM_TIMEOUT_SECONDS, LLM_DEADLINE_SECONDS, LLM_MAX_RETRIES,
+    LLM_RETRY_BACKOFF_SECONDS, LLM_MAX_CONCURRENCY
+)
+from .local_llm import _LocalLLM
+from ..print_utilities import print_message
+
+
+# Load environment variables
+load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-1.5-flash"
+
+# Name of the model answering prompts (part of the response cache key)
+LLM_MODEL_NAME = LOCAL_LLM_MODEL if LLM_BACKEND == "local" else GEMINI_MODEL
+
+# Rough characters per token, used when the model reports no token usage
+CHARS_PER_TOKEN = 4
+
+_LLM = None
+_LLM_LOCK = threading.Lock()
+
+# Workers running the model calls, bounding the calls in flight across all requests
+_EXECUTOR = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+
+def _get_llm():
+    """
+    Return the shared chat model, creating it on first use.
+
+    Returns:
+        ChatGoogleGenerativeAI or _LocalLLM: The model for `LLM_BACKEND`.
+    """
+    global _LLM
+    if _LLM is None:
+        with _LLM_LOCK:
+            if _LLM is None:
+                if LLM_BACKEND == "local":
+                    _LLM = _LocalLLM()
+                else:
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+
+                    # Retries are handled here, within the deadline; the per-call timeout is
+                    # passed on each invoke (see `_call_llm`)
+                    _LLM = ChatGoogleGenerativeAI(
+                        google_api_key=GEMINI_API_KEY,
+                        model=GEMINI_MODEL,
+                        temperature=0,
+                        timeout=LLM_TIMEOUT_SECONDS,
+                        max_retries=0
+                    )
+    return _LLM
+
+
+def _call_llm(llm, prompt, deadline):
+    """
+    Make one model call on a pool worker, timed out by the client at the attempt's limit.
+
+    The timeout is taken when the worker starts the call, so time spent queueing for a worker
+    counts against the deadline and the call never outlives it.
+
+    Args:
+        llm (ChatGoogleGenerativeAI or _LocalLLM): The chat model.
+        prompt (str): Full prompt text.
+        deadline (float): `time.monotonic()` value by which the request must finish.
+
+    Returns:
+        AIMessage: The model's response.
+    """
+    timeout = min(LLM_TIMEOUT_SECONDS, deadline - time.monotonic())
+    if timeout <= 0:
+        raise TimeoutError("LLM request reached its deadline before a worker was free.")
+    return llm.invoke(prompt, timeout=timeout)
+
+
+def _retry_delay(attempt):
+    """Return the backoff (in seconds) before retrying a failed attempt, with jitter."""
+    return LLM_RETRY_BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.0)
+
+
+def _print_retry(attempt, error):
+    """Print a warning for a failed attempt that is about to be retried."""
+    print_message("[RETRY]", text_color="bright_yellow")
+    print_message(f"LLM request failed (attempt {attempt + 1}):", text_color="bright_yellow", indent_level=1)
+    print_message(f"`{error}`", text_color="bright_yellow", indent_level=2, include_border=True)
+
+
+def _invoke_llm(prompt, deadline_seconds=LLM_DEADLINE_SECONDS, max_retries=LLM_MAX_RETRIES):
+    """
+    Send a prompt to the model, returning within the deadline.
+
+    Each attempt is given the smaller of `LLM_TIMEOUT_SECONDS` and the time left before the
+    deadline (including time spent waiting for a free worker), and no retry is started
+    that could not finish its backoff before the deadline.
+
+    Args:
+        prompt (str): Full prompt text.
+        deadline_seconds (float): Time allowed for all attempts and backoff.
+        max_retries (int): Maximum number of retries after a failed attempt.
+
+    Returns:
+        AIMessage: The model's response.
+    """
+    deadline = time.monotonic() + deadline_seconds
+    llm = _get_llm()
+
+    for attempt in range(max_retries + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"LLM request exceeded its {deadline_seconds:.0f}s deadline.")
+
+        future = _EXECUTOR.submit(_call_llm, llm, prompt, deadline)
+        try:
+            # The call times itself out too, so waiting past its own limit is never needed
+            return future.result(timeout=remaining)
+        except Exception as e:
+            # Drops an attempt still queued for a worker; a running one ends at its timeout
+            future.cancel()
+            error = e
+
+        delay = _retry_delay(attempt)
+        if attempt == max_retries or time.monotonic() + delay >= deadline:
+            raise error
+        _print_retry(attempt, error)
+        time.sleep(delay)
+
+
+def _estimate_tokens(text):
+    """Estimate the number of tokens of a text from its length."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _log_token_usage(prompt, response):
+    """
+    Print the token counts of a request, as reported by the model or else estimated.
+
+    Args:
+        prompt (str): Full prompt text.
+        response (AIMessage): The model's response.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        counts = f"Prompt: {usage.get('input_tokens')} tokens, response: {usage.get('output_tokens')} tokens."
+    else:
+        counts = (
+            f"Prompt: ~{_estimate_tokens(prompt)} tokens, "
+            f"response: ~{_estimate_tokens(response.content)} tokens (estimated)."
+        )
+    print_message("[TOKENS]", text_color="bright_black")
+    print_message(counts, text_color="bright_black", indent_level=1, include_border=True)
+
+
+if __name__ == "__main__":
+    print("This script contains the shared client for the MIDI style conversion model.")
@@ -0,0 +1,57 @@
+"""
+Offline stand-in for the Gemini model.
+
+`_LocalLLM` has the same `invoke(prompt) -> message with .content` surface as the LangChain
+chat model, and answers every prompt instantly with a JSON block in the format the output
+parser expects, leaving the MIDI file unchanged. Set `MIDI_STYLE_LLM_BACKEND=local` to use it,
+so tests and load runs of the Modify MIDI tab need neither network access nor an API key.
+"""
+from collections import namedtuple
+import json
+
+# Local Imports
+from .constants import ACCEPTABLE_PARAMETERS
+
+# Minimal stand-in for a LangChain `AIMessage`
+_LocalMessage = namedtuple("_LocalMessage", ["content"])
+
+
+def _neutral_parameters():
+    """
+    Return a parameter dict that requests no modification.
+
+    Returns:
+        dict: One entry per key of `ACCEPTABLE_PARAMETERS` (False for flags, {} for
+        instruments, None otherwise).
+    """
+    parameters = {}
+    for key, spec in ACCEPTABLE_PARAMETERS.items():
+        if spec["type"] == "bool":
+            parameters[key] = False
+        elif key == "instruments":
+            parameters[key] = {}
+        else:
+            parameters[key] = None
+    return parameters
+
+
+class _LocalLLM:
+    """Offline chat model returning neutral parameters for every prompt."""
+
+    def invoke(self, prompt, **kwargs):
+        """
+        Answer a prompt.
+
+        Args:
+            prompt (str): Full prompt text (ignored).
+            **kwargs: Call options such as `timeout` (ignored).
+
+        Returns:
+            _LocalMessage: Message whose `content` is a ```json block.
+        """
+        return _LocalMessage(f"```json\n{json.dumps(_neutral_parameters(), indent=4)}\n```")
+
+
+if __name__ == "__main__":
+    print("This script contains the offline stand-in for the Gemini model.")
+    print(_LocalLLM().invoke("").content)
@@ -6,32 +6,26 @@ from pprint import pprint
 import pretty_midi
 
 # Local Imports
-from .utilities import (
-    _change_scale,
-    _change_tempo,
-    _transpose_midi,
-    _adjust_note_durations,
-    _add_swing,
-    _adjust_velocity,
-    _add_arpeggiation,
-    _add_harmony,
-    _humanize_midi,
-    _add_volume_effect,
-    _modify_instruments,
-)
+from .constants import PIPELINE_CACHE_ENABLED
+from .plan import _compile_plan, _execute_plan
+from .note_array import _midi_to_notes, _notes_to_midi
+from .pipeline_cache import _get_session, _execute_cached_plan
 
 
 def _midi_style_conversion(input_midi_file, output_midi_path, **kwargs):
     """
     Modifies a MIDI file based on provided parameters.
-    Uses our custom built functions in the `utilities.py` file.
+    Uses our custom built functions in the `utilities.py` file, compiled into a transform plan (see `plan.py`).
+    Notes are converted to a note array once after loading and written back once before saving.
+    Files given by path are cached with the result of each pass, so a repeated conversion of the
+    same file only re-runs the passes after the first changed one (see `pipeline_cache.py`).
     The `kwargs` dictionary should contain the parameters to modify the MIDI file.
 
     Args:
         input_midi_file (str or pretty_midi.PrettyMIDI): Path to input MIDI file or a PrettyMIDI object.
         output_midi_path (str): Path to save the modified MIDI file.
         **kwargs: Dictionary of parameters to modify MIDI. Possible keys:
-            - scale (str): Target scale (e.g., 'C_major', 'A_minor').
+            - scale (str): Target scale (e.g., 'C4_major', 'A3_dorian'; see `SCALE_INTERVALS`).
             - instruments (dict): Mapping of instrument indices to names.
             - tempo (float): Target tempo in beats per minute.
             - transpose (int): Number of semitones to transpose.
@@ -44,49 +38,27 @@ def _midi_style_conversion(input_midi_file, output_midi_path, **kwargs):
             - volume_effect (dict): Dict with 'value' (int) and 'time' (float).
 
     Returns:
-        None
+        pretty_midi.PrettyMIDI: The modified MIDI data.
     """
-    # Load MIDI file
+    # Compile the parameters into a plan of merged passes
+    plan = _compile_plan(**kwargs)
+
+    # Run the plan on the note array, reusing the cached passes of an earlier run on the same file
     if isinstance(input_midi_file, pretty_midi.PrettyMIDI):
         midi_data = input_midi_file
+        notes = _execute_plan(plan, _midi_to_notes(midi_data), midi_data)
+    elif PIPELINE_CACHE_ENABLED:
+        notes, midi_data = _execute_cached_plan(_get_session(input_midi_file), plan)
     else:
         midi_data = pretty_midi.PrettyMIDI(input_midi_file)
-
-    # Function mapping for modifications
-    modification_map = {
-        "scale": _change_scale,
-        "tempo": _change_tempo,
-        "transpose": _transpose_midi,
-        "duration_factor": _adjust_note_durations,
-        "swing": _add_swing,
-        "velocity_factor": _adjust_velocity,
-        "arpeggiate": _add_arpeggiation,
-        "harmony": _add_harmony,
-        "humanize": _humanize_midi,
-        "volume_effect": lambda midi, params: _add_volume_effect(midi, params["value"], params["time"]),
-    }
-
-    # Apply modifications
-    for key, func in modification_map.items():
-        if key in kwargs and kwargs[key] is not None:
-            if key == "volume_effect":
-                # Special handling for dict-based parameter
-                func(midi_data, kwargs[key])
-            elif key in ["duration_factor", "velocity_factor", "tempo", "transpose"]:
-                func(midi_data, kwargs[key])
-            elif key in ["scale"]:
-                func(midi_data, kwargs[key])
-            elif kwargs[key]:
-                # For boolean flags like swing, arpeggiate, etc.
-                func(midi_data)
-
-    # Modify instruments if specified
-    if "instruments" in kwargs and kwargs["instruments"]:
-        _modify_instruments(midi_data, kwargs["instruments"])
+        notes = _execute_plan(plan, _midi_to_notes(midi_data), midi_data)
 
     # Save the modified MIDI file
+    _notes_to_midi(notes, midi_data)
     midi_data.write(output_midi_path)
 
+    return midi_data
+
 
 if __name__ == "__main__":
     print("This script is a utility module and cannot be executed directly.")
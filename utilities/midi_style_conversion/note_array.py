@@ -0,0 +1,99 @@
+"""
+Array-backed note representation used by the MIDI style transforms.
+
+All notes of a MIDI file are held in one NumPy structured array with a row per note and
+columns for start, end, pitch, velocity and the index of the instrument the note belongs
+to. Transforms in `utilities.py` work on whole columns at once, so a file is converted
+from `pretty_midi.Note` objects once when it is loaded and back once when it is saved.
+
+Rows are kept grouped by instrument (in instrument order, with each instrument's notes in
+their original order), which is what `_notes_to_midi` and per-instrument transforms such
+as swing rely on.
+"""
+# Third-Party Imports
+import numpy as np
+import pretty_midi
+
+NOTE_DTYPE = np.dtype([
+    ("start", np.float64),
+    ("end", np.float64),
+    ("pitch", np.int16),
+    ("velocity", np.int16),
+    ("instrument", np.int32),
+])
+
+
+def _midi_to_notes(midi_data):
+    """
+    Move the notes of a MIDI file into a note array.
+
+    The instruments' note lists are emptied, so the array is the only copy of the notes
+    until `_notes_to_midi` writes them back.
+
+    Args:
+        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
+
+    Returns:
+        np.ndarray: Note array with `NOTE_DTYPE` rows.
+    """
+    rows = [
+        (note.start, note.end, note.pitch, note.velocity, idx)
+        for idx, instrument in enumerate(midi_data.instruments)
+        for note in instrument.notes
+    ]
+    for instrument in midi_data.instruments:
+        instrument.notes = []
+    return np.array(rows, dtype=NOTE_DTYPE)
+
+
+def _notes_to_midi(notes, midi_data):
+    """
+    Write a note array back into the instruments of a MIDI file.
+
+    Notes that end at or before their start are dropped, as `PrettyMIDI.remove_invalid_notes` does.
+
+    Args:
+        notes (np.ndarray): Note array with `NOTE_DTYPE` rows.
+        midi_data (pretty_midi.PrettyMIDI): MIDI data object the notes were taken from.
+
+    Returns:
+        None
+    """
+    notes = _group_by_instrument(notes[notes["end"] > notes["start"]])
+    bounds = np.searchsorted(notes["instrument"], np.arange(len(midi_data.instruments) + 1))
+
+    for idx, instrument in enumerate(midi_data.instruments):
+        rows = notes[bounds[idx]:bounds[idx + 1]]
+        instrument.notes = [
+            pretty_midi.Note(velocity=velocity, pitch=pitch, start=start, end=end)
+            for start, end, pitch, velocity in zip(
+                rows["start"].tolist(), rows["end"].tolist(), rows["pitch"].tolist(), rows["velocity"].tolist())
+        ]
+
+
+def _group_by_instrument(notes):
+    """Stable-sort a note array by instrument, keeping each instrument's note order."""
+    return notes[np.argsort(notes["instrument"], kind="stable")]
+
+
+def _instrument_rank(notes):
+    """
+    Return the position of every note within its instrument's notes.
+
+    Args:
+        notes (np.ndarray): Note array, grouped by instrument.
+
+    Returns:
+        np.ndarray: 0 for each instrument's first note, 1 for its second, and so on.
+    """
+    first = np.searchsorted(notes["instrument"], notes["instrument"], side="left")
+    return np.arange(len(notes)) - first
+
+
+def _end_time(notes):
+    """Return the end time of the last note, or 0 for an empty array."""
+    return float(notes["end"].max()) if len(notes) else 0.0
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
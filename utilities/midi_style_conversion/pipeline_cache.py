@@ -0,0 +1,138 @@
+"""
+Per-session cache of loaded MIDI files and intermediate transform results.
+
+In the Modify MIDI tab the same file is usually converted again and again while the prompt
+is refined. For each input file (a session, identified by its path, size and modification
+time) the loaded MIDI data and note array are kept, together with the result of every step
+of the last plan run on it. A new plan reuses the results of its longest prefix of unchanged
+steps (same name and source parameters) and only runs the steps after it: changing only
+`velocity_factor`, for example, skips loading and retiming and starts at the pitch/velocity
+pass. The prefix ends at the first randomized step (e.g., humanize), so it and every step
+after it run again and each conversion gets fresh randomness.
+
+Cached results are never modified: note arrays are copied before a step runs, and the
+`PrettyMIDI` object is deep-copied before the steps and after each step that changes it.
+At most `PIPELINE_CACHE_MAX_SESSIONS` files are kept, evicting the least recently used.
+"""
+# Standard Library Imports
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+import copy
+import threading
+
+# Third-Party Imports
+import pretty_midi
+
+# Local Imports
+from .constants import PIPELINE_CACHE_MAX_SESSIONS
+from .note_array import _midi_to_notes
+from .plan import _print_plan
+
+# Result of one plan step: the note array after it and the MIDI data (without notes) after it
+_CachedStage = namedtuple("_CachedStage", ["key", "notes", "midi_data"])
+
+_SESSIONS_LOCK = threading.Lock()
+
+# Sessions keyed by input file, least recently used first
+_SESSIONS = OrderedDict()
+
+
+class _PipelineSession:
+    """
+    Cached state of one input file.
+
+    Attributes:
+        midi_data (pretty_midi.PrettyMIDI): The loaded file, with its notes moved to `notes`.
+        notes (np.ndarray): Note array of the loaded file.
+        stages (list[_CachedStage]): Results of the steps of the last plan run, in order.
+    """
+    def __init__(self, midi_data, notes):
+        self.midi_data = midi_data
+        self.notes = notes
+        self.stages = []
+
+
+def _session_key(input_midi_file):
+    """Identify an input file by its resolved path, size and modification time."""
+    path = Path(input_midi_file).resolve()
+    stat = path.stat()
+    return str(path), stat.st_size, stat.st_mtime_ns
+
+
+def _get_session(input_midi_file, max_sessions=PIPELINE_CACHE_MAX_SESSIONS):
+    """
+    Return the session of an input file, loading the file on the first request.
+
+    Args:
+        input_midi_file (str): Path to the input MIDI file.
+        max_sessions (int): Maximum number of sessions kept.
+
+    Returns:
+        _PipelineSession: The file's session.
+    """
+    key = _session_key(input_midi_file)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is not None:
+            _SESSIONS.move_to_end(key)
+            return session
+
+    midi_data = pretty_midi.PrettyMIDI(input_midi_file)
+    session = _PipelineSession(midi_data, _midi_to_notes(midi_data))
+
+    with _SESSIONS_LOCK:
+        _SESSIONS[key] = session
+        while len(_SESSIONS) > max_sessions:
+            _SESSIONS.popitem(last=False)
+    return session
+
+
+def _step_key(step):
+    """Identify a plan step by its name and source parameters."""
+    return repr(step)
+
+
+def _execute_cached_plan(session, plan):
+    """
+    Run a transform plan on a session's file, reusing the results of unchanged leading steps.
+
+    Args:
+        session (_PipelineSession): Session from `_get_session`.
+        plan (list[_TransformStep]): Plan from `_compile_plan`.
+
+    Returns:
+        tuple: (transformed note array, `PrettyMIDI` object for it, without notes). Both are
+        new objects the caller may modify.
+    """
+    stages = session.stages
+    reused = 0
+    while (
+        reused < min(len(stages), len(plan))
+        and plan[reused].deterministic
+        and stages[reused].key == _step_key(plan[reused])
+    ):
+        reused += 1
+
+    stages = stages[:reused]
+    if stages:
+        notes, snapshot = stages[-1].notes, stages[-1].midi_data
+    else:
+        notes, snapshot = session.notes, session.midi_data
+
+    for step in plan[:reused]:
+        step.cached = True
+
+    midi_data = copy.deepcopy(snapshot)
+    for step in plan[reused:]:
+        notes = step.run(notes.copy(), midi_data)
+        if step.uses_midi:
+            snapshot = copy.deepcopy(midi_data)
+        stages.append(_CachedStage(_step_key(step), notes, snapshot))
+
+    session.stages = stages
+    _print_plan(plan)
+    return notes.copy(), midi_data
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
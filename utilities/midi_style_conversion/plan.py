@@ -0,0 +1,189 @@
+"""
+Transform plans for MIDI style conversion.
+
+The parameters returned by the LLM are compiled into a short list of steps before any note
+is touched, merging modifications that can share a pass over the note array:
+- scale snapping and transposition compose into one pitch table, and velocity scaling into
+  one velocity table, applied together in a single pitch/velocity pass;
+- tempo, duration and swing changes become a single retiming pass.
+
+Pitch/velocity and timing changes touch different columns, so merging them does not change
+the result. Steps run in order, record how long they took, and can be printed before or
+after running.
+"""
+import time
+
+# Local Imports
+from ..print_utilities import print_message
+from .constants import AUTO_SCALE
+from .scales import _scale_table
+from .time_warp import _parse_target_tempo
+from .utilities import (
+    _remap_notes,
+    _snap_to_detected_keys,
+    _transpose_table,
+    _velocity_table,
+    _retime_notes,
+    _add_arpeggiation,
+    _add_harmony,
+    _humanize_midi,
+    _add_volume_effect,
+    _modify_instruments,
+)
+
+
+class _TransformStep:
+    """
+    One pass of a transform plan.
+
+    Attributes:
+        name (str): Name of the pass, e.g., 'pitch_velocity'.
+        sources (dict): The conversion parameters merged into this pass.
+        func (callable): Transform called as `func(notes, [midi_data,] **params)`.
+        params (dict): Keyword arguments for `func`.
+        uses_midi (bool): Whether `func` also receives the `PrettyMIDI` object.
+        deterministic (bool): Whether the same input always gives the same result (False for
+            randomized passes, whose results are never reused).
+        seconds (float or None): Run time of the last `run`.
+        cached (bool): Whether the result was reused from an earlier run (see `pipeline_cache.py`).
+    """
+    def __init__(self, name, sources, func, params=None, uses_midi=False, deterministic=True):
+        self.name = name
+        self.sources = sources
+        self.func = func
+        self.params = params or {}
+        self.uses_midi = uses_midi
+        self.deterministic = deterministic
+        self.seconds = None
+        self.cached = False
+
+    def run(self, notes, midi_data):
+        """Run the pass on a note array and return the resulting array."""
+        start_time = time.perf_counter()
+        if self.uses_midi:
+            notes = self.func(notes, midi_data, **self.params)
+        else:
+            notes = self.func(notes, **self.params)
+        self.seconds = time.perf_counter() - start_time
+        return notes
+
+    def __repr__(self):
+        sources = ", ".join(f"{key}={value!r}" for key, value in self.sources.items())
+        return f"{self.name}({sources})"
+
+
+def _apply_instruments(notes, midi_data, instruments):
+    """Plan adapter for `_modify_instruments`, which only changes the `PrettyMIDI` object."""
+    _modify_instruments(midi_data, instruments)
+    return notes
+
+
+def _compile_plan(**kwargs):
+    """
+    Compile conversion parameters into a transform plan.
+
+    Parameters are validated here, so invalid values fail before any note is modified.
+
+    Args:
+        **kwargs: Conversion parameters, as documented in `_midi_style_conversion`.
+
+    Returns:
+        list[_TransformStep]: The passes to run, in order.
+    """
+    def given(key):
+        return kwargs.get(key) is not None
+
+    def enabled(key):
+        return bool(kwargs.get(key))
+
+    plan = []
+
+    # Timing: tempo, durations and swing in one retiming pass
+    retime_params = {}
+    if given("tempo"):
+        _parse_target_tempo(kwargs["tempo"])
+        retime_params["target_tempo"] = kwargs["tempo"]
+    if given("duration_factor"):
+        retime_params["duration_factor"] = kwargs["duration_factor"]
+    if enabled("swing"):
+        retime_params["swing_factor"] = 0.2
+    if retime_params:
+        sources = {key: kwargs[key] for key in ("tempo", "duration_factor", "swing") if given(key)}
+        plan.append(_TransformStep("retime", sources, _retime_notes, retime_params, uses_midi=True))
+
+    # Snapping to the detected keys needs a key per note, so it runs before the table pass
+    auto_scale = kwargs.get("scale") == AUTO_SCALE
+    if auto_scale:
+        plan.append(_TransformStep("key_snap", {"scale": AUTO_SCALE}, _snap_to_detected_keys))
+
+    # Pitch and velocity: composed lookup tables in one pass
+    pitch_table = velocity_table = None
+    if given("scale") and not auto_scale:
+        pitch_table = _scale_table(kwargs["scale"])
+    if given("transpose"):
+        transpose_table = _transpose_table(kwargs["transpose"])
+        pitch_table = transpose_table if pitch_table is None else transpose_table[pitch_table]
+    if given("velocity_factor"):
+        velocity_table = _velocity_table(kwargs["velocity_factor"])
+    if pitch_table is not None or velocity_table is not None:
+        sources = {key: kwargs[key] for key in ("scale", "transpose", "velocity_factor") if given(key)}
+        if auto_scale:
+            sources.pop("scale")
+        plan.append(_TransformStep("pitch_velocity", sources, _remap_notes,
+                                   {"pitch_table": pitch_table, "velocity_table": velocity_table}))
+
+    # Transforms that add, reorder or randomize notes run on their own
+    for key, func, deterministic in (
+        ("arpeggiate", _add_arpeggiation, True),
+        ("harmony", _add_harmony, True),
+        ("humanize", _humanize_midi, False),
+    ):
+        if enabled(key):
+            plan.append(_TransformStep(key, {key: kwargs[key]}, func, deterministic=deterministic))
+
+    # Events outside the note array
+    if given("volume_effect"):
+        volume_effect = kwargs["volume_effect"]
+        plan.append(_TransformStep("volume_effect", {"volume_effect": volume_effect}, _add_volume_effect,
+                                   {"value": volume_effect["value"], "time": volume_effect["time"]}, uses_midi=True))
+    if enabled("instruments"):
+        plan.append(_TransformStep("instruments", {"instruments": kwargs["instruments"]}, _apply_instruments,
+                                   {"instruments": kwargs["instruments"]}, uses_midi=True))
+
+    return plan
+
+
+def _execute_plan(plan, notes, midi_data):
+    """
+    Run a transform plan on a note array and print the time taken by each pass.
+
+    Args:
+        plan (list[_TransformStep]): Plan from `_compile_plan`.
+        notes (np.ndarray): Note array of the MIDI file.
+        midi_data (pretty_midi.PrettyMIDI): MIDI data object the notes were taken from.
+
+    Returns:
+        np.ndarray: The transformed note array.
+    """
+    for step in plan:
+        notes = step.run(notes, midi_data)
+    _print_plan(plan)
+    return notes
+
+
+def _print_plan(plan):
+    """Print the passes of a plan, with their run times once they have run."""
+    print_message("[PLAN]", text_color="bright_blue")
+    if not plan:
+        print_message("No modifications requested.", text_color="bright_blue", indent_level=1)
+    for step in plan:
+        if step.cached:
+            timing = " - cached"
+        else:
+            timing = f" - {step.seconds * 1000:.1f} ms" if step.seconds is not None else ""
+        print_message(f"`{step!r}`{timing}", text_color="bright_blue", indent_level=1)
+    print_message("", include_border=True)
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
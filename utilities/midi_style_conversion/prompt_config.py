@@ -1,27 +1,14 @@
 # Third-Party Imports
 from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
-import os
 from pprint import pprint
 
 # Local Imports
-from .constants import INSTRUMENT_TO_PROGRAM, VALID_NOTES, ACCEPTABLE_PARAMETERS
+from .constants import INSTRUMENT_TO_PROGRAM, ACCEPTABLE_PARAMETERS, RESPONSE_CACHE_ENABLED
+from .llm_client import _invoke_llm, _log_token_usage, _estimate_tokens, LLM_MODEL_NAME
+from .response_cache import _response_key, _lookup_response, _store_response
 from ..print_utilities import print_message
 
 
-# Load environment variables
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL = "gemini-1.5-flash"
-
-# Initialize the Gemini model
-llm = ChatGoogleGenerativeAI(
-    google_api_key=GEMINI_API_KEY,
-    model=GEMINI_MODEL,
-    temperature=0
-)
-
 # Define schemas for the output parser
 schemas = [
     ResponseSchema(
@@ -39,10 +26,12 @@ parser = StructuredOutputParser.from_response_schemas(schemas)
 # Prompt components
 PREFIX = "You are a music AI assistant. Based on the user's description, generate parameters to modify a MIDI file."
 INSTRUCTIONS = parser.get_format_instructions()
-CONSTRAINTS = f""" 
-1. Instruments must be represented by their **MIDI program numbers (0-127)**. 
-   Each program number corresponds to a specific instrument name based on the following mapping:
-   {INSTRUMENT_TO_PROGRAM}.
+
+# Compact instrument table, included in the prompt only once
+INSTRUMENT_TABLE = ", ".join(f"{program}: {name}" for name, program in INSTRUMENT_TO_PROGRAM.items())
+CONSTRAINTS = f"""
+1. Instruments must be represented by their **MIDI program numbers (0-127)**, from this table (program: instrument):
+   {INSTRUMENT_TABLE}.
 
 2. The output format for instruments should be a dictionary where:
    - The keys are integers representing the instrument channel indices (e.g., 0, 1, 2, etc.).
@@ -54,7 +43,7 @@ PROMPT_TEMPLATE = f"""
 {PREFIX}
 
 ENSURE OUTPUT FORMAT IS STRICTLY VALID JSON (DO NOT ADD COMMENTS):
-1. Instruments must use their MIDI program numbers (0-127) in the format described above.
+1. Instruments must use their MIDI program numbers (0-127) in the format described below.
 2. Other parameters should follow the instructions provided.
 {INSTRUCTIONS}
 
@@ -63,9 +52,61 @@ IMPORTANT CONSTRAINTS:
 """
 
 
+def _build_prompt(text_query):
+    """Embed the user query in the prompt template."""
+    return f"{PROMPT_TEMPLATE}\n\nUser request: {text_query}. Reminder: Only select instruments from the instrument table."
+
+
+def _cached_query(text_query):
+    """
+    Look up the parsed response of a query in the response cache.
+
+    Returns:
+        tuple: (cache key or None, cached parameters or None).
+    """
+    cache_key = _response_key(text_query, LLM_MODEL_NAME, PROMPT_TEMPLATE) if RESPONSE_CACHE_ENABLED else None
+    cached_response = _lookup_response(cache_key)
+    if cached_response is not None:
+        print_message("[CACHE]", text_color="bright_magenta")
+        print_message("Reusing the parameters of an identical prompt.", text_color="bright_magenta", indent_level=1, include_border=True)
+    return cache_key, cached_response
+
+
+def _parse_response(prompt, response):
+    """
+    Parse and validate the model's response.
+
+    Args:
+        prompt (str): Full prompt text sent to the model.
+        response (AIMessage): The model's response.
+
+    Returns:
+        dict: The parsed parameters.
+    """
+    print_message("[AI OUTPUT]", text_color="bright_blue")
+    print(response.content)
+    print_message("", text_color="bright_blue", include_border=True)
+    _log_token_usage(prompt, response)
+
+    parsed_response = parser.parse(response.content)
+
+    invalid_programs = [
+        program for program in parsed_response.get("instruments", {}).values()
+        if program not in INSTRUMENT_TO_PROGRAM.values()
+    ]
+    if invalid_programs:
+        raise ValueError(f"AI generated invalid MIDI program numbers: {invalid_programs}")
+
+    print_message("[PARSED RESPONSE]", text_color="bright_cyan")
+    pprint(parsed_response)
+    print_message("", text_color="bright_cyan", include_border=True)
+    return parsed_response
+
+
 def _execute_query(text_query):
     """ 
     Execute a query using the Gemini model and parse the response.
+    Parsed responses are cached, so repeated prompts skip the model (see `response_cache.py`).
 
     Args:
         text_query (str): The user query to execute.
@@ -73,27 +114,14 @@ def _execute_query(text_query):
     Returns:
         dict: The parsed response from the model.
     """
-    try:
-        gemini_response = llm.invoke(
-            f"{PROMPT_TEMPLATE}\n\nUser request: {text_query}. Reminder: Only select instruments from the list of available instruments.")
-
-        print_message("[AI OUTPUT]", text_color="bright_blue")
-        print(gemini_response.content)
-        print_message("", text_color="bright_blue", include_border=True)
-
-        parsed_response = parser.parse(gemini_response.content)
-
-        invalid_programs = [
-            program for program in parsed_response.get("instruments", {}).values()
-            if program not in INSTRUMENT_TO_PROGRAM.values()
-        ]
-        if invalid_programs:
-            raise ValueError(f"AI generated invalid MIDI program numbers: {invalid_programs}")
-
-        print_message("[PARSED RESPONSE]", text_color="bright_cyan")
-        pprint(parsed_response)
-        print_message("", text_color="bright_cyan", include_border=True)
+    cache_key, cached_response = _cached_query(text_query)
+    if cached_response is not None:
+        return cached_response
 
+    try:
+        prompt = _build_prompt(text_query)
+        parsed_response = _parse_response(prompt, _invoke_llm(prompt))
+        _store_response(cache_key, parsed_response)
         return parsed_response
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -103,3 +131,4 @@ def _execute_query(text_query):
 if __name__ == "__main__":
     print("This script is used to execute a query using the Gemini model and parse the response.")
     print(PROMPT_TEMPLATE)
+    print(f"Prompt template: {len(PROMPT_TEMPLATE)} characters, ~{_estimate_tokens(PROMPT_TEMPLATE)} tokens.")
@@ -0,0 +1,130 @@
+"""
+Persistent cache of parsed LLM responses.
+
+Turning a prompt into MIDI parameters costs a network round trip and API quota, while the
+same prompts are submitted again and again. Parsed parameter dicts are cached by the
+normalized prompt text, the model name and a hash of the prompt template, so editing the
+template or switching models never returns stale answers.
+
+Entries live in memory for lookups and are written through to a JSON file, so they survive
+restarts. Entries expire after `RESPONSE_CACHE_TTL_SECONDS`, and the least recently used
+ones are evicted beyond `RESPONSE_CACHE_MAX_ENTRIES`.
+"""
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+
+# Local Imports
+from ..file_utilities import write_json_atomic
+from .constants import RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES
+
+_CACHE_LOCK = threading.Lock()
+
+# Entries keyed by response key, loaded from disk on first use
+_RESPONSES = None
+
+
+def _normalize_prompt(text_query):
+    """Normalize a prompt for caching (case, whitespace and trailing punctuation)."""
+    text = re.sub(r"\s+", " ", str(text_query)).strip().casefold()
+    return text.rstrip(".!?;, ")
+
+
+def _response_key(text_query, model_name, prompt_template):
+    """
+    Build the cache key for a prompt.
+
+    Args:
+        text_query (str): The user's prompt.
+        model_name (str): Name of the model answering the prompt.
+        prompt_template (str): Prompt template the query is embedded in.
+
+    Returns:
+        str: Hex digest identifying the prompt, model and template.
+    """
+    template_digest = hashlib.sha256(prompt_template.encode()).hexdigest()
+    key = json.dumps([_normalize_prompt(text_query), model_name, template_digest])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _load_responses(cache_path=RESPONSE_CACHE_PATH):
+    """Load the cache file into memory once; a missing or corrupt file starts empty."""
+    global _RESPONSES
+    if _RESPONSES is None:
+        try:
+            with open(cache_path, "r") as f:
+                _RESPONSES = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _RESPONSES = {}
+    return _RESPONSES
+
+
+def _save_responses(responses, cache_path=RESPONSE_CACHE_PATH):
+    """Atomically write the cache file."""
+    write_json_atomic(cache_path, responses)
+
+
+def _lookup_response(key, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS):
+    """
+    Return the cached parameters for a key.
+
+    Args:
+        key (str or None): Key from `_response_key`.
+        ttl_seconds (float): Maximum age of an entry.
+
+    Returns:
+        dict or None: A copy of the cached parameters, or None on a miss.
+    """
+    if key is None:
+        return None
+
+    with _CACHE_LOCK:
+        entry = _load_responses().get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["created"] > ttl_seconds:
+            return None
+
+        # Only the in-memory recency is refreshed; it is persisted with the next store
+        entry["used"] = time.time()
+        parameters = entry["parameters"]
+
+    # Callers may modify the parameters, so the cached dict is never handed out
+    return copy.deepcopy(parameters)
+
+
+def _store_response(key, parameters, max_entries=RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS):
+    """
+    Cache the parsed parameters for a key, dropping expired and least recently used entries.
+
+    Args:
+        key (str or None): Key from `_response_key`.
+        parameters (dict): Parsed parameters (JSON serializable).
+        max_entries (int): Maximum number of entries kept.
+        ttl_seconds (float): Maximum age of an entry.
+    """
+    if key is None:
+        return
+
+    now = time.time()
+    with _CACHE_LOCK:
+        responses = _load_responses()
+        responses[key] = {"created": now, "used": now, "parameters": copy.deepcopy(parameters)}
+
+        for stale in [k for k, entry in responses.items() if now - entry["created"] > ttl_seconds]:
+            del responses[stale]
+        for stale in sorted(responses, key=lambda k: responses[k]["used"])[:-max_entries]:
+            del responses[stale]
+
+        try:
+            _save_responses(responses)
+        except OSError:
+            # The in-memory cache still serves this process
+            pass
+
+
+if __name__ == "__main__":
+    print("This script contains the response cache used for MIDI style conversion prompts.")
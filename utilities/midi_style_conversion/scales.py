@@ -0,0 +1,127 @@
+"""
+Precomputed scale tables for scale snapping and detection.
+
+For every scale type in `SCALE_INTERVALS` and each of the 12 roots, a 128-entry table
+maps every MIDI pitch to the nearest pitch of that scale (ties resolve downwards), so
+snapping a whole note array to a scale is a single `np.take`. The tables, and the
+pitch-class membership of every scale, are built once at import.
+"""
+from functools import lru_cache
+
+# Third-Party Imports
+import numpy as np
+import pretty_midi
+
+# Local Imports
+from .constants import SCALE_INTERVALS
+
+SCALE_TYPES = tuple(SCALE_INTERVALS)
+
+
+def _build_scale_membership():
+    """
+    Build the pitch-class membership of every scale.
+
+    Returns:
+        np.ndarray: Boolean array of shape (scale types, 12 roots, 12 pitch classes).
+    """
+    membership = np.zeros((len(SCALE_TYPES), 12, 12), dtype=bool)
+    for type_idx, scale_type in enumerate(SCALE_TYPES):
+        for root in range(12):
+            membership[type_idx, root, (root + np.array(SCALE_INTERVALS[scale_type])) % 12] = True
+    return membership
+
+
+def _build_scale_tables(membership):
+    """
+    Build the pitch-snap table of every scale.
+
+    Args:
+        membership (np.ndarray): Array from `_build_scale_membership`.
+
+    Returns:
+        np.ndarray: int16 array of shape (scale types, 12 roots, 128 pitches).
+    """
+    pitches = np.arange(128)
+    tables = np.empty(membership.shape[:2] + (128,), dtype=np.int16)
+    for type_idx in range(membership.shape[0]):
+        for root in range(12):
+            # Scale pitches within the MIDI range, and their neighbours around each pitch
+            in_scale = pitches[membership[type_idx, root, pitches % 12]]
+            above = np.searchsorted(in_scale, pitches)
+            upper = in_scale[np.minimum(above, len(in_scale) - 1)]
+            lower = in_scale[np.maximum(above - 1, 0)]
+            tables[type_idx, root] = np.where(upper - pitches < pitches - lower, upper, lower)
+    return tables
+
+
+SCALE_MEMBERSHIP = _build_scale_membership()
+SCALE_TABLES = _build_scale_tables(SCALE_MEMBERSHIP)
+
+
+def _parse_scale(target_scale):
+    """
+    Parse a scale name into its root pitch class and scale type index.
+
+    Args:
+        target_scale (str): Target scale, e.g., 'C4_major' or 'F#3_harmonic_minor'.
+
+    Returns:
+        tuple: (root pitch class 0-11, index into `SCALE_TYPES`).
+    """
+    # Validate target scale
+    if "_" not in target_scale:
+        raise ValueError("Target scale must be in the format 'Root_Type', e.g., 'C#-1_major'.")
+
+    # Parse target scale
+    root_note, scale_type = target_scale.split("_", 1)
+    try:
+        root_note_number = pretty_midi.note_name_to_number(root_note)
+    except ValueError as e:
+        raise ValueError(f"Invalid root note '{root_note}': {e}")
+
+    if scale_type not in SCALE_TYPES:
+        raise ValueError(f"Unknown scale type: {scale_type}. Supported types are: {', '.join(SCALE_TYPES)}.")
+
+    return root_note_number % 12, SCALE_TYPES.index(scale_type)
+
+
+def _scale_table(target_scale):
+    """
+    Return the pitch table snapping every MIDI pitch to the nearest note of a scale.
+
+    Args:
+        target_scale (str): Target scale, e.g., 'C4_major' or 'A3_minor'.
+
+    Returns:
+        np.ndarray: New pitch for each of the 128 MIDI pitches.
+    """
+    root, type_idx = _parse_scale(target_scale)
+    return SCALE_TABLES[type_idx, root]
+
+
+@lru_cache(maxsize=None)
+def _diatonic_table(type_idx, root, degrees):
+    """
+    Build the table moving every MIDI pitch a number of scale degrees within a scale.
+
+    Pitches outside the scale are snapped to it first.
+
+    Args:
+        type_idx (int): Index into `SCALE_TYPES`.
+        root (int): Root pitch class (0-11).
+        degrees (int): Scale degrees to move (e.g., 2 for a third above).
+
+    Returns:
+        np.ndarray: New pitch for each of the 128 MIDI pitches, or -1 where it would leave
+        the MIDI range.
+    """
+    pitches = np.arange(128)
+    in_scale = pitches[SCALE_MEMBERSHIP[type_idx, root, pitches % 12]]
+    steps = np.searchsorted(in_scale, SCALE_TABLES[type_idx, root]) + degrees
+    valid = (steps >= 0) & (steps < len(in_scale))
+    return np.where(valid, in_scale[np.clip(steps, 0, len(in_scale) - 1)], -1)
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
@@ -0,0 +1,161 @@
+"""
+Tempo-map aware time warping.
+
+A tempo change is expressed as a piecewise-linear time map from source seconds to target
+seconds. The source side follows the file's own tempo map (so every event keeps its beat
+position, even across tempo changes), and the target side follows either a constant tempo
+or a tempo curve of `[time, bpm]` points for accelerando and ritardando. The map is applied
+to the notes and every other timed event in a single `np.interp` call, and the file's tempo
+map is rewritten from the same map so the saved MIDI file keeps its events on their ticks.
+"""
+from collections import namedtuple
+
+# Third-Party Imports
+import numpy as np
+
+# Local Imports
+from .constants import TEMPO_CURVE_RESOLUTION_SECONDS
+
+# Source times, target times and source beats at the knots of a time map
+_TimeMap = namedtuple("_TimeMap", ["source_times", "target_times", "beats"])
+
+
+def _parse_target_tempo(target_tempo):
+    """
+    Validate a target tempo and return it as a tempo curve.
+
+    Args:
+        target_tempo (float or list): Tempo in BPM, or `[time_seconds, bpm]` points.
+
+    Returns:
+        tuple: (point times, tempi in BPM) as arrays.
+    """
+    if np.isscalar(target_tempo):
+        target_tempo = float(target_tempo)
+        if target_tempo <= 0:
+            raise ValueError("Target tempo must be a positive value.")
+        return np.zeros(1), np.array([target_tempo])
+
+    points = np.asarray(target_tempo, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) == 0:
+        raise ValueError("Tempo curve must be a list of [time_seconds, bpm] points.")
+    if np.any(points[:, 1] <= 0):
+        raise ValueError("Target tempo must be a positive value.")
+    if np.any(points[:, 0] < 0) or np.any(np.diff(points[:, 0]) < 0):
+        raise ValueError("Tempo curve times must be non-negative and increasing.")
+    return points[:, 0], points[:, 1]
+
+
+def _source_beats(midi_data, times):
+    """
+    Convert times in seconds to beats with the file's tempo map.
+
+    Args:
+        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
+        times (np.ndarray): Sorted times in seconds.
+
+    Returns:
+        np.ndarray: Beat position of each time.
+    """
+    tempo_times, tempi = midi_data.get_tempo_changes()
+    if len(tempi) == 0:
+        # Default to 120 BPM if no tempo information exists
+        tempo_times, tempi = np.zeros(1), np.array([120.0])
+
+    # Beats elapsed at each tempo change, then linear within each tempo
+    change_beats = np.concatenate([[0.0], np.cumsum(np.diff(tempo_times) * tempi[:-1] / 60.0)])
+    idx = np.clip(np.searchsorted(tempo_times, times, side="right") - 1, 0, len(tempi) - 1)
+    return change_beats[idx] + (times - tempo_times[idx]) * tempi[idx] / 60.0
+
+
+def _build_time_map(midi_data, target_tempo, end_time):
+    """
+    Build the time map retiming a MIDI file to a target tempo or tempo curve.
+
+    Args:
+        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
+        target_tempo (float or list): Tempo in BPM, or `[time_seconds, bpm]` points (in source
+            time, interpolated linearly in between and held outside).
+        end_time (float): End time of the latest event to warp.
+
+    Returns:
+        _TimeMap: Knots of the piecewise-linear map, covering past `end_time`.
+    """
+    curve_times, curve_tempi = _parse_target_tempo(target_tempo)
+    tempo_times, _ = midi_data.get_tempo_changes()
+
+    # Knots at every source tempo change and curve point; curves also need a finer grid
+    last_time = end_time + 1.0
+    knots = [[0.0, last_time], tempo_times, curve_times]
+    if len(curve_tempi) > 1:
+        knots.append(np.arange(0.0, last_time, TEMPO_CURVE_RESOLUTION_SECONDS))
+    source_times = np.unique(np.concatenate(knots))
+    source_times = source_times[(source_times >= 0) & (source_times <= last_time)]
+
+    # Integrate the target seconds per beat over the source beats
+    beats = _source_beats(midi_data, source_times)
+    seconds_per_beat = 60.0 / np.interp(source_times, curve_times, curve_tempi)
+    target_times = np.concatenate([[0.0], np.cumsum(np.diff(beats) * (seconds_per_beat[:-1] + seconds_per_beat[1:]) / 2)])
+    return _TimeMap(source_times, target_times, beats)
+
+
+def _event_lists(midi_data):
+    """Return every list of timed non-note events of a MIDI file."""
+    event_lists = [midi_data.lyrics, midi_data.text_events, midi_data.key_signature_changes, midi_data.time_signature_changes]
+    for instrument in midi_data.instruments:
+        event_lists.extend([instrument.control_changes, instrument.pitch_bends])
+    return event_lists
+
+
+def _set_tempo_map(midi_data, time_map):
+    """
+    Rewrite the tempo map of a MIDI file so its beats fall at the warped times.
+
+    Args:
+        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
+        time_map (_TimeMap): Map from `_build_time_map`.
+
+    Returns:
+        None
+    """
+    resolution = midi_data.resolution
+    tempi = 60.0 * np.diff(time_map.beats) / np.diff(time_map.target_times)
+    ticks = np.round(time_map.beats[:-1] * resolution).astype(np.int64)
+    tick_scales = 60.0 / (tempi * resolution)
+
+    # Drop repeated tempi, and earlier changes rounded onto the same tick
+    keep = np.concatenate([[True], np.diff(tick_scales) != 0])
+    ticks, tick_scales = ticks[keep], tick_scales[keep]
+    last = np.concatenate([ticks[1:] != ticks[:-1], [True]])
+    ticks, tick_scales = ticks[last], tick_scales[last]
+    ticks[0] = 0
+
+    midi_data._tick_scales = list(zip(ticks.tolist(), tick_scales.tolist()))
+    midi_data._update_tick_to_time(int(np.round(time_map.beats[-1] * resolution)) + 1)
+
+
+def _warp_midi(midi_data, note_times, time_map):
+    """
+    Warp note times and every other event of a MIDI file in one `np.interp` pass.
+
+    Args:
+        midi_data (pretty_midi.PrettyMIDI): MIDI data object holding the non-note events.
+        note_times (np.ndarray): Note times (e.g., starts and ends) to warp.
+        time_map (_TimeMap): Map from `_build_time_map`.
+
+    Returns:
+        np.ndarray: The warped note times.
+    """
+    events = [event for event_list in _event_lists(midi_data) for event in event_list]
+    times = np.concatenate([note_times, np.array([event.time for event in events], dtype=np.float64)])
+    warped = np.interp(times, time_map.source_times, time_map.target_times)
+
+    for event, time in zip(events, warped[len(note_times):].tolist()):
+        event.time = time
+    _set_tempo_map(midi_data, time_map)
+
+    return warped[:len(note_times)]
+
+
+if __name__ == "__main__":
+    print("This script should not be run directly! Import these functions for use in another file.")
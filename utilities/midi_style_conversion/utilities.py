@@ -8,19 +8,21 @@ our goals, ensuring accuracy and adherence to the desired functionality.
 
 Purpose:
 - Handles MIDI processing and related operations, including conversion, style modification, and transformations.
+- Note transforms work on the note arrays from `note_array.py` and return the modified array.
 """
 
 
-# Standard Library Imports
-from collections import Counter
-import random
-
 # Third-Party Imports
+import numpy as np
 import pretty_midi
-from pprint import pprint
 
 # Local Imports
 from .constants import INSTRUMENT_TO_PROGRAM, PROGRAM_TO_INSTRUMENT
+from .note_array import _group_by_instrument, _instrument_rank, _end_time
+from .scales import SCALE_TABLES, SCALE_TYPES, _diatonic_table
+from .chords import _segment_chords, _chord_ranks, _chord_tops
+from .time_warp import _build_time_map, _warp_midi
+from .key_analysis import KEY_MODES, _key_timeline, _key_segments, _note_keys
 from ..print_utilities import print_message
 
 
@@ -52,326 +54,235 @@ def _modify_instruments(midi_data, instruments):
     print_message("", include_border=True)
 
 
-def _detect_scale(midi_data):
+def _remap_notes(notes, pitch_table=None, velocity_table=None):
     """
-    Detect the most likely scale (major or minor) of the MIDI file.
-
-    Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
-
-    Returns:
-        str: Detected scale, e.g., 'C_major' or 'A_minor'.
-    """
-    # Count occurrences of each pitch class
-    pitch_classes = Counter()
-    for instrument in midi_data.instruments:
-        for note in instrument.notes:
-            pitch_classes[note.pitch % 12] += 1
-
-    # Major and minor scale intervals
-    major_intervals = [0, 2, 4, 5, 7, 9, 11]
-    minor_intervals = [0, 2, 3, 5, 7, 8, 10]
+    Map note pitches and velocities through 128-entry lookup tables in a single pass.
 
-    # Check each root note
-    best_match = None
-    best_score = 0
-    for root in range(12):
-        major_scale = [(root + i) % 12 for i in major_intervals]
-        minor_scale = [(root + i) % 12 for i in minor_intervals]
-
-        # Score scales based on note frequency
-        major_score = sum(pitch_classes[pc] for pc in major_scale)
-        minor_score = sum(pitch_classes[pc] for pc in minor_scale)
-
-        if major_score > best_score:
-            best_score = major_score
-            best_match = f"{pretty_midi.note_number_to_name(root)}_major"
-
-        if minor_score > best_score:
-            best_score = minor_score
-            best_match = f"{pretty_midi.note_number_to_name(root)}_minor"
-
-    # Handle ambiguous cases by adding a threshold check
-    if abs(major_score - minor_score) < 5: 
-        print("Scale detection is ambiguous; scores are close.")
-
-    return best_match
-
-
-def _change_scale(midi_data, target_scale):
-    """
-    Change the scale of a MIDI file.
+    Pitch and velocity transforms are expressed as tables so several of them can be
+    composed (`second[first]`) and applied with one lookup per column.
 
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
-        target_scale (str): Target scale, e.g., 'C_major' or 'A_minor'.
+        notes (np.ndarray): Note array of the MIDI file.
+        pitch_table (np.ndarray, optional): New pitch for each MIDI pitch.
+        velocity_table (np.ndarray, optional): New velocity for each MIDI velocity.
 
     Returns:
-        None
+        np.ndarray: The modified note array.
     """
-    # Validate target scale
-    if "_" not in target_scale or len(target_scale.split("_")) != 2:
-        raise ValueError("Target scale must be in the format 'Root_Type', e.g., 'C#-1_major'.")
-
-    # Parse target scale
-    root_note, scale_type = target_scale.split("_")
-    try:
-        root_note_number = pretty_midi.note_name_to_number(root_note)
-    except ValueError as e:
-        raise ValueError(f"Invalid root note '{root_note}': {e}")
-
-    if scale_type == "major":
-        target_intervals = [0, 2, 4, 5, 7, 9, 11]
-    elif scale_type == "minor":
-        target_intervals = [0, 2, 3, 5, 7, 8, 10]
-    else:
-        raise ValueError(f"Unknown scale type: {scale_type}. Supported types are 'major' and 'minor'.")
-
-    # Generate target scale
-    target_scale = [(root_note_number + i) % 12 for i in target_intervals]
-
-    # Map notes to the target scale
-    for instrument in midi_data.instruments:
-        for note in instrument.notes:
-            original_pitch = note.pitch % 12
-            nearest_pitch = min(target_scale, key=lambda x: abs(x - original_pitch))
-            note.pitch = note.pitch - original_pitch + nearest_pitch
+    if pitch_table is not None:
+        notes["pitch"] = pitch_table[notes["pitch"]]
+    if velocity_table is not None:
+        notes["velocity"] = velocity_table[notes["velocity"]]
+    return notes
 
 
-def _change_tempo(midi_data, target_tempo):
+def _snap_to_detected_keys(notes):
     """
-    Adjust the tempo of a MIDI file.
+    Snap every note to the scale of the key detected around it, following modulations.
 
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
-        target_tempo (float): Target tempo in beats per minute (BPM).
+        notes (np.ndarray): Note array of the MIDI file.
 
     Returns:
-        None
+        np.ndarray: The modified note array.
     """
-    # Validate target tempo
-    if target_tempo <= 0:
-        raise ValueError("Target tempo must be a positive value.")
-
-    # Calculate the duration of the MIDI file
-    tempo_times, tempo_values = midi_data.get_tempo_changes()
-    
-    if len(tempo_values) > 0:
-        # Calculate the average tempo if there are multiple tempo changes
-        original_tempo = sum(tempo_values) / len(tempo_values)
-    else:
-        # Default to 120 BPM if no tempo information exists
-        original_tempo = 120
-
-    # Calculate tempo ratio
-    tempo_ratio = original_tempo / target_tempo
-
-    # Scale the timing of all notes
-    for instrument in midi_data.instruments:
-        for note in instrument.notes:
-            note.start *= tempo_ratio
-            note.end *= tempo_ratio
-
-    # Scale timing of control changes
-    for instrument in midi_data.instruments:
-        for control_change in instrument.control_changes:
-            control_change.time *= tempo_ratio
+    keys = _key_timeline(notes)
+    if len(keys) == 0:
+        return notes
 
-    # Scale timing of meta events
-    for lyric in midi_data.lyrics:
-        lyric.time *= tempo_ratio
-
-    for time_signature in midi_data.time_signature_changes:
-        time_signature.time *= tempo_ratio
-        
-    for key_signature in midi_data.key_signature_changes:
-        key_signature.time *= tempo_ratio
+    print_message("[KEYS]", text_color="bright_blue")
+    for start, end, key in _key_segments(keys):
+        print_message(f"{start:.1f}s - {end:.1f}s: `{key}`", text_color="bright_blue", indent_level=1)
+    print_message("", include_border=True)
 
-    # Update the total time in the MIDI file
-    total_time = midi_data.get_end_time()
-    midi_data.adjust_times([0, total_time], [0, total_time * tempo_ratio])
+    # One table lookup per note, in the snap table of the note's key
+    note_keys = _note_keys(notes, keys)
+    scale_types = np.array([SCALE_TYPES.index(mode) for mode in KEY_MODES])
+    notes["pitch"] = SCALE_TABLES[scale_types[note_keys // 12], note_keys % 12, notes["pitch"]]
+    return notes
 
 
-def _adjust_note_durations(midi_data, duration_factor):
+def _retime_notes(notes, midi_data=None, target_tempo=None, duration_factor=None, swing_factor=None):
     """
-    Adjust the duration of notes in a MIDI file.
+    Apply a tempo change, a duration factor and swing to the notes in a single pass.
+
+    Note times are read once, every requested timing change is applied to plain start and
+    duration arrays in order (tempo, durations, swing), and the columns are written back once.
 
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
-        duration_factor (float): Factor by which to scale note durations.
+        notes (np.ndarray): Note array of the MIDI file.
+        midi_data (pretty_midi.PrettyMIDI, optional): MIDI data object, required for tempo changes.
+        target_tempo (float or list, optional): Target tempo in beats per minute (BPM), or a
+            tempo curve of `[time_seconds, bpm]` points (see `time_warp.py`).
+        duration_factor (float, optional): Factor by which to scale note durations.
+        swing_factor (float, optional): Proportion of delay for "swinging" notes (0.0 to 0.5).
 
     Returns:
-        None
+        np.ndarray: The modified note array.
     """
-    if duration_factor <= 0:
+    if duration_factor is not None and duration_factor <= 0:
         raise ValueError("Duration factor must be a positive value.")
-    
-    for instrument in midi_data.instruments:
-        for note in instrument.notes:
-            note.end = note.start + (note.end - note.start) * duration_factor
+    if swing_factor is not None and not (0.0 <= swing_factor <= 0.5):
+        raise ValueError("Swing factor must be between 0.0 and 0.5.")
 
+    start = notes["start"].copy()
+    duration = notes["end"] - start
 
-def _add_swing(midi_data, swing_factor=0.2):
-    """
-    Add a swing feel to the MIDI file by delaying every second note slightly.
+    if target_tempo is not None:
+        # Warp notes and all other events through the tempo map in one pass
+        time_map = _build_time_map(midi_data, target_tempo, max(_end_time(notes), midi_data.get_end_time()))
+        warped = _warp_midi(midi_data, np.concatenate([start, notes["end"]]), time_map)
+        start, duration = warped[:len(notes)], warped[len(notes):] - warped[:len(notes)]
 
-    Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
-        swing_factor (float): Proportion of delay for "swinging" notes (0.0 to 0.5).
+    if duration_factor is not None:
+        duration *= duration_factor
 
-    Returns:
-        None
-    """
-    if not (0.0 <= swing_factor <= 0.5):
-        raise ValueError("Swing factor must be between 0.0 and 0.5.")
+    if swing_factor is not None:
+        # Delay every second note of each instrument
+        swung = _instrument_rank(notes) % 2 == 1
+        start[swung] += duration[swung] * swing_factor
 
-    for instrument in midi_data.instruments:
-        for i, note in enumerate(instrument.notes):
-            if i % 2 == 1:  # Delay every second note
-                delay = (note.end - note.start) * swing_factor
-                note.start += delay
-                note.end += delay
+    notes["start"] = start
+    notes["end"] = start + duration
+    return notes
 
 
-def _adjust_velocity(midi_data, factor=1.2):
+def _velocity_table(factor=1.2):
     """
-    Adjust the velocity of all notes to change the dynamic intensity.
+    Build the velocity table scaling every MIDI velocity by a factor.
 
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
         factor (float): Factor to scale velocities (e.g., 1.2 for louder, 0.8 for softer).
 
     Returns:
-        None
+        np.ndarray: New velocity for each of the 128 MIDI velocities.
     """
     if factor <= 0:
         raise ValueError("Velocity factor must be a positive value.")
 
-    for instrument in midi_data.instruments:
-        for note in instrument.notes:
-            note.velocity = min(max(int(note.velocity * factor), 0), 127)
+    return np.clip(np.trunc(np.arange(128) * factor), 0, 127).astype(np.int16)
 
 
-def _add_arpeggiation(midi_data, interval=0.1):
+def _add_arpeggiation(notes, interval=0.1):
     """
     Convert chords into arpeggios by staggering the timing of notes.
 
+    Chords are detected by onset (see `chords.py`), and their notes are staggered from the
+    lowest to the highest, each starting `interval` after the one below it. Notes keep their
+    end times, and no note is delayed by more than half its duration.
+
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
+        notes (np.ndarray): Note array of the MIDI file.
         interval (float): Time interval to stagger arpeggiated notes.
 
     Returns:
-        None
+        np.ndarray: The modified note array.
     """
     if interval < 0:
         raise ValueError("Interval must be a non-negative value.")
 
-    for instrument in midi_data.instruments:
-        arpeggiated_notes = []
-        for note in instrument.notes:
-            staggered_time = note.start
-            arpeggiated_notes.append(pretty_midi.Note(
-                velocity=note.velocity,
-                pitch=note.pitch,
-                start=staggered_time,
-                end=note.end,
-            ))
-            note.start += interval  # Shift the start time for the next note
-        instrument.notes = arpeggiated_notes
-
-
-def _add_harmony(midi_data, interval=7):
+    order, chord_ids = _segment_chords(notes)
+    starts, ends = notes["start"][order], notes["end"][order]
+    notes["start"][order] = starts + np.minimum(_chord_ranks(chord_ids) * interval, (ends - starts) / 2)
+    return notes
+
+
+def _add_harmony(notes, degrees=2):
     """
     Add harmonic notes to the melody.
 
+    Every chord (or single note) gets one harmony note, `degrees` scale degrees above its top
+    note in the key detected around it (a diatonic third by default).
+
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
-        interval (int): Interval (in semitones) to add as harmony.
+        notes (np.ndarray): Note array of the MIDI file.
+        degrees (int): Scale degrees above the top note to add as harmony.
 
     Returns:
-        None
+        np.ndarray: The note array with the harmony notes appended to each instrument.
     """
-    for instrument in midi_data.instruments:
-        new_notes = []
-        for note in instrument.notes:
-            harmony_pitch = note.pitch + interval
-            if 0 <= harmony_pitch <= 127:  # Ensure valid MIDI range
-                harmony_note = pretty_midi.Note(
-                    velocity=note.velocity,
-                    pitch=harmony_pitch,
-                    start=note.start,
-                    end=note.end,
-                )
-                new_notes.append(harmony_note)
-        instrument.notes.extend(new_notes)
-
-
-def _humanize_midi(midi_data, timing_variation=0.05, velocity_variation=10):
+    keys = _key_timeline(notes)
+    if len(keys) == 0:
+        return notes
+
+    order, chord_ids = _segment_chords(notes)
+    harmony = notes[order[_chord_tops(chord_ids)]]
+
+    # Diatonic step tables of the 24 keys, indexed like the key timeline
+    key_tables = np.array([
+        _diatonic_table(SCALE_TYPES.index(mode), root, degrees) for mode in KEY_MODES for root in range(12)
+    ])
+    harmony["pitch"] = key_tables[_note_keys(harmony, keys), harmony["pitch"]]
+    harmony = harmony[harmony["pitch"] >= 0]  # Ensure valid MIDI range
+    return _group_by_instrument(np.concatenate([notes, harmony]))
+
+
+def _humanize_midi(notes, timing_variation=0.05, velocity_variation=10):
     """
     Add randomness to note timing and velocity for a humanized feel.
 
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
+        notes (np.ndarray): Note array of the MIDI file.
         timing_variation (float): Maximum time deviation (in seconds).
         velocity_variation (int): Maximum velocity deviation.
 
     Returns:
-        None
+        np.ndarray: The modified note array.
     """
     if timing_variation < 0:
         raise ValueError("Timing variation must be a non-negative value.")
     if velocity_variation < 0:
         raise ValueError("Velocity variation must be a non-negative value.")
 
-    for instrument in midi_data.instruments:
-        for note in instrument.notes:
-            note.start += random.uniform(-timing_variation, timing_variation)
-            note.end += random.uniform(-timing_variation, timing_variation)
-            note.velocity = min(max(note.velocity + random.randint(-velocity_variation, velocity_variation), 0), 127)
+    # Jitter starts and ends independently, keeping at least half of each note's duration
+    duration = notes["end"] - notes["start"]
+    notes["start"] = np.maximum(notes["start"] + np.random.uniform(-timing_variation, timing_variation, len(notes)), 0.0)
+    notes["end"] = np.maximum(notes["end"] + np.random.uniform(-timing_variation, timing_variation, len(notes)), notes["start"] + duration / 2)
+    notes["velocity"] = np.clip(notes["velocity"] + np.random.randint(-velocity_variation, velocity_variation + 1, len(notes)), 0, 127)
+    return notes
 
 
-def _transpose_midi(midi_data, semitones):
+def _transpose_table(semitones):
     """
-    Transpose all notes in the MIDI file by a given number of semitones.
+    Build the pitch table transposing every MIDI pitch by a number of semitones.
 
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
         semitones (int): Number of semitones to transpose (e.g., +2 or -2).
 
     Returns:
-        None
+        np.ndarray: New pitch for each of the 128 MIDI pitches.
     """
     # Validate semitones to prevent extreme values
     if not (-48 <= semitones <= 48):  # Typical instrument range limit
         raise ValueError("Semitones must be between -48 and 48 to ensure realistic transposition.")
 
-    for instrument in midi_data.instruments:
-        for note in instrument.notes:
-            note.pitch = max(0, min(127, note.pitch + semitones))  # Ensure within MIDI range
+    return np.clip(np.arange(128) + semitones, 0, 127)  # Ensure within MIDI range
 
 
-def _add_volume_effect(midi_data, value, time):
+def _add_volume_effect(notes, midi_data, value, time):
     """
     Add a volume control change to the MIDI file.
 
     Args:
-        midi_data (pretty_midi.PrettyMIDI): MIDI data object.
+        notes (np.ndarray): Note array of the MIDI file.
+        midi_data (pretty_midi.PrettyMIDI): MIDI data object holding the file's other events.
         value (int): Volume value (0–127).
         time (float): Time in seconds for the control change.
 
     Returns:
-        None
+        np.ndarray: The (unchanged) note array.
     """
     # Validate volume value
     if not (0 <= value <= 127):
         raise ValueError("Volume value must be between 0 and 127.")
 
     # Validate time to ensure it is within the MIDI file's duration
-    if time < 0 or time > midi_data.get_end_time():
+    if time < 0 or time > max(midi_data.get_end_time(), _end_time(notes)):
         raise ValueError("Time must be within the duration of the MIDI file.")
 
     for instrument in midi_data.instruments:
         instrument.control_changes.append(pretty_midi.ControlChange(number=7, value=value, time=time))
+    return notes
 
 if __name__ == "__main__":
     print("This script is a utility module and cannot be executed directly.")
\ No newline at end of file